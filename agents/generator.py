@@ -4,7 +4,8 @@ import logging
 from langchain_ollama import ChatOllama
 from langchain_core.messages import SystemMessage, HumanMessage
 
-from config import CHAT_MODEL, OLLAMA_BASE_URL
+from config import CHAT_MODEL, OLLAMA_BASE_URL, OLLAMA_KEEP_ALIVE
+from agents.llm import invoke_llm
 from agents.state import AgentState
 
 logger = logging.getLogger(__name__)
@@ -15,7 +16,7 @@ def generate_code(state: AgentState) -> dict:
     iteration = state.get("iteration", 0) + 1
     logger.info("[GENERATOR] Generating code (iteration %d)...", iteration)
 
-    llm = ChatOllama(model=CHAT_MODEL, base_url=OLLAMA_BASE_URL, temperature=0)
+    llm = ChatOllama(model=CHAT_MODEL, base_url=OLLAMA_BASE_URL, temperature=0, keep_alive=OLLAMA_KEEP_ALIVE)
 
     # Build system prompt
     system_content = """You are an expert code generator. Your job is to write high-quality, complete code based on the user's request.
@@ -56,7 +57,7 @@ Rules:
     messages.append(HumanMessage(content=state["user_prompt"]))
 
     start = time.time()
-    response = llm.invoke(messages)
+    response = invoke_llm("generator", llm, messages)
     duration_ms = (time.time() - start) * 1000
 
     logger.info("[GENERATOR] Code generated (%d chars, %.0fms)", len(response.content), duration_ms)
@@ -1,12 +1,9 @@
 import logging
+import threading
+import time
 
-from langgraph.graph import StateGraph, END
-
+from agents.llm import record_call
 from agents.state import AgentState
-from agents.generator import generate_code
-from agents.reviewer import review_code
-from agents.router import route_task
-from agents.planner import plan_code
 from rag.retriever import retrieve_context
 from config import MAX_AGENT_ITERATIONS
 
@@ -16,7 +13,14 @@ logger = logging.getLogger(__name__)
 def retrieve_context_node(state: AgentState) -> dict:
     """Retrieve RAG context for the user's prompt."""
     logger.info("[1/RAG] Retrieving context for project=%s", state["project_id"])
-    context = retrieve_context(state["project_id"], state["user_prompt"])
+    start = time.time()
+    context = retrieve_context(
+        state["project_id"],
+        state["user_prompt"],
+        state.get("current_file_path", ""),
+        state.get("current_file_content", ""),
+    )
+    record_call("retrieval", time.time() - start)
     logger.info("[1/RAG] Retrieved %d chars of context", len(context))
     return {"rag_context": context}
 
@@ -49,7 +53,7 @@ def finalize(state: AgentState) -> dict:
     return {"final_response": state["generated_code"]}
 
 
-def build_agent_graph() -> StateGraph:
+def build_agent_graph():
     """Build the LangGraph state graph for the code generation pipeline.
 
     Flow:
@@ -60,6 +64,15 @@ def build_agent_graph() -> StateGraph:
             (APPROVE or max iterations) → finalize → END
             (REVISE) → generate_code (loop)
     """
+    # langgraph/langchain are imported here rather than at module level so that
+    # importing the app or the eval CLI stays fast
+    from langgraph.graph import StateGraph, END
+
+    from agents.generator import generate_code
+    from agents.reviewer import review_code
+    from agents.router import route_task
+    from agents.planner import plan_code
+
     graph = StateGraph(AgentState)
 
     # Add nodes
@@ -108,5 +121,22 @@ def build_agent_graph() -> StateGraph:
     return graph.compile()
 
 
-# Pre-compiled graph instance
-agent_graph = build_agent_graph()
+_agent_graph = None
+_graph_lock = threading.Lock()
+
+
+def get_agent_graph():
+    """Compiled graph, built once on first use (or during app warm-up)."""
+    global _agent_graph
+    if _agent_graph is None:
+        with _graph_lock:
+            if _agent_graph is None:
+                _agent_graph = build_agent_graph()
+    return _agent_graph
+
+
+def __getattr__(name: str):
+    # Keeps `from agents.graph import agent_graph` working without compiling at import time
+    if name == "agent_graph":
+        return get_agent_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
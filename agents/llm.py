@@ -0,0 +1,136 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Iterator, Protocol
+
+from pydantic import BaseModel
+
+if TYPE_CHECKING:
+    from langchain_core.messages import BaseMessage
+
+
+class ResponseCache(Protocol):
+    """What invoke_llm needs from a response cache (see evals/cache.py)."""
+
+    def get_or_call(self, key: dict, call: Callable[[], dict]) -> dict:
+        ...
+
+
+_cache: ResponseCache | None = None
+
+# (temperature, sample index) while drawing one of several samples, see sampling()
+_sampling: ContextVar[tuple[float, int] | None] = ContextVar("llm_sampling", default=None)
+
+
+@dataclass
+class CallStats:
+    """Time per node (seconds, summed over iterations) and token usage of one graph run."""
+    timings: dict[str, float] = field(default_factory=dict)
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    # Recorded latency of cached calls minus the time their lookups took; add it
+    # to the run's wall time to get the latency the recorded run had
+    replayed_seconds: float = 0.0
+
+
+_stats: ContextVar[CallStats | None] = ContextVar("llm_stats", default=None)
+
+
+@contextmanager
+def collect_stats() -> Iterator[CallStats]:
+    """Collect CallStats for the LLM calls and retrieval made within this block,
+    including graph nodes it runs in worker threads (they get a copy of the context)."""
+    stats = CallStats()
+    token = _stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _stats.reset(token)
+
+
+def record_call(node: str, seconds: float, usage: dict | None = None, elapsed: float | None = None) -> None:
+    """Add one call to the active collect_stats() block, if any. `elapsed` is the
+    wall time actually spent, when `seconds` is a latency recorded earlier."""
+    stats = _stats.get()
+    if stats is None:
+        return
+    stats.timings[node] = stats.timings.get(node, 0.0) + seconds
+    if elapsed is not None:
+        stats.replayed_seconds += seconds - elapsed
+    if usage:
+        stats.prompt_tokens += usage.get("input_tokens", 0)
+        stats.completion_tokens += usage.get("output_tokens", 0)
+
+
+def set_response_cache(cache: ResponseCache | None) -> None:
+    """Route every agent LLM call through cache (None to call the model directly)."""
+    global _cache
+    _cache = cache
+
+
+@contextmanager
+def sampling(temperature: float, sample: int) -> Iterator[None]:
+    """Within this block (and graph nodes it starts), agent LLM calls use
+    `temperature` and are cached as sample number `sample`, so repeated runs
+    of the same prompt give independent completions (pass@k evals)."""
+    token = _sampling.set((temperature, sample))
+    try:
+        yield
+    finally:
+        _sampling.reset(token)
+
+
+def invoke_llm(node: str, llm, messages: list["BaseMessage"], schema: type[BaseModel] | None = None) -> Any:
+    """llm.invoke(messages), or its structured-output variant when schema is given.
+
+    With a response cache installed, identical calls (model, messages,
+    temperature, node) are answered from it; the result types are the same
+    either way: an AIMessage, or a schema instance.
+    """
+    override = _sampling.get()
+    sample = 0
+    if override is not None:
+        temperature, sample = override
+        llm = llm.model_copy(update={"temperature": temperature})
+    # include_raw keeps the AIMessage, and with it the token usage, of structured calls
+    runnable = llm.with_structured_output(schema, include_raw=True) if schema else llm
+
+    def invoke() -> tuple[Any, dict | None]:
+        response = runnable.invoke(messages)
+        if not schema:
+            return response, response.usage_metadata
+        if response["parsing_error"]:
+            raise response["parsing_error"]
+        return response["parsed"], response["raw"].usage_metadata
+
+    start = time.time()
+    if _cache is None:
+        result, usage = invoke()
+        record_call(node, time.time() - start, usage)
+        return result
+
+    def call() -> dict:
+        result, usage = invoke()
+        if schema:
+            return {"structured": result.model_dump(), "usage": usage}
+        return {"content": result.content, "usage": usage}
+
+    key = {
+        "node": node,
+        "model": llm.model,
+        "temperature": llm.temperature,
+        "messages": [{"role": m.type, "content": m.content} for m in messages],
+    }
+    if sample:
+        key["sample"] = sample
+    value = _cache.get_or_call(key, call)
+    elapsed = time.time() - start
+    # Cache values carry the model call's own latency; entries recorded before
+    # that was stored fall back to the lookup time
+    record_call(node, value.get("seconds", elapsed), value.get("usage"), elapsed)
+    if schema:
+        return schema.model_validate(value["structured"])
+    from langchain_core.messages import AIMessage
+
+    return AIMessage(content=value["content"], usage_metadata=value.get("usage"))
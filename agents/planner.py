@@ -4,7 +4,8 @@ import logging
 from langchain_ollama import ChatOllama
 from langchain_core.messages import SystemMessage, HumanMessage
 
-from config import CHAT_MODEL, OLLAMA_BASE_URL
+from config import CHAT_MODEL, OLLAMA_BASE_URL, OLLAMA_KEEP_ALIVE
+from agents.llm import invoke_llm
 from agents.state import AgentState
 
 logger = logging.getLogger(__name__)
@@ -14,7 +15,7 @@ def plan_code(state: AgentState) -> dict:
     """Planner agent node. Creates an implementation plan for complex tasks."""
     logger.info("[3/PLANNER] Creating implementation plan...")
 
-    llm = ChatOllama(model=CHAT_MODEL, base_url=OLLAMA_BASE_URL, temperature=0)
+    llm = ChatOllama(model=CHAT_MODEL, base_url=OLLAMA_BASE_URL, temperature=0, keep_alive=OLLAMA_KEEP_ALIVE)
 
     system_content = """You are an expert software architect and planner. Your job is to analyze a coding request and create a clear, actionable implementation plan that a code generator will follow.
 
@@ -50,7 +51,7 @@ Rules:
     messages.append(HumanMessage(content=state["user_prompt"]))
 
     start = time.time()
-    response = llm.invoke(messages)
+    response = invoke_llm("planner", llm, messages)
     duration_ms = (time.time() - start) * 1000
 
     logger.info("[3/PLANNER] Plan ready (%d chars, %.0fms)", len(response.content), duration_ms)
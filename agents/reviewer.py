@@ -6,7 +6,8 @@ from langchain_ollama import ChatOllama
 from langchain_core.messages import SystemMessage, HumanMessage
 from pydantic import BaseModel, Field
 
-from config import CHAT_MODEL, OLLAMA_BASE_URL
+from config import CHAT_MODEL, OLLAMA_BASE_URL, OLLAMA_KEEP_ALIVE
+from agents.llm import invoke_llm
 from agents.state import AgentState
 
 logger = logging.getLogger(__name__)
@@ -22,8 +23,7 @@ def review_code(state: AgentState) -> dict:
     """Code Reviewer agent node. Reviews generated code and decides APPROVE or REVISE."""
     logger.info("[REVIEWER] Reviewing code (iteration %d, %d chars)...", state.get("iteration", 0), len(state.get("generated_code", "")))
 
-    llm = ChatOllama(model=CHAT_MODEL, base_url=OLLAMA_BASE_URL, temperature=0)
-    structured_llm = llm.with_structured_output(ReviewOutput)
+    llm = ChatOllama(model=CHAT_MODEL, base_url=OLLAMA_BASE_URL, temperature=0, keep_alive=OLLAMA_KEEP_ALIVE)
 
     system_content = """You are an expert code reviewer. Your job is to review generated code for quality and correctness.
 
@@ -51,7 +51,7 @@ Important: Only request revision for real issues. Minor style preferences are no
     ]
 
     start = time.time()
-    response = structured_llm.invoke(messages)
+    response = invoke_llm("reviewer", llm, messages, schema=ReviewOutput)
     duration_ms = (time.time() - start) * 1000
 
     logger.info("[REVIEWER] Decision: %s (%.0fms)", response.decision, duration_ms)
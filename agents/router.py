@@ -6,7 +6,8 @@ from langchain_ollama import ChatOllama
 from langchain_core.messages import SystemMessage, HumanMessage
 from pydantic import BaseModel, Field
 
-from config import ROUTER_MODEL, OLLAMA_BASE_URL
+from config import ROUTER_MODEL, OLLAMA_BASE_URL, OLLAMA_KEEP_ALIVE
+from agents.llm import invoke_llm
 from agents.state import AgentState
 
 logger = logging.getLogger(__name__)
@@ -22,8 +23,7 @@ def route_task(state: AgentState) -> dict:
     """Router agent node. Classifies the task as simple or complex."""
     logger.info("[2/ROUTER] Classifying task complexity...")
 
-    llm = ChatOllama(model=ROUTER_MODEL, base_url=OLLAMA_BASE_URL, temperature=0)
-    structured_llm = llm.with_structured_output(RouterOutput)
+    llm = ChatOllama(model=ROUTER_MODEL, base_url=OLLAMA_BASE_URL, temperature=0, keep_alive=OLLAMA_KEEP_ALIVE)
 
     system_content = """You are a task complexity classifier for a code editor AI assistant. Your job is to decide whether a coding request is SIMPLE or COMPLEX.
 
@@ -51,7 +51,7 @@ COMPLEX tasks (need an implementation plan first):
     ]
 
     start = time.time()
-    response = structured_llm.invoke(messages)
+    response = invoke_llm("router", llm, messages, schema=RouterOutput)
     duration_ms = (time.time() - start) * 1000
 
     logger.info("[2/ROUTER] Decision: %s (%.0fms) - %s", response.complexity.upper(), duration_ms, response.reason)
@@ -5,7 +5,7 @@ from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from agents.graph import agent_graph
+from agents.graph import get_agent_graph
 
 logger = logging.getLogger(__name__)
 
@@ -56,7 +56,7 @@ async def chat(req: ChatRequest):
     # Run the agent graph to completion
     start = time.time()
     try:
-        result = agent_graph.invoke(initial_state)
+        result = get_agent_graph().invoke(initial_state)
     except Exception:
         logger.exception("Agent pipeline error")
         raise HTTPException(status_code=500, detail="Agent pipeline error")
@@ -1,33 +1,130 @@
-from fastapi import APIRouter, HTTPException
+import base64
+import json
+from typing import Literal
+
+import numpy as np
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response
 from pydantic import BaseModel
 
-from rag.embed import embed_texts, embed_query
+from rag.embed import embed_array, embed_query
 
 router = APIRouter()
 
+# Response media types for /api/embed*, chosen from the Accept header (highest q-value
+# wins, then the earliest entry; JSON when nothing supported is asked for)
+OCTET_STREAM = "application/octet-stream"
+MSGPACK = "application/msgpack"
+JSON = "application/json"
+_MEDIA_TYPES = {
+    OCTET_STREAM: OCTET_STREAM,
+    "application/msgpack": MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+    JSON: JSON,
+    "application/*": JSON,
+    "*/*": JSON,
+}
+
 
 class EmbedRequest(BaseModel):
     texts: list[str]
     prefix: str = "passage: "
+    # JSON responses only: "float" lists (default) or one base64 string of raw bytes per vector
+    encoding_format: Literal["float", "base64"] = "float"
+    # Element type for base64, binary and msgpack responses (little-endian)
+    dtype: Literal["float32", "float16"] = "float32"
 
 
 class EmbedQueryRequest(BaseModel):
     text: str
+    encoding_format: Literal["float", "base64"] = "float"
+    dtype: Literal["float32", "float16"] = "float32"
+
+
+def _quality(params: list[str]) -> float:
+    for param in params:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 1.0
+    return 1.0
+
+
+def negotiate(accept: str) -> str:
+    """Pick the response media type from an Accept header (JSON unless binary is preferred)."""
+    candidates = []
+    for order, part in enumerate(accept.split(",")):
+        media_type, *params = part.split(";")
+        supported = _MEDIA_TYPES.get(media_type.strip().lower())
+        quality = _quality(params)
+        if supported and quality > 0:
+            candidates.append((-quality, order, supported))
+    return min(candidates)[2] if candidates else JSON
+
+
+def _as_bytes(embeddings: np.ndarray, dtype: str) -> memoryview:
+    """Little-endian raw bytes of the array; no copy when it is already contiguous in that dtype."""
+    array = np.ascontiguousarray(embeddings, dtype=np.dtype(dtype).newbyteorder("<"))
+    return memoryview(array).cast("B")
+
+
+def encode_embeddings(embeddings: np.ndarray, media_type: str, encoding_format: str, dtype: str, key: str) -> Response:
+    """Serialize an (n, dim) array, or a single (dim,) vector, as the negotiated format.
+
+    Binary and msgpack bodies carry the raw matrix; shape and dtype travel in
+    X-Embedding-Shape / X-Embedding-Dtype headers (binary) or alongside the
+    data (msgpack).
+    """
+    shape = ",".join(str(d) for d in embeddings.shape)
+
+    if media_type == OCTET_STREAM:
+        return Response(
+            content=_as_bytes(embeddings, dtype),
+            media_type=OCTET_STREAM,
+            headers={"X-Embedding-Shape": shape, "X-Embedding-Dtype": dtype},
+        )
+
+    if media_type == MSGPACK:
+        try:
+            import msgpack
+        except ImportError:
+            raise HTTPException(status_code=406, detail="msgpack responses need the msgpack package")
+        body = msgpack.packb({
+            "shape": list(embeddings.shape),
+            "dtype": dtype,
+            key: _as_bytes(embeddings, dtype),
+        })
+        return Response(content=body, media_type=MSGPACK)
+
+    if encoding_format == "base64":
+        if embeddings.ndim == 1:
+            value = base64.b64encode(_as_bytes(embeddings, dtype)).decode("ascii")
+        else:
+            value = [base64.b64encode(_as_bytes(row, dtype)).decode("ascii") for row in embeddings]
+        payload = {key: value, "dtype": dtype}
+    else:
+        payload = {key: embeddings.tolist()}
+    return Response(content=json.dumps(payload, separators=(",", ":")).encode(), media_type=JSON)
 
 
 @router.post("/api/embed")
-async def embed(req: EmbedRequest):
+async def embed(req: EmbedRequest, request: Request):
     """Generate embeddings for a list of texts."""
     if not req.texts:
         raise HTTPException(status_code=400, detail="Missing texts")
-    embeddings = embed_texts(req.texts, prefix=req.prefix)
-    return {"embeddings": embeddings}
+    embeddings = embed_array(req.texts, prefix=req.prefix)
+    media_type = negotiate(request.headers.get("accept", ""))
+    return encode_embeddings(embeddings, media_type, req.encoding_format, req.dtype, "embeddings")
 
 
 @router.post("/api/embed-query")
-async def embed_single_query(req: EmbedQueryRequest):
+async def embed_single_query(req: EmbedQueryRequest, request: Request):
     """Generate an embedding for a single search query."""
     if not req.text:
         raise HTTPException(status_code=400, detail="Missing text")
-    embedding = embed_query(req.text)
-    return {"embedding": embedding}
+    embedding = np.asarray(embed_query(req.text), dtype=np.float32)
+    media_type = negotiate(request.headers.get("accept", ""))
+    return encode_embeddings(embedding, media_type, req.encoding_format, req.dtype, "embedding")
@@ -1,10 +1,13 @@
+import asyncio
 import time
 import logging
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
-from rag.embeddings import index_project
+from rag.embeddings import index_project, index_files
+from rag.file_queue import FileIndexQueue
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +18,21 @@ class EmbeddingsRequest(BaseModel):
     project_id: str
 
 
+class FileEntry(BaseModel):
+    path: str
+    content: str | None = None
+    deleted: bool = False
+
+
+class FileEmbeddingsRequest(BaseModel):
+    project_id: str
+    files: list[FileEntry]
+    wait: bool = False  # respond after re-indexing instead of right after queueing
+
+
+file_index_queue = FileIndexQueue(index_files)
+
+
 @router.post("/api/embeddings")
 async def create_embeddings(req: EmbeddingsRequest):
     """Index a project's files into vector embeddings."""
@@ -25,14 +43,37 @@ async def create_embeddings(req: EmbeddingsRequest):
     start = time.time()
 
     try:
-        chunks_indexed = await index_project(req.project_id)
+        chunks_indexed, report = await index_project(req.project_id)
         duration_ms = (time.time() - start) * 1000
-        logger.info("Embeddings done  project=%s  chunks=%d  duration=%.0fms",
-                     req.project_id, chunks_indexed, duration_ms)
-        return {"chunksIndexed": chunks_indexed}
+        logger.info("Embeddings done  project=%s  chunks=%d  skipped=%d  duration=%.0fms",
+                     req.project_id, chunks_indexed, report.files_skipped, duration_ms)
+        return {"chunksIndexed": chunks_indexed, "filter": report.as_dict()}
     except ValueError as e:
         logger.warning("Project not found: %s", req.project_id)
         raise HTTPException(status_code=404, detail=str(e))
     except Exception:
         logger.exception("Embeddings failed  project=%s", req.project_id)
         raise HTTPException(status_code=500, detail="Embedding indexing error")
+
+
+@router.post("/api/embeddings/files")
+async def update_file_embeddings(req: FileEmbeddingsRequest):
+    """Re-index only the given files (e.g. on editor save), debounced per file."""
+    if not req.project_id or not req.files:
+        raise HTTPException(status_code=400, detail="Missing project_id or files")
+    for f in req.files:
+        if not f.path or (f.content is None and not f.deleted):
+            raise HTTPException(status_code=400, detail="Each file needs a path and content or deleted=true")
+
+    logger.info("File embeddings request  project=%s  files=%d", req.project_id, len(req.files))
+    futures = [file_index_queue.submit(req.project_id, f.model_dump()) for f in req.files]
+
+    if not req.wait:
+        return JSONResponse({"queued": len(futures)}, status_code=202)
+
+    try:
+        counts = await asyncio.gather(*futures)
+    except Exception:
+        logger.exception("File embeddings failed  project=%s", req.project_id)
+        raise HTTPException(status_code=500, detail="Embedding indexing error")
+    return {"chunksIndexed": {f.path: n for f, n in zip(req.files, counts)}}
@@ -1,90 +1,206 @@
-import asyncio
 import os
 import time
-import tempfile
 import logging
-from pathlib import Path
+from contextlib import AsyncExitStack
 
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
+from config import TERMINAL_PYFORK
+from runner.jobs import Job, job_manager
+from runner.process import ConcurrencyLimiter, ProcessRun, QueueTimeout, make_run_dir, remove_run_dir
+from runner.pyfork import get_forkserver
+from runner.workspace import get_workspace_cache, validate_project_id
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Shared by every /api/terminal request in this server process
+limiter = ConcurrencyLimiter()
+
 
 class TerminalRequest(BaseModel):
     command: str
     cwd: str | None = None
     file: dict | None = None
-
-
-@router.post("/api/terminal")
-async def run_terminal(req: TerminalRequest):
-    """Execute a command and stream stdout/stderr."""
+    pty: bool = False  # run attached to a pseudo-terminal (stdout and stderr merged)
+    project_id: str | None = None  # for the per-project concurrency limit
+    # Run inside the project's cached workspace (needs project_id); cwd is then
+    # relative to the project root, and file/files are written into it first
+    workspace: bool = False
+    files: dict[str, str | None] | None = None  # changed files since the last run, None = deleted
+    sync: bool = False  # reload every project file into the workspace first
+    # Keep the job running when the client disconnects; reattach via /api/terminal/jobs/{id}/output
+    detach: bool = False
+    # Client-chosen id for this run: a retried request with the same key (and
+    # project) attaches to the still-running job instead of starting another
+    client_key: str | None = None
+
+
+def _error(message: str) -> list[str]:
+    return [f"{message}\n", "\n__EXIT_CODE__:-1\n"]
+
+
+def _start_job(req: TerminalRequest) -> tuple[Job, bool]:
+    """Validate the request and start its run as a job (or find the retried one)."""
     if not req.command:
         raise HTTPException(status_code=400, detail="command is required")
+    if req.workspace and not req.project_id:
+        raise HTTPException(status_code=400, detail="workspace runs need a project_id")
+    if req.workspace:
+        try:
+            validate_project_id(req.project_id)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
-    logger.info("Terminal request  command=%.120s  cwd=%s", req.command, req.cwd)
+    job = job_manager.find(req.client_key, req.project_id)
+    if job:
+        logger.info("Terminal request reattached  job=%s  client_key=%s", job.id, req.client_key)
+        return job, False
+
+    logger.info("Terminal request  command=%.120s  cwd=%s  workspace=%s", req.command, req.cwd, req.workspace)
 
     actual_command = req.command
     temp_dir = None
-
-    # Write file to temp if provided
-    if req.file and req.file.get("name") and req.file.get("content") is not None:
-        temp_dir = tempfile.mkdtemp(prefix="ai-ide-run-")
-        file_path = os.path.join(temp_dir, req.file["name"])
-        Path(file_path).write_text(req.file["content"], encoding="utf-8")
+    changes = dict(req.files or {})
+    has_file = req.file and req.file.get("name") and req.file.get("content") is not None
+
+    if req.workspace:
+        if has_file:
+            changes[req.file["name"]] = req.file["content"]
+    elif has_file:
+        # Write file to temp if provided
+        try:
+            temp_dir, file_path = make_run_dir(req.file["name"], req.file["content"])
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         actual_command = req.command.replace(f'"{req.file["name"]}"', f'"{file_path}"')
         logger.debug("Temp file created: %s", file_path)
 
-    working_dir = temp_dir or req.cwd or os.environ.get("HOME", "/")
-
-    async def stream_output():
-        start = time.time()
-        process = await asyncio.create_subprocess_shell(
-            actual_command,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            cwd=working_dir,
-            env={**os.environ, "TERM": "dumb", "FORCE_COLOR": "0"},
-        )
-
-        async def read_stream(stream):
-            while True:
-                line = await stream.read(1024)
-                if not line:
-                    break
-                yield line.decode()
-
-        # Read stdout and stderr concurrently
-        tasks = []
-        if process.stdout:
-            async for chunk in read_stream(process.stdout):
-                yield chunk
-        if process.stderr:
-            async for chunk in read_stream(process.stderr):
-                yield chunk
-
-        exit_code = await process.wait()
-        duration_ms = (time.time() - start) * 1000
-
-        logger.info("Terminal done  exit_code=%d  duration=%.0fms  command=%.80s",
-                     exit_code, duration_ms, req.command)
-
-        # Clean up temp file
-        if temp_dir and req.file and req.file.get("name"):
+    async def run_output(job: Job):
+        try:
             try:
-                os.unlink(os.path.join(temp_dir, req.file["name"]))
-                logger.debug("Temp file cleaned up: %s", temp_dir)
-            except OSError:
-                logger.warning("Failed to clean up temp file: %s", temp_dir)
+                await limiter.acquire(req.project_id)
+            except QueueTimeout as e:
+                logger.warning("Terminal queue timeout  project=%s", req.project_id)
+                for line in _error(f"Too many processes running ({e}), try again later"):
+                    yield line
+                return
 
-        yield f"\n__EXIT_CODE__:{exit_code}\n"
+            try:
+                async with AsyncExitStack() as stack:
+                    working_dir = temp_dir or req.cwd or os.environ.get("HOME", "/")
+                    if req.workspace:
+                        try:
+                            workspace = await stack.enter_async_context(
+                                get_workspace_cache().use(req.project_id, changes, req.sync)
+                            )
+                            working_dir = workspace.path_for(req.cwd) if req.cwd else workspace.tree
+                        except ValueError as e:
+                            for line in _error(str(e)):
+                                yield line
+                            return
+                        except Exception as e:
+                            # Project load (database) or disk errors: end the stream with an exit code
+                            logger.exception("Workspace prepare failed  project=%s", req.project_id)
+                            for line in _error(f"Could not prepare the project workspace: {e}"):
+                                yield line
+                            return
+
+                    start = time.time()
+                    run = ProcessRun(
+                        actual_command,
+                        cwd=working_dir,
+                        env={**os.environ, "TERM": "dumb", "FORCE_COLOR": "0", "PYTHONUNBUFFERED": "1"},
+                        pty_mode=req.pty,
+                        forkserver=get_forkserver() if TERMINAL_PYFORK else None,
+                    )
+                    # stdout and stderr are read concurrently so neither pipe can fill up and block the process
+                    async for chunk in run.stream():
+                        yield chunk
+            finally:
+                limiter.release(req.project_id)
+
+            job.exit_code = run.exit_code
+            duration_ms = (time.time() - start) * 1000
+            logger.info("Terminal done  job=%s  exit_code=%d  duration=%.0fms  forked=%s  command=%.80s",
+                         job.id, run.exit_code, duration_ms, run.forked, req.command)
+
+            status = run.status_message()
+            if status:
+                yield status
+            yield f"\n__EXIT_CODE__:{run.exit_code}\n"
+        finally:
+            # Runs on normal exit, errors and kills alike
+            remove_run_dir(temp_dir)
+
+    return job_manager.start(run_output, req.command, req.project_id, req.client_key)
+
+
+def _follow_response(job: Job, offset: int = 0, kill_on_disconnect: bool = False) -> StreamingResponse:
+    """Stream a job's output from offset until it ends; the X-Job-Offset header is the
+    offset the stream actually starts at (later if older output was already dropped,
+    earlier if offset is past the output written so far)."""
+    start = min(max(offset, job.buffer.start), job.buffer.total)
+
+    async def follow():
+        try:
+            async for chunk in job.follow(start):
+                yield chunk
+        finally:
+            if kill_on_disconnect and not job.done:
+                logger.info("Terminal client disconnected, killing job  job=%s", job.id)
+                job.kill()
 
     return StreamingResponse(
-        stream_output(),
+        follow(),
         media_type="text/plain; charset=utf-8",
-        headers={"Transfer-Encoding": "chunked"},
+        headers={"Transfer-Encoding": "chunked", "X-Job-Id": job.id, "X-Job-Offset": str(start)},
     )
+
+
+@router.post("/api/terminal")
+async def run_terminal(req: TerminalRequest):
+    """Execute a command and stream stdout/stderr. Unless detach is set, disconnecting kills it."""
+    job, created = _start_job(req)
+    # A retried request only follows the job; the original request decides its lifetime
+    return _follow_response(job, kill_on_disconnect=created and not req.detach)
+
+
+@router.post("/api/terminal/jobs")
+async def start_job(req: TerminalRequest):
+    """Start a detached job and return its id without streaming."""
+    job, _ = _start_job(req)
+    return job.info()
+
+
+@router.get("/api/terminal/jobs")
+async def list_jobs(project_id: str | None = None):
+    return {"jobs": [job.info() for job in job_manager.list(project_id)]}
+
+
+def _get_job(job_id: str) -> Job:
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/api/terminal/jobs/{job_id}")
+async def get_job(job_id: str):
+    return _get_job(job_id).info()
+
+
+@router.get("/api/terminal/jobs/{job_id}/output")
+async def job_output(job_id: str, offset: int = 0):
+    """(Re)attach to a job: its output from byte offset `offset`, then live until it exits."""
+    return _follow_response(_get_job(job_id), offset)
+
+
+@router.post("/api/terminal/jobs/{job_id}/kill")
+async def kill_job(job_id: str):
+    job = _get_job(job_id)
+    job.kill()
+    return job.info()
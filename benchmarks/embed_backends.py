@@ -0,0 +1,139 @@
+"""
+Benchmark embedding inference backends on real project chunks.
+
+Each backend runs in its own process so peak memory is measured in isolation.
+Embeddings are compared row by row against the fp32 PyTorch reference.
+
+Usage:
+    python -m benchmarks.embed_backends --path .
+    python -m benchmarks.embed_backends --project-id <uuid> --backends torch,onnx,onnx-int8
+    python -m benchmarks.embed_backends --path . --model intfloat/multilingual-e5-small --threads 4
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+
+# Load .env and configure logging before anything else
+import config as app_config
+
+from rag.embeddings import chunk_project
+
+_SOURCE_EXTENSIONS = (".py", ".js", ".jsx", ".ts", ".tsx", ".go", ".rs", ".java", ".c", ".cpp", ".h", ".md")
+
+
+def load_local_files(root: str) -> dict[str, str]:
+    """Read source files under root into the same {path: content} shape as projects.file_contents."""
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith(".") and d not in ("node_modules", "__pycache__", "venv")]
+        for name in filenames:
+            if not name.endswith(_SOURCE_EXTENSIONS):
+                continue
+            path = os.path.join(dirpath, name)
+            try:
+                with open(path, encoding="utf-8") as f:
+                    files[os.path.relpath(path, root)] = f.read()
+            except (UnicodeDecodeError, OSError):
+                continue
+    return files
+
+
+def load_project_files(project_id: str) -> dict[str, str]:
+    from rag.db import get_client
+
+    result = get_client().table("projects").select("file_contents").eq("id", project_id).single().execute()
+    return result.data.get("file_contents", {}) if result.data else {}
+
+
+def _bench_backend(backend: str, model_name: str, threads: int, texts: list[str], batch_size: int, queue):
+    """Child process: load one backend, encode all texts and report throughput and peak RSS."""
+    from rag.embed import load_model
+
+    load_start = time.perf_counter()
+    model = load_model(backend=backend, model_name=model_name, threads=threads)
+    load_seconds = time.perf_counter() - load_start
+
+    # Warm-up so one-off graph/kernel initialisation is not counted
+    model.encode(texts[:batch_size], batch_size=batch_size, normalize_embeddings=True)
+
+    start = time.perf_counter()
+    embeddings = model.encode(texts, batch_size=batch_size, normalize_embeddings=True)
+    seconds = time.perf_counter() - start
+
+    queue.put({
+        "backend": backend,
+        "model": model_name,
+        "load_seconds": load_seconds,
+        "docs_per_sec": len(texts) / seconds if seconds else 0.0,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "embeddings": np.asarray(embeddings, dtype=np.float32),
+    })
+
+
+def run_backend(backend: str, model_name: str, threads: int, texts: list[str], batch_size: int) -> dict:
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=_bench_backend, args=(backend, model_name, threads, texts, batch_size, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def cosine_agreement(reference: np.ndarray, candidate: np.ndarray) -> tuple[float, float] | None:
+    """Mean and minimum row-wise cosine similarity, or None when dimensions differ."""
+    if reference.shape != candidate.shape:
+        return None
+    ref = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    cand = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    cos = np.sum(ref * cand, axis=1)
+    return float(cos.mean()), float(cos.min())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding inference backends")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--path", default=".", help="Local directory to chunk")
+    source.add_argument("--project-id", default="", help="Chunk file_contents of a Supabase project")
+    parser.add_argument("--backends", default="torch,torch-int8,onnx,onnx-int8")
+    parser.add_argument("--model", default=app_config.EMBEDDING_MODEL, help="Model for non-reference runs")
+    parser.add_argument("--threads", type=int, default=app_config.EMBEDDING_THREADS)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--limit", type=int, default=500, help="Max chunks to embed (0=all)")
+    args = parser.parse_args()
+
+    files = load_project_files(args.project_id) if args.project_id else load_local_files(args.path)
+    chunks = chunk_project(files)
+    if args.limit > 0:
+        chunks = chunks[:args.limit]
+    if not chunks:
+        print("No chunks to embed. Check --path / --project-id.")
+        sys.exit(1)
+    texts = [f"passage: {c['content']}" for c in chunks]
+
+    print(f"Chunks: {len(texts)}  threads: {args.threads or 'default'}  batch: {args.batch_size}")
+    print("-" * 78)
+
+    reference = run_backend("torch", app_config.EMBEDDING_MODEL, args.threads, texts, args.batch_size)
+
+    print(f"{'backend':<12} {'model':<36} {'docs/s':>8} {'peak MB':>8} {'cos mean':>9} {'cos min':>8}")
+    for backend in [b.strip() for b in args.backends.split(",") if b.strip()]:
+        if backend == "torch" and args.model == app_config.EMBEDDING_MODEL:
+            result = reference
+        else:
+            result = run_backend(backend, args.model, args.threads, texts, args.batch_size)
+        agreement = cosine_agreement(reference["embeddings"], result["embeddings"])
+        cos_mean, cos_min = (f"{agreement[0]:.5f}", f"{agreement[1]:.5f}") if agreement else ("n/a", "n/a")
+        print(
+            f"{backend:<12} {result['model'][-36:]:<36} {result['docs_per_sec']:>8.1f} "
+            f"{result['peak_rss_mb']:>8.0f} {cos_mean:>9} {cos_min:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Bytes on the wire and serialization time of /api/embed response formats.
+
+By default only the serialization step is measured, on random unit vectors,
+using the same encoder as the endpoint. With --url the running server is
+called end to end (including the encode step).
+
+Usage:
+    python -m benchmarks.embed_formats
+    python -m benchmarks.embed_formats --sizes 1,100,1000 --dim 1024
+    python -m benchmarks.embed_formats --url http://localhost:8000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from api.embed import JSON, MSGPACK, OCTET_STREAM, encode_embeddings
+
+FORMATS = [
+    ("json float", JSON, "float", "float32"),
+    ("json base64 f32", JSON, "base64", "float32"),
+    ("json base64 f16", JSON, "base64", "float16"),
+    ("binary f32", OCTET_STREAM, "float", "float32"),
+    ("binary f16", OCTET_STREAM, "float", "float16"),
+    ("msgpack f32", MSGPACK, "float", "float32"),
+    ("msgpack f16", MSGPACK, "float", "float16"),
+]
+
+
+def bench_serialization(n: int, dim: int, repeat: int):
+    embeddings = np.random.default_rng(0).standard_normal((n, dim)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    for label, media_type, encoding_format, dtype in FORMATS:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            response = encode_embeddings(embeddings, media_type, encoding_format, dtype, "embeddings")
+        ms = (time.perf_counter() - start) / repeat * 1000
+        print(f"{n:>6} {label:<18} {len(response.body):>12,} {ms:>10.2f}")
+
+
+def bench_http(url: str, n: int, repeat: int):
+    import httpx
+
+    texts = [f"def function_{i}(x):\n    return x * {i}" for i in range(n)]
+    with httpx.Client(base_url=url, timeout=600) as client:
+        for label, media_type, encoding_format, dtype in FORMATS:
+            body = {"texts": texts, "encoding_format": encoding_format, "dtype": dtype}
+            client.post("/api/embed", json=body, headers={"Accept": media_type})  # warm-up
+            start = time.perf_counter()
+            for _ in range(repeat):
+                response = client.post("/api/embed", json=body, headers={"Accept": media_type})
+                response.raise_for_status()
+            ms = (time.perf_counter() - start) / repeat * 1000
+            print(f"{n:>6} {label:<18} {len(response.content):>12,} {ms:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /api/embed response formats")
+    parser.add_argument("--sizes", default="1,100,1000")
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--url", default="", help="Benchmark a running server end to end")
+    args = parser.parse_args()
+
+    print(f"{'texts':>6} {'format':<18} {'bytes':>12} {'ms':>10}")
+    for n in [int(s) for s in args.sizes.split(",") if s.strip()]:
+        if args.url:
+            bench_http(args.url, n, args.repeat)
+        else:
+            bench_serialization(n, args.dim, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
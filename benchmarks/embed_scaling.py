@@ -0,0 +1,79 @@
+"""
+Scaling benchmark for multi-process indexing embeddings.
+
+Embeds the same chunks with an EmbeddingPool of 1, 2, 4 and 8 workers (threads
+per worker = cores / workers) and with the single-process path, with and
+without length bucketing.
+
+Usage:
+    python -m benchmarks.embed_scaling --path .
+    python -m benchmarks.embed_scaling --project-id <uuid> --workers 1,2,4,8 --limit 2000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+# Load .env and configure logging before anything else
+import config as app_config
+
+from benchmarks.embed_backends import load_local_files, load_project_files
+from rag.embeddings import EmbeddingPool, chunk_project, embed_passages, length_buckets
+
+
+async def _time_pool(pool: EmbeddingPool | None, texts: list[str], batch_size: int) -> float:
+    start = time.perf_counter()
+    await embed_passages(texts, pool=pool, batch_size=batch_size)
+    return time.perf_counter() - start
+
+
+def padding_waste(texts: list[str], buckets: list[list[int]]) -> float:
+    """Fraction of padded positions (in characters, as a proxy for tokens)."""
+    padded = sum(max(len(texts[i]) for i in b) * len(b) for b in buckets)
+    return 1 - sum(len(t) for t in texts) / padded if padded else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark multi-process embedding scaling")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--path", default=".", help="Local directory to chunk")
+    source.add_argument("--project-id", default="", help="Chunk file_contents of a Supabase project")
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--batch-size", type=int, default=app_config.EMBEDDING_BATCH_SIZE)
+    parser.add_argument("--limit", type=int, default=1000, help="Max chunks to embed (0=all)")
+    args = parser.parse_args()
+
+    files = load_project_files(args.project_id) if args.project_id else load_local_files(args.path)
+    chunks = chunk_project(files)
+    if args.limit > 0:
+        chunks = chunks[:args.limit]
+    if not chunks:
+        print("No chunks to embed. Check --path / --project-id.")
+        sys.exit(1)
+    texts = [c["content"] for c in chunks]
+
+    sorted_buckets = length_buckets(texts, args.batch_size)
+    order = list(range(len(texts)))
+    random.Random(0).shuffle(order)
+    unsorted_buckets = [order[i:i + args.batch_size] for i in range(0, len(order), args.batch_size)]
+    print(f"Chunks: {len(texts)}  cores: {os.cpu_count()}  batch: {args.batch_size}")
+    print(f"Padding waste: {padding_waste(texts, unsorted_buckets):.1%} unsorted, "
+          f"{padding_waste(texts, sorted_buckets):.1%} length-bucketed")
+    print("-" * 60)
+    print(f"{'workers':>7} {'threads':>7} {'docs/s':>9} {'speedup':>8}")
+
+    baseline = asyncio.run(_time_pool(None, texts, args.batch_size))
+    print(f"{'in-proc':>7} {'-':>7} {len(texts) / baseline:>9.1f} {1.0:>8.2f}")
+
+    for workers in [int(w) for w in args.workers.split(",") if w.strip()]:
+        pool = EmbeddingPool(workers)
+        pool.warm_up()
+        seconds = asyncio.run(_time_pool(pool, texts, args.batch_size))
+        pool.shutdown()
+        print(f"{workers:>7} {pool.threads:>7} {len(texts) / seconds:>9.1f} {baseline / seconds:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
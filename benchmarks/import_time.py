@@ -0,0 +1,64 @@
+"""
+Import-time benchmark for app and CLI entry points.
+
+Each module is imported in a fresh interpreter (best of --repeat runs) and the
+slowest imports are listed from `python -X importtime`.
+
+Usage:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --modules main,evals.run --top 15
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def time_import(module: str) -> float:
+    """Wall-clock seconds for a cold `import module` in a new interpreter."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", f"import {module}"], cwd=_ROOT, check=True)
+    return time.perf_counter() - start
+
+
+def slowest_imports(module: str, top: int) -> list[tuple[int, str]]:
+    """(cumulative microseconds, package) for the slowest direct imports of module."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=_ROOT, capture_output=True, text=True, check=True,
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nesting is shown as two spaces per level; keep imports made directly by the
+        # module (level 1) so nested costs aren't double counted
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth != 1:
+            continue
+        entries.append((int(cumulative), name.strip()))
+    return sorted(entries, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import time of entry points")
+    parser.add_argument("--modules", default="main,evals.run")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    for module in [m.strip() for m in args.modules.split(",") if m.strip()]:
+        best = min(time_import(module) for _ in range(args.repeat))
+        print(f"{module}: {best * 1000:.0f} ms (best of {args.repeat})")
+        for cumulative, name in slowest_imports(module, args.top):
+            print(f"    {cumulative / 1000:>8.1f} ms  {name}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
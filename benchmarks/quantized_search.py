@@ -0,0 +1,111 @@
+"""
+Recall/latency/storage trade-off of compact embedding storage.
+
+Compares float16 and binary (hamming first stage + exact rescoring) search
+against exact float32 search, using the same LocalIndex that mirrors the
+Supabase RPCs. Queries are corpus vectors with gaussian noise added, so every
+query has a known neighbourhood.
+
+Usage:
+    python -m benchmarks.quantized_search --synthetic 20000
+    python -m benchmarks.quantized_search --path . --queries 200
+    python -m benchmarks.quantized_search --embeddings chunks.npy --multipliers 1,2,4,8,16
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+# Load .env and configure logging before anything else
+import config as app_config
+
+from rag.quantization import LocalIndex
+
+
+def synthetic_corpus(n: int, dim: int, seed: int) -> np.ndarray:
+    """Clustered unit vectors, closer to real embedding geometry than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(n // 50, 1), dim))
+    vectors = centers[rng.integers(0, len(centers), n)] + 0.6 * rng.standard_normal((n, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def embed_local_corpus(path: str) -> np.ndarray:
+    from benchmarks.embed_backends import load_local_files
+    from rag.embed import embed_texts
+    from rag.embeddings import chunk_project
+
+    chunks = chunk_project(load_local_files(path))
+    return np.asarray(embed_texts([c["content"] for c in chunks]), dtype=np.float32)
+
+
+def make_queries(corpus: np.ndarray, n: int, noise: float, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed + 1)
+    base = corpus[rng.integers(0, len(corpus), n)]
+    queries = base + noise * rng.standard_normal(base.shape) / np.sqrt(corpus.shape[1])
+    return (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+
+
+def evaluate(index: LocalIndex, queries: np.ndarray, truth: list[set[int]], k: int) -> tuple[float, float]:
+    """Mean recall@k against exact results and mean latency in ms."""
+    hits = 0
+    start = time.perf_counter()
+    for query, expected in zip(queries, truth):
+        found = {row["i"] for row in index.search(query, k)}
+        hits += len(found & expected)
+    elapsed = time.perf_counter() - start
+    return hits / (k * len(queries)), elapsed / len(queries) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark quantized embedding search")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--synthetic", type=int, default=10000, help="Number of synthetic vectors")
+    source.add_argument("--path", default="", help="Embed chunks of a local directory")
+    source.add_argument("--embeddings", default="", help="Load corpus from a .npy file")
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=0.5)
+    parser.add_argument("--k", type=int, default=app_config.MATCH_COUNT)
+    parser.add_argument("--multipliers", default="1,2,4,8,16", help="Binary rescore multipliers")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.embeddings:
+        corpus = np.load(args.embeddings).astype(np.float32)
+    elif args.path:
+        corpus = embed_local_corpus(args.path)
+    else:
+        corpus = synthetic_corpus(args.synthetic, args.dim, args.seed)
+
+    if len(corpus) < args.k:
+        print(f"Corpus has {len(corpus)} vectors, need at least k={args.k}.")
+        sys.exit(1)
+
+    queries = make_queries(corpus, args.queries, args.noise, args.seed)
+    rows = [{"i": i} for i in range(len(corpus))]
+
+    exact = LocalIndex("float32")
+    exact.add(rows, corpus)
+    truth = [{row["i"] for row in exact.search(q, args.k)} for q in queries]
+
+    print(f"Corpus: {len(corpus)} x {corpus.shape[1]}  queries: {len(queries)}  k: {args.k}")
+    print("-" * 60)
+    print(f"{'mode':<18} {'recall@k':>9} {'ms/query':>9} {'scan B/vec':>10}")
+
+    configs = [("float32", 0), ("float16", 0)]
+    configs += [("binary", int(m)) for m in args.multipliers.split(",") if m.strip()]
+    for storage, multiplier in configs:
+        index = exact if storage == "float32" else LocalIndex(storage, rescore_multiplier=multiplier or 1)
+        if index is not exact:
+            index.add(rows, corpus)
+        recall, ms = evaluate(index, queries, truth, args.k)
+        label = f"binary x{multiplier}" if storage == "binary" else storage
+        # Binary mode keeps the float16 vectors for rescoring; the first stage reads only the bits
+        first_stage = len(corpus) * corpus.shape[1] // 8 if storage == "binary" else index.nbytes
+        print(f"{label:<18} {recall:>9.4f} {ms:>9.2f} {first_stage // len(corpus):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Eval test execution: per-test process spawn (execute_with_timeout) vs the
+pre-forked SandboxPool, on every HumanEval problem.
+
+Each problem is run twice per mode: with its canonical solution (should
+pass) and with an empty body (should fail), and the two modes must agree
+on every result. Both are timed sequentially and with --workers threads.
+
+Usage:
+    python -m benchmarks.sandbox_pool
+    python -m benchmarks.sandbox_pool --workers 8 --limit 50
+"""
+import argparse
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from evals.datasets.humaneval import HumanEvalDataset
+from evals.execution.pool import SandboxPool
+from evals.execution.sandbox import execute_with_timeout
+
+
+def build_harnesses(limit: int) -> list[str]:
+    dataset = HumanEvalDataset()
+    problems = dataset.load()
+    if limit:
+        problems = problems[:limit]
+    harnesses = []
+    for problem in problems:
+        harnesses.append(dataset.build_test_harness(problem, problem.reference_solution))
+        harnesses.append(dataset.build_test_harness(problem, "    pass\n"))
+    return harnesses
+
+
+def run(execute, harnesses: list[str], workers: int, timeout: int) -> tuple[float, list[float], list[bool]]:
+    def timed(code: str) -> tuple[float, bool]:
+        start = time.perf_counter()
+        result = execute(code, timeout)
+        return time.perf_counter() - start, result.passed
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = [timed(code) for code in harnesses]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(timed, harnesses))
+    return time.perf_counter() - start, [r[0] for r in results], [r[1] for r in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--limit", type=int, default=0, help="Problems to use (0=all)")
+    parser.add_argument("--timeout", type=int, default=10)
+    args = parser.parse_args()
+
+    harnesses = build_harnesses(args.limit)
+    print(f"{len(harnesses)} harnesses ({len(harnesses) // 2} problems x canonical/empty), {args.workers} workers\n")
+    print(f"{'mode':<28} {'total s':>8} {'p50 ms':>8} {'p95 ms':>8} {'passed':>7}")
+
+    outcomes = {}
+    with SandboxPool(workers=args.workers) as pool:
+        modes = [
+            ("spawn, sequential", execute_with_timeout, 1),
+            ("pool, sequential", pool.execute, 1),
+            (f"spawn, {args.workers} threads", execute_with_timeout, args.workers),
+            (f"pool, {args.workers} workers", pool.execute, args.workers),
+        ]
+        for name, execute, workers in modes:
+            total, latencies, passed = run(execute, harnesses, workers, args.timeout)
+            p50 = statistics.median(latencies) * 1000
+            p95 = statistics.quantiles(latencies, n=20)[-1] * 1000
+            print(f"{name:<28} {total:8.2f} {p50:8.1f} {p95:8.1f} {sum(passed):7d}")
+            outcomes[name] = passed
+
+    baseline = outcomes["spawn, sequential"]
+    mismatches = {name: sum(a != b for a, b in zip(baseline, passed)) for name, passed in outcomes.items()}
+    print("\nresults identical to spawn:", all(m == 0 for m in mismatches.values()), mismatches)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Per-call latency of a fresh Supabase client per request vs the shared pooled clients.
+
+Runs against a local PostgREST-compatible stub that answers every RPC with a
+fixed set of matches, so only client construction, connection setup and
+HTTP overhead are measured.
+
+Usage:
+    python -m benchmarks.supabase_client
+    python -m benchmarks.supabase_client --calls 500 --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_FAKE_KEY = "bench.bench.bench"
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Answers POST /rest/v1/rpc/<fn> with a canned match list over keep-alive HTTP/1.1."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    wbufsize = 1 << 16  # send headers and body in one write; flushed per request
+    connections = 0
+    body = b"[]"
+
+    def setup(self):
+        super().setup()
+        type(self).connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(matches: int) -> ThreadingHTTPServer:
+    _StubHandler.body = json.dumps([
+        {"id": i, "file_path": f"src/file_{i}.py", "chunk_index": 0, "content": "x" * 2000, "similarity": 0.5}
+        for i in range(matches)
+    ]).encode()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def summarize(label: str, samples: list[float], connections: int):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{label:<28} {statistics.mean(samples):>8.2f} {statistics.median(samples):>8.2f} "
+          f"{p95:>8.2f} {connections:>6}")
+
+
+def bench_fresh(calls: int) -> list[float]:
+    from supabase import create_client
+
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        client = create_client(os.environ["SUPABASE_URL"], _FAKE_KEY)
+        client.rpc("match_code_chunks", {"match_count": 8}).execute()
+        samples.append((time.perf_counter() - start) * 1000)
+        client.postgrest.aclose()
+    return samples
+
+
+def bench_shared(calls: int) -> list[float]:
+    from rag.db import get_client
+
+    client = get_client()
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        client.rpc("match_code_chunks", {"match_count": 8}).execute()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+async def bench_shared_async(calls: int, concurrency: int) -> list[float]:
+    from rag.db import get_async_client, close_clients
+
+    client = await get_async_client()
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await client.rpc("match_code_chunks", {"match_count": 8}).execute()
+            samples.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one() for _ in range(calls)))
+    await close_clients()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Supabase client reuse")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8, help="In-flight requests for the async client")
+    parser.add_argument("--matches", type=int, default=8, help="Rows returned per RPC")
+    args = parser.parse_args()
+
+    server = start_stub(args.matches)
+    # Must be set before config is imported (load_dotenv does not override)
+    os.environ["SUPABASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ["SUPABASE_KEY"] = _FAKE_KEY
+
+    import config  # noqa: F401  — initialises logging on import
+
+    print(f"Stub: {os.environ['SUPABASE_URL']}  calls: {args.calls}")
+    print("-" * 64)
+    print(f"{'client':<28} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'conns':>6}")
+
+    _StubHandler.connections = 0
+    summarize("create_client per call", bench_fresh(args.calls), _StubHandler.connections)
+
+    _StubHandler.connections = 0
+    summarize("shared sync client", bench_shared(args.calls), _StubHandler.connections)
+
+    _StubHandler.connections = 0
+    samples = asyncio.run(bench_shared_async(args.calls, args.concurrency))
+    summarize(f"shared async (x{args.concurrency})", samples, _StubHandler.connections)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import os
 import logging
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -23,19 +24,144 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 SUPABASE_URL = os.getenv("SUPABASE_URL", "")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY", "")
 
+# Shared Supabase HTTP connection pool (rag/db.py)
+SUPABASE_POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", "20"))
+SUPABASE_KEEPALIVE_EXPIRY = 60  # seconds an idle connection is kept open
+SUPABASE_TIMEOUT = 30  # seconds per PostgREST request
+
 # Models
 CHAT_MODEL = "llama3.1:8b"
 ROUTER_MODEL = "llama3.1:8b"
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-EMBEDDING_MODEL = "intfloat/multilingual-e5-large"
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")  # how long Ollama keeps models loaded
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "intfloat/multilingual-e5-large")
+
+# Embedding inference backend: "torch" (fp32 reference), "torch-int8" (dynamic
+# int8 quantization of Linear layers), "onnx" (ONNX Runtime fp32) or
+# "onnx-int8" (ONNX Runtime with dynamic int8 quantization). Smaller e5
+# variants (e.g. intfloat/multilingual-e5-small, 384 dims) can be selected via
+# EMBEDDING_MODEL but need a matching vector column and a full re-index.
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))  # 0 = library default
+EMBEDDING_ONNX_DIR = os.getenv("EMBEDDING_ONNX_DIR", os.path.expanduser("~/.cache/ai-ide/onnx"))
+EMBEDDING_ONNX_QUANTIZATION = os.getenv("EMBEDDING_ONNX_QUANTIZATION", "avx2")  # arm64 | avx2 | avx512 | avx512_vnni
 
 # RAG settings
 CHUNK_SIZE = 200
 CHUNK_OVERLAP = 20
 MATCH_THRESHOLD = 0.3
-MATCH_COUNT = 8
+MATCH_COUNT = 8  # max chunks/segments in the assembled context
+MATCH_CANDIDATES = 16  # rows fetched from match_code_chunks before assembly
+CONTEXT_TOKEN_BUDGET = 3000  # estimated tokens of RAG context per prompt
+CONTEXT_SCORE_GAP = 0.08  # stop at the first similarity drop larger than this
+CONTEXT_MMR_LAMBDA = 0.7  # relevance vs diversity trade-off (1.0 = relevance only)
 EMBEDDING_BATCH_SIZE = 100
-INSERT_BATCH_SIZE = 50
+
+# Indexing-time embedding across worker processes (rag/embeddings.py). Each
+# worker loads its own copy of the model (~2.5 GB for e5-large fp32), so size
+# this to RAM as well as cores. 0 or 1 = embed in the API process.
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "0"))
+EMBEDDING_WORKER_THREADS = int(os.getenv("EMBEDDING_WORKER_THREADS", "0"))  # 0 = cores / workers
+INSERT_BATCH_SIZE = 200  # max rows per insert request
+INSERT_BATCH_BYTES = 2 * 1024 * 1024  # max JSON payload per insert request
+INSERT_CONCURRENCY = 4  # insert requests in flight per indexing job
+INSERT_MAX_RETRIES = 3
+INSERT_RETRY_BASE_DELAY = 0.5  # seconds, doubled on every retry
+
+# How chunk embeddings are stored and searched (see supabase/migrations):
+#   "float32" - full-precision `embedding` column, single-stage search
+#   "float16" - `embedding_half` halfvec column (half the storage), single-stage search
+#   "binary"  - `embedding_half` plus generated sign-bit column; hamming first stage
+#               over RESCORE_MULTIPLIER * MATCH_COUNT candidates, then exact rescoring
+EMBEDDING_STORAGE = os.getenv("EMBEDDING_STORAGE", "float32")
+RESCORE_MULTIPLIER = 4
+
+# HNSW candidate list size per search (pgvector hnsw.ef_search). Higher means
+# better recall on large projects and slower queries; small projects are
+# searched exactly regardless.
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "40"))
+
+# Which project files get embedded (rag/file_filter.py). Patterns use
+# .gitignore syntax and are extended by the project's own .gitignore/.aiignore;
+# INDEX_IGNORE adds comma-separated patterns. An empty extension allowlist
+# means any extension; binary, minified and generated files are always skipped.
+INDEX_IGNORE_PATTERNS = [
+    ".git/", "node_modules/", "vendor/", "dist/", "build/", "out/", ".next/",
+    "__pycache__/", ".venv/", "venv/", "coverage/", "target/",
+    "package-lock.json", "yarn.lock", "pnpm-lock.yaml", "poetry.lock", "Cargo.lock", "*.lock",
+    "*.min.js", "*.min.css", "*.map", "*.pyc",
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.ico", "*.webp", "*.pdf", "*.zip", "*.gz",
+    "*.woff", "*.woff2", "*.ttf", "*.mp3", "*.mp4", "*.wasm", "*.so", "*.dll", "*.exe",
+    "*.csv", "*.tsv", "*.parquet", "*.sqlite", "*.db",
+] + [p.strip() for p in os.getenv("INDEX_IGNORE", "").split(",") if p.strip()]
+INDEX_MAX_FILE_BYTES = int(os.getenv("INDEX_MAX_FILE_BYTES", str(256 * 1024)))
+INDEX_ALLOWED_EXTENSIONS = [e.strip() for e in os.getenv("INDEX_ALLOWED_EXTENSIONS", "").split(",") if e.strip()]
+
+# Per-file re-indexing on editor save: wait this long after the last save of a
+# file before re-embedding it, but never longer than FILE_INDEX_MAX_DELAY
+FILE_INDEX_DEBOUNCE = 0.3  # seconds
+FILE_INDEX_MAX_DELAY = 1.0  # seconds
+
+# Query-side caches (size = max entries, ttl = seconds)
+QUERY_EMBEDDING_CACHE_SIZE = 1024
+QUERY_EMBEDDING_CACHE_TTL = 3600
+RETRIEVAL_CACHE_SIZE = 256
+RETRIEVAL_CACHE_TTL = 300
+# How long a worker trusts its copy of a project's index generation; bounds how
+# long it can serve results cached before another worker re-indexed the project
+INDEX_GENERATION_TTL = 2  # seconds
+# Projects' .gitignore/.aiignore, applied to per-file re-indexing
+PROJECT_IGNORE_CACHE_SIZE = 256
+PROJECT_IGNORE_CACHE_TTL = 300
+
+# Startup: load the embedding model, compile the agent graph and preload the
+# Ollama models before /ready reports true
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+
+# /api/terminal output streaming: bytes per read, and how long / how much
+# output is coalesced before a chunk is sent to the client
+TERMINAL_READ_SIZE = 64 * 1024
+TERMINAL_FLUSH_INTERVAL = 0.05  # seconds
+TERMINAL_FLUSH_BYTES = 16 * 1024  # characters
+
+# /api/terminal process limits (runner/process.py). CPU, memory and file size
+# are per-process rlimits (0 = unlimited); the wall-clock timeout kills the
+# whole process group. Runs beyond the concurrency caps wait in a queue for
+# up to TERMINAL_QUEUE_TIMEOUT seconds.
+TERMINAL_TIMEOUT = int(os.getenv("TERMINAL_TIMEOUT", "300"))  # seconds
+TERMINAL_CPU_SECONDS = int(os.getenv("TERMINAL_CPU_SECONDS", "120"))
+TERMINAL_MEMORY_BYTES = int(os.getenv("TERMINAL_MEMORY_BYTES", str(4 * 1024 ** 3)))  # address space; JVM/Node may need more
+TERMINAL_FILE_BYTES = int(os.getenv("TERMINAL_FILE_BYTES", str(256 * 1024 ** 2)))
+TERMINAL_NICE = 10  # run below the API and embedding model
+TERMINAL_MAX_PROCESSES = int(os.getenv("TERMINAL_MAX_PROCESSES", "8"))
+TERMINAL_MAX_PER_PROJECT = int(os.getenv("TERMINAL_MAX_PER_PROJECT", "2"))
+TERMINAL_QUEUE_TIMEOUT = 30  # seconds
+TERMINAL_KILL_GRACE = 2.0  # seconds between SIGTERM and SIGKILL
+
+# Opt-in: run plain `python file.py [args]` commands on a warm forkserver
+# (runner/pyfork.py) that has these modules imported already; each run is a
+# fresh fork. Runs use the server's own interpreter and installed packages.
+TERMINAL_PYFORK = os.getenv("TERMINAL_PYFORK", "false").lower() in ("1", "true", "yes")
+TERMINAL_PYFORK_PRELOAD = [m.strip() for m in os.getenv(
+    "TERMINAL_PYFORK_PRELOAD", "json,re,collections,itertools,math,random,datetime,dataclasses,typing,numpy,pandas",
+).split(",") if m.strip()]
+
+# Terminal jobs (runner/jobs.py): output is kept per job as an in-memory tail
+# plus on-disk history for reattaching clients; both are capped per job
+JOB_DIR = os.getenv("JOB_DIR", os.path.join(tempfile.gettempdir(), "ai-ide-jobs"))
+JOB_MEMORY_BYTES = 256 * 1024
+JOB_DISK_BYTES = 32 * 1024 * 1024
+JOB_RETENTION = 15 * 60  # seconds a finished job stays readable
+JOB_MAX_FINISHED = 100
+
+# Per-project workspaces for /api/terminal runs with workspace=true
+# (runner/workspace.py): materialized once, then updated file by file.
+# Idle workspaces are evicted LRU-first beyond the quota (which includes
+# anything runs create, e.g. node_modules) or the project cap.
+WORKSPACE_ROOT = os.getenv("WORKSPACE_ROOT", os.path.expanduser("~/.cache/ai-ide/workspaces"))
+WORKSPACE_QUOTA_BYTES = int(os.getenv("WORKSPACE_QUOTA_BYTES", str(10 * 1024 ** 3)))
+WORKSPACE_MAX_PROJECTS = int(os.getenv("WORKSPACE_MAX_PROJECTS", "50"))
+WORKSPACE_EVICT_INTERVAL = 60  # seconds between eviction passes
 
 # Agent settings
 MAX_AGENT_ITERATIONS = 3
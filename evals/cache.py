@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Awaitable, Callable, Literal
+
+CacheMode = Literal["record", "replay", "off"]
+
+DEFAULT_CACHE_PATH = "evals/cache/llm_responses.jsonl"
+
+
+class CacheMiss(Exception):
+    """Replay mode found no recorded response for a call."""
+
+
+def cache_key(key: dict) -> str:
+    return hashlib.sha256(json.dumps(key, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """Disk-backed LLM responses keyed on (model, messages, temperature, node).
+
+    record: answer from the cache when possible, call the model otherwise and
+            append its response (so an interrupted recording picks up where
+            it stopped).
+    replay: answer only from the cache; a miss raises CacheMiss instead of
+            calling a model, so runs need no API key or model server.
+    off:    always call the model, store nothing.
+
+    Entries are JSON lines {"key", "node", "model", "value"}; the whole file
+    is loaded up front. Every value gets the call's original latency as
+    "seconds", so replayed runs report recorded rather than lookup times.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, mode: CacheMode = "off"):
+        self.path = path
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self._entries: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        if mode != "off" and os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[entry["key"]] = entry["value"]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _lookup(self, key: dict) -> tuple[str, dict | None]:
+        digest = cache_key(key)
+        value = self._entries.get(digest)
+        with self._lock:
+            if value is not None:
+                self.hits += 1
+                return digest, value
+            self.misses += 1
+        if self.mode == "replay":
+            raise CacheMiss(f"no recorded response for node={key.get('node')} model={key.get('model')}")
+        return digest, None
+
+    def _store(self, digest: str, key: dict, value: dict) -> None:
+        entry = {"key": digest, "node": key.get("node"), "model": key.get("model"), "value": value}
+        with self._lock:
+            self._entries[digest] = value
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def get_or_call(self, key: dict, call: Callable[[], dict]) -> dict:
+        if self.mode != "off":
+            digest, value = self._lookup(key)
+            if value is not None:
+                return value
+        start = time.time()
+        value = {**call(), "seconds": round(time.time() - start, 3)}
+        if self.mode != "off":
+            self._store(digest, key, value)
+        return value
+
+    async def aget_or_call(self, key: dict, call: Callable[[], Awaitable[dict]]) -> dict:
+        if self.mode != "off":
+            digest, value = self._lookup(key)
+            if value is not None:
+                return value
+        start = time.time()
+        value = {**(await call()), "seconds": round(time.time() - start, 3)}
+        if self.mode != "off":
+            self._store(digest, key, value)
+        return value
+
+    def stats(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses, {len(self)} entries"
@@ -11,5 +11,10 @@ class EvalConfig:
     offset: int = 0
     task_ids: list[str] = field(default_factory=list)
     exec_timeout: int = 10  # seconds per test execution
+    exec_workers: int = 0  # sandbox pool size, 0 = CPU count
     output_dir: str = "evals/output"
     temperature: float = 0.0
+    samples: int = 1  # completions per problem, for pass@k
+    concurrency: int = 1  # problems in flight at once (LLM generation)
+    requests_per_minute: int = 0  # OpenAI rate limits for baseline mode, 0 = unlimited
+    tokens_per_minute: int = 0
@@ -1,6 +1,8 @@
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
 
+from evals.datasets.snapshot import Snapshot
+
 
 @dataclass
 class EvalProblem:
@@ -14,10 +16,33 @@ class EvalProblem:
 
 
 class BenchmarkDataset(ABC):
+    name: str  # Benchmark name, also the snapshot's file name
+
     @abstractmethod
-    def load(self) -> list[EvalProblem]:
+    def source_rows(self) -> list[tuple[str, dict]]:
+        """(task_id, raw row) pairs from the upstream source, in dataset order."""
         ...
 
+    @abstractmethod
+    def to_problem(self, task_id: str, row: dict) -> EvalProblem:
+        ...
+
+    def rows(self, task_ids: list[str] | None = None) -> list[tuple[str, dict]]:
+        """Raw rows from the local snapshot if there is one (only the rows for
+        task_ids are read), from the upstream source otherwise."""
+        snapshot = Snapshot(self.name)
+        if snapshot.exists:
+            return snapshot.read(task_ids)
+        rows = self.source_rows()
+        if task_ids is not None:
+            wanted = set(task_ids)
+            rows = [(task_id, row) for task_id, row in rows if task_id in wanted]
+        return rows
+
+    def load(self, task_ids: list[str] | None = None) -> list[EvalProblem]:
+        """Problems in dataset order; only those in task_ids if given."""
+        return [self.to_problem(task_id, row) for task_id, row in self.rows(task_ids)]
+
     @abstractmethod
     def build_test_harness(self, problem: EvalProblem, generated_code: str) -> str:
         """Build the full executable test string from generated code + test cases."""
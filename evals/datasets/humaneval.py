@@ -6,42 +6,39 @@ from evals.datasets.base import BenchmarkDataset, EvalProblem
 
 _DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "HumanEval.jsonl.gz")
 
-# Cache loaded problems
-_problems_cache: dict | None = None
-
-
-def _get_problems() -> dict:
-    global _problems_cache
-    if _problems_cache is None:
-        with gzip.open(_DATA_PATH, "rt") as f:
-            _problems_cache = {p["task_id"]: p for p in (json.loads(line) for line in f)}
-    return _problems_cache
+# Original prompts of loaded problems, for building test harnesses
+_prompts: dict[str, str] = {}
 
 
 class HumanEvalDataset(BenchmarkDataset):
-    def load(self) -> list[EvalProblem]:
-        problems = _get_problems()
-        result = []
-        for task_id, problem in sorted(problems.items()):
-            prompt = (
-                "Complete the following Python function. "
-                "Return ONLY the function body (the indented lines after the signature), "
-                "no markdown fences, no explanation, no function signature.\n\n"
-                f"{problem['prompt']}"
-            )
-            result.append(EvalProblem(
-                task_id=task_id,
-                prompt_for_model=prompt,
-                test_code=problem["test"],
-                entry_point=problem["entry_point"],
-                reference_solution=problem["canonical_solution"],
-                benchmark="humaneval",
-            ))
-        return result
+    name = "humaneval"
+
+    def source_rows(self) -> list[tuple[str, dict]]:
+        with gzip.open(_DATA_PATH, "rt") as f:
+            problems = {p["task_id"]: p for p in (json.loads(line) for line in f)}
+        return sorted(problems.items())
+
+    def to_problem(self, task_id: str, row: dict) -> EvalProblem:
+        _prompts[task_id] = row["prompt"]
+        prompt = (
+            "Complete the following Python function. "
+            "Return ONLY the function body (the indented lines after the signature), "
+            "no markdown fences, no explanation, no function signature.\n\n"
+            f"{row['prompt']}"
+        )
+        return EvalProblem(
+            task_id=task_id,
+            prompt_for_model=prompt,
+            test_code=row["test"],
+            entry_point=row["entry_point"],
+            reference_solution=row["canonical_solution"],
+            benchmark="humaneval",
+        )
 
     def build_test_harness(self, problem: EvalProblem, generated_code: str) -> str:
-        original_prompt = _get_problems()[problem.task_id]["prompt"]
-        full_function = original_prompt + generated_code
+        if problem.task_id not in _prompts:
+            self.load([problem.task_id])
+        full_function = _prompts[problem.task_id] + generated_code
         return (
             f"{full_function}\n\n"
             f"{problem.test_code}\n"
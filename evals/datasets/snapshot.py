@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+import zlib
+from datetime import datetime
+
+SNAPSHOT_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "data"))
+
+FORMAT_VERSION = 1
+
+
+class SnapshotError(Exception):
+    """Snapshot missing, corrupt or written by an incompatible version."""
+
+
+class Snapshot:
+    """A benchmark's raw rows in evals/data/<name>.snapshot, with an index.
+
+    The data file is the rows' JSON, each zlib-compressed separately and
+    concatenated; <name>.snapshot.json holds the SHA-256 of the data file and
+    every task's (offset, length) in dataset order. Loading a few tasks
+    reads the index and seeks to just those rows.
+    """
+
+    def __init__(self, name: str, directory: str = SNAPSHOT_DIR):
+        self.name = name
+        self.data_path = os.path.join(directory, f"{name}.snapshot")
+        self.index_path = self.data_path + ".json"
+        self._index: dict | None = None
+
+    @property
+    def exists(self) -> bool:
+        return os.path.exists(self.index_path) and os.path.exists(self.data_path)
+
+    @staticmethod
+    def _sha256(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def write(self, rows: list[tuple[str, dict]], source: str) -> dict:
+        """Write (task_id, row) pairs, in order. Returns the index."""
+        os.makedirs(os.path.dirname(self.data_path), exist_ok=True)
+        tasks = []
+        offset = 0
+        tmp_data = self.data_path + ".tmp"
+        with open(tmp_data, "wb") as f:
+            for task_id, row in rows:
+                record = zlib.compress(json.dumps(row, ensure_ascii=False).encode("utf-8"), 9)
+                f.write(record)
+                tasks.append([task_id, offset, len(record)])
+                offset += len(record)
+        index = {
+            "format": FORMAT_VERSION,
+            "benchmark": self.name,
+            "source": source,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "count": len(tasks),
+            "sha256": self._sha256(tmp_data),
+            "tasks": tasks,
+        }
+        tmp_index = self.index_path + ".tmp"
+        with open(tmp_index, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_data, self.data_path)
+        os.replace(tmp_index, self.index_path)
+        self._index = index
+        return index
+
+    @property
+    def index(self) -> dict:
+        if self._index is None:
+            if not self.exists:
+                raise SnapshotError(f"No snapshot for {self.name}; run `python -m evals.snapshot`")
+            with open(self.index_path) as f:
+                index = json.load(f)
+            if index.get("format") != FORMAT_VERSION:
+                raise SnapshotError(f"{self.index_path} has format {index.get('format')}, expected {FORMAT_VERSION}")
+            self._index = index
+        return self._index
+
+    def verify(self) -> None:
+        """Raise SnapshotError unless the data file matches the index checksum."""
+        if self._sha256(self.data_path) != self.index["sha256"]:
+            raise SnapshotError(f"{self.data_path} does not match its checksum; re-run `python -m evals.snapshot`")
+
+    def task_ids(self) -> list[str]:
+        return [task_id for task_id, _, _ in self.index["tasks"]]
+
+    def read(self, task_ids: list[str] | None = None) -> list[tuple[str, dict]]:
+        """(task_id, row) pairs in dataset order, for task_ids only if given.
+        Unknown ids are skipped."""
+        entries = self.index["tasks"]
+        if task_ids is not None:
+            wanted = set(task_ids)
+            entries = [entry for entry in entries if entry[0] in wanted]
+        rows = []
+        with open(self.data_path, "rb") as f:
+            for task_id, offset, length in entries:
+                f.seek(offset)
+                try:
+                    rows.append((task_id, json.loads(zlib.decompress(f.read(length)))))
+                except zlib.error as e:
+                    raise SnapshotError(
+                        f"{self.data_path} is corrupt at {task_id} ({e}); re-run `python -m evals.snapshot`"
+                    ) from e
+        return rows
@@ -0,0 +1,219 @@
+import gc
+import importlib
+import multiprocessing
+import os
+import pickle
+import queue
+import select
+import signal
+import time
+import traceback
+from dataclasses import dataclass
+
+from evals.execution.sandbox import ExecResult, _exec_code
+from runner.rlimits import apply_limits
+
+# Imported once in each worker so harness forks start with them loaded
+DEFAULT_PRELOAD = [
+    "math", "re", "string", "collections", "itertools", "functools", "heapq",
+    "bisect", "typing", "hashlib", "random", "statistics", "fractions", "decimal",
+]
+
+TIMEOUT_RESULT = ExecResult(passed=False, error="TimeoutError: execution exceeded time limit")
+CRASH_RESULT = ExecResult(passed=False, error="Process exited without producing a result (possible crash)")
+
+
+@dataclass
+class SandboxLimits:
+    """rlimits for each harness run (0 = unlimited). CPU time defaults to the
+    wall-clock timeout plus one second."""
+    cpu_seconds: int = 0
+    memory_bytes: int = 2 * 1024 * 1024 * 1024
+    open_files: int = 64
+
+
+def syntax_error(code: str) -> ExecResult | None:
+    """The harness's SyntaxError as an ExecResult, found without starting a process."""
+    try:
+        compile(code, "<string>", "exec")
+    except SyntaxError as e:
+        return ExecResult(
+            passed=False,
+            error=f"SyntaxError: {e}",
+            traceback="".join(traceback.format_exception_only(type(e), e)),
+        )
+    return None
+
+
+def _run_forked(code: str, timeout: float, limits: SandboxLimits) -> ExecResult:
+    """In a worker: run code in a fresh fork with rlimits; kill its process group on timeout."""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(read_fd)
+            os.setsid()
+            apply_limits(
+                cpu_seconds=limits.cpu_seconds or int(timeout) + 1,
+                memory_bytes=limits.memory_bytes,
+                file_bytes=0,
+                nice=0,
+                open_files=limits.open_files,
+            )
+            data = pickle.dumps(_exec_code(code))
+            with os.fdopen(write_fd, "wb") as f:
+                f.write(data)
+        finally:
+            os._exit(0)
+
+    os.close(write_fd)
+    deadline = time.monotonic() + timeout
+    chunks = []
+    timed_out = False
+    # Read as the child writes, so a large traceback can't block it on a full pipe
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not select.select([read_fd], [], [], remaining)[0]:
+            timed_out = True
+            break
+        chunk = os.read(read_fd, 65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    os.close(read_fd)
+
+    if timed_out:
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    _, status = os.waitpid(pid, 0)
+    if timed_out:
+        return TIMEOUT_RESULT
+    # Killed by RLIMIT_CPU: it ran out of time, just not wall-clock time
+    if os.WIFSIGNALED(status) and os.WTERMSIG(status) == signal.SIGXCPU:
+        return ExecResult(passed=False, error="TimeoutError: CPU time limit exceeded")
+    try:
+        return pickle.loads(b"".join(chunks))
+    except Exception:
+        return CRASH_RESULT
+
+
+def _worker_main(conn, limits: SandboxLimits, preload: list[str]) -> None:
+    for name in preload:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+    # Keep preloaded objects out of collections so forks don't copy their pages
+    gc.collect()
+    gc.freeze()
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+        code, timeout = request
+        conn.send(_run_forked(code, timeout, limits))
+
+
+class _Worker:
+    def __init__(self, ctx, limits: SandboxLimits, preload: list[str]):
+        self._ctx = ctx
+        self._limits = limits
+        self._preload = preload
+        self.tasks = 0
+        self._start()
+
+    def _start(self) -> None:
+        self.conn, child_conn = self._ctx.Pipe()
+        self.process = self._ctx.Process(
+            target=_worker_main, args=(child_conn, self._limits, self._preload), daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.tasks = 0
+
+    def run(self, code: str, timeout: float) -> ExecResult:
+        self.tasks += 1
+        try:
+            self.conn.send((code, timeout))
+            # The worker enforces the timeout itself; this only catches a stuck worker
+            if self.conn.poll(timeout + 5):
+                return self.conn.recv()
+        except (EOFError, OSError):
+            self.restart()
+            return CRASH_RESULT
+        self.restart()
+        return TIMEOUT_RESULT
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+    def restart(self) -> None:
+        self.stop()
+        self._start()
+
+
+class SandboxPool:
+    """Pre-started workers that run each test harness in a fresh fork of themselves.
+
+    Workers import common stdlib modules once, so a harness pays for a fork
+    rather than a process spawn and interpreter start. Workers themselves are
+    forked from a fork server with this module and the preload list already
+    imported, so the pool can be created and workers restarted at any time,
+    whatever threads this process runs. A worker is replaced
+    after recycle_after harnesses. Same results and timeout behaviour as
+    execute_with_timeout, plus rlimits. execute() is thread-safe and blocks
+    while every worker is busy.
+    """
+
+    def __init__(
+        self,
+        workers: int = 0,
+        limits: SandboxLimits | None = None,
+        recycle_after: int = 500,
+        preload: list[str] = DEFAULT_PRELOAD,
+    ):
+        self.size = workers or os.cpu_count() or 4
+        self.recycle_after = recycle_after
+        # Workers are (re)started from execute() callers' threads, so they come from
+        # a single-threaded fork server instead of forking this process
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload([__name__, *preload])
+        self._workers = [_Worker(ctx, limits or SandboxLimits(), preload) for _ in range(self.size)]
+        self._idle: queue.SimpleQueue[_Worker] = queue.SimpleQueue()
+        for worker in self._workers:
+            self._idle.put(worker)
+
+    def execute(self, code: str, timeout: float = 10) -> ExecResult:
+        error = syntax_error(code)
+        if error:
+            return error
+        worker = self._idle.get()
+        try:
+            return worker.run(code, timeout)
+        finally:
+            if worker.tasks >= self.recycle_after:
+                worker.restart()
+            self._idle.put(worker)
+
+    def close(self) -> None:
+        for worker in self._workers:
+            worker.stop()
+
+    def __enter__(self) -> "SandboxPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
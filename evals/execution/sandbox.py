@@ -11,30 +11,37 @@ class ExecResult:
     traceback: Optional[str] = None
 
 
-def _run_code(code: str, result_queue: multiprocessing.Queue):
-    """Execute code in a child process."""
+def _exec_code(code: str) -> ExecResult:
+    """Execute code in the current process and report how it went."""
     try:
         exec_globals = {}
         exec(code, exec_globals)
-        result_queue.put(ExecResult(passed=True))
+        return ExecResult(passed=True)
     except AssertionError as e:
-        result_queue.put(ExecResult(
+        return ExecResult(
             passed=False,
             error=f"AssertionError: {e}",
             traceback=traceback.format_exc(),
-        ))
+        )
     except Exception as e:
-        result_queue.put(ExecResult(
+        return ExecResult(
             passed=False,
             error=f"{type(e).__name__}: {e}",
             traceback=traceback.format_exc(),
-        ))
+        )
+
+
+def _run_code(code: str, result_queue: multiprocessing.Queue):
+    """Execute code in a child process."""
+    result_queue.put(_exec_code(code))
 
 
 def execute_with_timeout(code: str, timeout: int = 10) -> ExecResult:
     """Execute Python code in a separate process with a timeout.
 
-    Uses multiprocessing so infinite loops or crashes can be killed.
+    Uses multiprocessing so infinite loops or crashes can be killed. Starts
+    a process per call; evals.execution.pool.SandboxPool is the faster way
+    to run many.
     """
     result_queue = multiprocessing.Queue()
     process = multiprocessing.Process(target=_run_code, args=(code, result_queue))
@@ -6,38 +6,46 @@ Usage:
     python -m evals.generate_report --output-dir evals/output --report report.md
 """
 import argparse
-import json
 import os
-import glob
 from datetime import datetime
 from collections import defaultdict
 
+from evals.results.reporter import NODES, pass_at_k_summary, profile_summary
+from evals.results.store import REPORT_COLUMNS, ResultsStore
 
-def load_latest_results(output_dir: str) -> dict:
-    """Load the latest summary + details for each (benchmark, mode) pair."""
-    summary_files = sorted(glob.glob(os.path.join(output_dir, "*_summary.json")))
 
-    # Group by (benchmark, mode), keep the latest
-    latest = {}
-    for path in summary_files:
-        with open(path) as f:
-            summary = json.load(f)
-        key = (summary["benchmark"], summary["mode"])
-        latest[key] = {"summary": summary, "summary_path": path}
+def open_store(output_dir: str) -> ResultsStore:
+    store = ResultsStore.for_output_dir(output_dir)
+    # Runs logged as JSONL before the results store existed
+    imported = store.import_dir(output_dir)
+    if imported:
+        print(f"Imported {len(imported)} JSONL runs into {store.path}")
+    return store
 
-    # Load corresponding detail files
-    for key, entry in latest.items():
-        run_id = entry["summary"]["run_id"]
-        details_path = os.path.join(output_dir, f"{run_id}_details.jsonl")
-        details = []
-        if os.path.exists(details_path):
-            with open(details_path) as f:
-                for line in f:
-                    if line.strip():
-                        details.append(json.loads(line))
-        entry["details"] = details
 
-    return latest
+def load_latest_results(store: ResultsStore, runs: dict[tuple[str, str], dict]) -> dict:
+    """Summary + details (without generated code) for each (benchmark, mode)'s run."""
+    return {
+        key: {"summary": run["summary"], "details": store.results(run["run_id"], REPORT_COLUMNS)}
+        for key, run in runs.items()
+    }
+
+
+def report_marker(run_ids: list[str]) -> str:
+    """Last line of a report: the runs it was generated from."""
+    return "<!-- runs: " + " ".join(sorted(run_ids)) + " -->"
+
+
+def is_up_to_date(report_path: str, run_ids: list[str]) -> bool:
+    if not os.path.exists(report_path):
+        return False
+    with open(report_path) as f:
+        return report_marker(run_ids) in f.read()
+
+
+def first_samples(details: list[dict]) -> list[dict]:
+    """One row per problem: the first sample of --samples runs (older runs have one anyway)."""
+    return [t for t in details if t.get("sample_index", 0) == 0]
 
 
 def classify_error(task: dict) -> str:
@@ -93,6 +101,70 @@ def generate_report(results: dict, report_path: str):
 
     lines.append("")
 
+    # --- pass@k (runs with --samples) ---
+    # Summaries carry these since pass@k and profiling were added; older runs are recomputed
+    pass_at = {
+        key: entry["summary"].get("pass_at_k") or pass_at_k_summary(entry["details"])
+        for key, entry in results.items()
+    }
+    sampled = sorted(key for key, estimates in pass_at.items() if len(estimates) > 1)
+    if sampled:
+        ks = sorted({name for key in sampled for name in pass_at[key]}, key=lambda name: int(name.split("@")[1]))
+        lines.append("## pass@k")
+        lines.append("")
+        lines.append("Unbiased estimator over n samples per problem: 1 - C(n-c, k) / C(n, k), averaged over problems.")
+        lines.append("")
+        lines.append("| Benchmark | Mode | Samples | " + " | ".join(ks) + " |")
+        lines.append("|-----------|------|--------:|" + "|".join("-----:" for _ in ks) + "|")
+        for key in sampled:
+            details = results[key]["details"]
+            samples = len(details) / len(first_samples(details))
+            cells = " | ".join(f"{pass_at[key][k]:.1%}" if k in pass_at[key] else "–" for k in ks)
+            lines.append(f"| {key[0]} | {key[1]} | {samples:g} | {cells} |")
+        lines.append("")
+
+    # --- Latency & tokens ---
+    profiles = {
+        key: entry["summary"].get("profile") or profile_summary(entry["details"])
+        for key, entry in results.items()
+    }
+    lines.append("## Latency & Tokens")
+    lines.append("")
+    lines.append("Latency is the pipeline time per sample (LLM calls and retrieval, without test execution). ")
+    lines.append("Seconds per pass divides all pipeline and execution time by the number of problems solved.")
+    lines.append("")
+    lines.append("| Benchmark | Mode | p50 | p95 | p99 | Tokens/s | Prompt tok/problem | Completion tok/problem | Seconds per pass |")
+    lines.append("|-----------|------|----:|----:|----:|---------:|-------------------:|-----------------------:|-----------------:|")
+    for key in sorted(profiles.keys()):
+        p = profiles[key]
+        latency = p["latency_seconds"]
+        problems = max(1, len(first_samples(results[key]["details"])))
+        per_pass = f"{p['seconds_per_pass']:.1f}s" if p["seconds_per_pass"] is not None else "–"
+        lines.append(
+            f"| {key[0]} | {key[1]} | {latency['p50']:.1f}s | {latency['p95']:.1f}s | {latency['p99']:.1f}s "
+            f"| {p['tokens_per_second']:.1f} | {p['prompt_tokens'] / problems:.0f} "
+            f"| {p['completion_tokens'] / problems:.0f} | {per_pass} |"
+        )
+    lines.append("")
+
+    nodes = sorted({node for p in profiles.values() for node in p["node_seconds"]},
+                   key=lambda n: (NODES.index(n) if n in NODES else len(NODES), n))
+    if nodes:
+        lines.append("### Where the time goes")
+        lines.append("")
+        lines.append("Share of total time per pipeline node (p50 per sample in parentheses).")
+        lines.append("")
+        lines.append("| Benchmark | Mode | " + " | ".join(nodes) + " |")
+        lines.append("|-----------|------|" + "|".join("-----:" for _ in nodes) + "|")
+        for key in sorted(profiles.keys()):
+            node_seconds = profiles[key]["node_seconds"]
+            cells = " | ".join(
+                f"{node_seconds[n]['share']:.0%} ({node_seconds[n]['p50']:.1f}s)" if n in node_seconds else "–"
+                for n in nodes
+            )
+            lines.append(f"| {key[0]} | {key[1]} | {cells} |")
+        lines.append("")
+
     # --- Per-Benchmark Comparison ---
     benchmarks = sorted(set(k[0] for k in results.keys()))
 
@@ -113,7 +185,14 @@ def generate_report(results: dict, report_path: str):
             sign = "+" if delta >= 0 else ""
             lines.append(f"**Baseline pass@1:** {bs['pass_at_1']:.1%}  ")
             lines.append(f"**Multi-Agent pass@1:** {ms['pass_at_1']:.1%}  ")
-            lines.append(f"**Delta:** {sign}{delta:.1%}")
+            lines.append(f"**Delta:** {sign}{delta:.1%}  ")
+            bp, mp = profiles[baseline_key], profiles[multi_key]
+            if bp["latency_seconds"]["p50"]:
+                ratio = mp["latency_seconds"]["p50"] / bp["latency_seconds"]["p50"]
+                lines.append(f"**Latency p50:** {bp['latency_seconds']['p50']:.1f}s → "
+                             f"{mp['latency_seconds']['p50']:.1f}s ({ratio:.1f}x)  ")
+            if bp["seconds_per_pass"] and mp["seconds_per_pass"]:
+                lines.append(f"**Seconds per pass:** {bp['seconds_per_pass']:.1f}s → {mp['seconds_per_pass']:.1f}s")
             lines.append("")
 
         # Error breakdown for each mode
@@ -123,6 +202,7 @@ def generate_report(results: dict, report_path: str):
                 continue
             details = entry["details"]
             failed = [t for t in details if not t["passed"]]
+            unit = "failures" if len(first_samples(details)) == len(details) else "failed samples"
             if not failed:
                 lines.append(f"### {entry['summary']['mode']} — All problems passed!")
                 lines.append("")
@@ -132,7 +212,7 @@ def generate_report(results: dict, report_path: str):
             for t in failed:
                 error_counts[classify_error(t)] += 1
 
-            lines.append(f"### {entry['summary']['mode']} — Error Breakdown ({len(failed)} failures)")
+            lines.append(f"### {entry['summary']['mode']} — Error Breakdown ({len(failed)} {unit})")
             lines.append("")
             lines.append("| Error Type | Count | % of Failures |")
             lines.append("|------------|------:|--------------:|")
@@ -143,8 +223,8 @@ def generate_report(results: dict, report_path: str):
 
         # Differential analysis
         if baseline and multi:
-            baseline_details = {t["task_id"]: t for t in baseline["details"]}
-            multi_details = {t["task_id"]: t for t in multi["details"]}
+            baseline_details = {t["task_id"]: t for t in first_samples(baseline["details"])}
+            multi_details = {t["task_id"]: t for t in first_samples(multi["details"])}
 
             common_ids = set(baseline_details.keys()) & set(multi_details.keys())
 
@@ -187,7 +267,7 @@ def generate_report(results: dict, report_path: str):
         lines.append("|-----------|--:|--:|--:|")
 
         for key in sorted(multi_entries.keys()):
-            details = multi_entries[key]["details"]
+            details = first_samples(multi_entries[key]["details"])
             iter_counts = defaultdict(int)
             for t in details:
                 i = min(t["iterations"], 3)
@@ -210,9 +290,14 @@ def generate_report(results: dict, report_path: str):
     lines.append("  produces code, Reviewer evaluates and may request up to 3 revision iterations.")
     lines.append("- **Execution:** Each generated solution is run in a sandboxed subprocess with a 10-second timeout.")
     lines.append("- **Metric:** pass@1 — fraction of problems where the generated code passes all unit tests on the first attempt.")
+    if sampled:
+        lines.append("- **pass@k:** runs with `--samples n` draw n completions per problem at a higher temperature; ")
+        lines.append("  pass@k is the unbiased estimate of at least one of k samples passing.")
     lines.append("- **HumanEval:** 164 hand-crafted Python problems (OpenAI).")
     lines.append("- **MBPP:** Mostly Basic Python Problems, sanitized test split (~430 problems, Google Research).")
     lines.append("")
+    lines.append(report_marker([entry["summary"]["run_id"] for entry in results.values()]))
+    lines.append("")
 
     report = "\n".join(lines)
     with open(report_path, "w") as f:
@@ -224,14 +309,23 @@ def main():
     parser = argparse.ArgumentParser(description="Generate evaluation report")
     parser.add_argument("--output-dir", default="evals/output")
     parser.add_argument("--report", default="report.md")
+    parser.add_argument("--force", action="store_true", help="Regenerate even if no run changed")
     args = parser.parse_args()
 
-    results = load_latest_results(args.output_dir)
-    if not results:
+    store = open_store(args.output_dir)
+    runs = store.latest_runs()
+    if not runs:
         print(f"No results found in {args.output_dir}. Run evaluations first.")
         return
 
-    print(f"Found results for: {', '.join(f'{b}/{m}' for b, m in sorted(results.keys()))}")
+    print(f"Found results for: {', '.join(f'{b}/{m}' for b, m in sorted(runs.keys()))}")
+    # Only the latest finished run per (benchmark, mode) is reported, so the
+    # report changes only when one of those does
+    if not args.force and is_up_to_date(args.report, [run["run_id"] for run in runs.values()]):
+        print(f"{args.report} is up to date")
+        return
+
+    results = load_latest_results(store, runs)
     generate_report(results, args.report)
 
 
@@ -0,0 +1,164 @@
+"""
+Re-score a stored run without calling any model.
+
+Re-extracts the code from every stored generation, rebuilds the test harness
+and executes it again on the sandbox pool, then saves the result as a new run
+with a diff of the tasks that flipped. Use it after changing the extractors,
+harnesses or sandbox.
+
+Usage:
+    python -m evals.rescore humaneval_baseline_20250101_120000
+    python -m evals.rescore humaneval_baseline_20250101_120000 --output-dir evals/output --workers 4
+"""
+import argparse
+import hashlib
+import sys
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+
+from evals.config import EvalConfig
+from evals.datasets.base import BenchmarkDataset, EvalProblem
+from evals.datasets.humaneval import HumanEvalDataset
+from evals.datasets.mbpp import MBPPDataset
+from evals.execution.pool import SandboxPool
+from evals.extraction.code_extractor import extract_function_body, extract_complete_function
+from evals.results.logger import ResultLogger, TaskResult
+from evals.results.reporter import Reporter
+from evals.results.store import ResultsStore
+from evals.run import build_task_result, timed_execute
+from evals.runners.base import RunResult
+
+
+class ExecutionMemo:
+    """Runs harnesses on the sandbox pool, once per distinct (harness, timeout).
+
+    Identical harnesses (repeated samples, or code the new extractor turns
+    into the same thing) share one execution, including one still in flight.
+    """
+
+    def __init__(self, sandbox: SandboxPool, executor: ThreadPoolExecutor, timeout: int):
+        self.sandbox = sandbox
+        self.executor = executor
+        self.timeout = timeout
+        self._futures: dict[str, Future] = {}
+
+    def submit(self, harness: str) -> Future:
+        digest = hashlib.sha256(f"{self.timeout}\0{harness}".encode("utf-8")).hexdigest()
+        if digest not in self._futures:
+            self._futures[digest] = self.executor.submit(timed_execute, self.sandbox, harness, self.timeout)
+        return self._futures[digest]
+
+    def __len__(self) -> int:
+        return len(self._futures)
+
+
+def _run_result(row: dict, extracted_code: str) -> RunResult:
+    """The stored generation as a RunResult, with freshly extracted code."""
+    return RunResult(
+        task_id=row["task_id"],
+        generated_code=row["generated_code"],
+        extracted_code=extracted_code,
+        iterations=row["iterations"],
+        duration_seconds=row["duration_seconds"],
+        error=row["pipeline_error"],
+        timings={node: seconds for node, seconds in row["timings"].items() if node != "execution"},
+        prompt_tokens=row["prompt_tokens"],
+        completion_tokens=row["completion_tokens"],
+        amortized_seconds=row["amortized_seconds"],
+    )
+
+
+def _extract(problem: EvalProblem, raw_code: str) -> str:
+    if problem.benchmark == "humaneval":
+        return extract_function_body(raw_code)
+    return extract_complete_function(raw_code)
+
+
+def flipped_tasks(before: list[dict], after: list[TaskResult]) -> dict[str, list[str]]:
+    """Tasks whose outcome (any sample passed) changed between two runs."""
+    old: dict[str, bool] = {}
+    for row in before:
+        old[row["task_id"]] = old.get(row["task_id"], False) or row["passed"]
+    new: dict[str, bool] = {}
+    for r in after:
+        new[r.task_id] = new.get(r.task_id, False) or r.passed
+    return {
+        "fixed": [task_id for task_id in old if not old[task_id] and new.get(task_id)],
+        "broken": [task_id for task_id in old if old[task_id] and not new.get(task_id)],
+    }
+
+
+def rescore(store: ResultsStore, run_id: str, output_dir: str, workers: int = 0,
+            timeout: int | None = None) -> tuple[str, dict[str, list[str]]]:
+    """Re-score run_id into a new run. Returns the new run's ID and the flipped tasks."""
+    run = store.run(run_id)
+    if run is None:
+        raise ValueError(f"No run {run_id} in {store.path}")
+    rows = store.results(run_id)
+    config = EvalConfig(**run["config"]) if run["config"] else EvalConfig(benchmark=run["benchmark"], mode=run["mode"])
+    config.output_dir = output_dir
+    if timeout is not None:
+        config.exec_timeout = timeout
+
+    dataset: BenchmarkDataset = HumanEvalDataset() if config.benchmark == "humaneval" else MBPPDataset()
+    problems = {p.task_id: p for p in dataset.load(list(dict.fromkeys(row["task_id"] for row in rows)))}
+
+    new_run_id = f"{run_id}_rescore_{datetime.now():%Y%m%d_%H%M%S}"
+    store.start_run(new_run_id, run["benchmark"], run["mode"], run["model"],
+                    started_at=datetime.now().isoformat(), config=run["config"])
+    result_logger = ResultLogger(output_dir, new_run_id, store)
+
+    start = time.time()
+    with SandboxPool(workers=workers) as sandbox, ThreadPoolExecutor(max_workers=sandbox.size) as executor:
+        memo = ExecutionMemo(sandbox, executor, config.exec_timeout)
+        pending = []
+        for row in rows:
+            problem = problems.get(row["task_id"])
+            if problem is None:
+                print(f"Skipping {row['task_id']}: not in the {config.benchmark} dataset")
+                continue
+            run_result = _run_result(row, _extract(problem, row["generated_code"]))
+            future = None
+            if not run_result.error:
+                future = memo.submit(dataset.build_test_harness(problem, run_result.extracted_code))
+            pending.append((problem, row, run_result, future))
+
+        for problem, row, run_result, future in pending:
+            exec_result, exec_seconds = future.result() if future else (None, 0.0)
+            result_logger.log(build_task_result(
+                problem, run_result, exec_result, config, row["model"], row["sample_index"], exec_seconds,
+            ))
+
+    print(f"Re-scored {len(pending)} results with {len(memo)} distinct harnesses "
+          f"on {sandbox.size} workers in {time.time() - start:.1f}s")
+
+    flipped = flipped_tasks(rows, result_logger.results)
+    reporter = Reporter(result_logger)
+    reporter.print_summary()
+    reporter.save_summary({"rescored_from": run_id, "flipped": flipped})
+    return new_run_id, flipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score a stored eval run without LLM calls")
+    parser.add_argument("run_id")
+    parser.add_argument("--output-dir", default="evals/output")
+    parser.add_argument("--workers", type=int, default=0, help="Sandbox worker processes (0=CPU count)")
+    parser.add_argument("--timeout", type=int, default=None, help="Execution timeout (default: the run's)")
+    args = parser.parse_args()
+
+    store = ResultsStore.for_output_dir(args.output_dir)
+    try:
+        new_run_id, flipped = rescore(store, args.run_id, args.output_dir, args.workers, args.timeout)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+
+    print(f"\n{args.run_id} -> {new_run_id}")
+    print(f"  Fixed ({len(flipped['fixed'])}):  {', '.join(flipped['fixed']) or '-'}")
+    print(f"  Broken ({len(flipped['broken'])}): {', '.join(flipped['broken']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
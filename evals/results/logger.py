@@ -1,7 +1,9 @@
-import json
 import os
-from dataclasses import dataclass, asdict
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from evals.results.store import ResultsStore
 
 
 @dataclass
@@ -20,24 +22,26 @@ class TaskResult:
     exec_error: Optional[str]
     exec_traceback: Optional[str]
     timestamp: str
+    sample_index: int = 0  # which of the problem's --samples completions this is
+    # Seconds per pipeline node (retrieval/router/planner/generator/reviewer) plus "execution"
+    timings: dict[str, float] = field(default_factory=dict)
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    amortized_seconds: Optional[float] = None  # see RunResult.amortized_seconds
 
 
 class ResultLogger:
-    """Accumulates TaskResults and writes them to a JSONL file."""
+    """Accumulates TaskResults and commits each one to the results store."""
 
-    def __init__(self, output_dir: str, run_id: str):
+    def __init__(self, output_dir: str, run_id: str, store: "ResultsStore"):
         self.output_dir = output_dir
         self.run_id = run_id
-        self.results: list[TaskResult] = []
+        self.store = store
         os.makedirs(output_dir, exist_ok=True)
-        self._filepath = os.path.join(output_dir, f"{run_id}_details.jsonl")
+        # A resumed run starts from the results it already has
+        self.results: list[TaskResult] = [TaskResult(**row) for row in store.results(run_id)]
 
     def log(self, result: TaskResult):
         self.results.append(result)
-        # Append immediately so results survive crashes
-        with open(self._filepath, "a") as f:
-            f.write(json.dumps(asdict(result)) + "\n")
-
-    @property
-    def filepath(self) -> str:
-        return self._filepath
+        # Committed immediately so results survive crashes (and --resume can skip them)
+        self.store.add_results(self.run_id, [result])
@@ -1,8 +1,93 @@
 import json
 import os
+from collections import defaultdict
+from dataclasses import asdict
+from datetime import datetime
 
 from evals.results.logger import ResultLogger
 
+# k values reported when there are at least k samples per problem
+PASS_AT_K = (1, 5, 10, 20, 50, 100)
+
+
+def pass_at_k(n: int, c: int, k: int) -> float:
+    """Unbiased pass@k estimate from n samples of which c passed: 1 - C(n-c, k) / C(n, k)
+    (Chen et al., 2021), computed as a product to stay stable for large n."""
+    if n - c < k:
+        return 1.0
+    estimate = 1.0
+    for i in range(n - c + 1, n + 1):
+        estimate *= 1 - k / i
+    return 1.0 - estimate
+
+
+def pass_at_k_summary(details: list[dict]) -> dict[str, float]:
+    """{"pass@k": mean estimate over problems} for every k in PASS_AT_K that the
+    smallest per-problem sample count allows. Takes result dicts (details rows)."""
+    counts: dict[str, list[int]] = defaultdict(lambda: [0, 0])
+    for r in details:
+        counts[r["task_id"]][0] += 1
+        counts[r["task_id"]][1] += bool(r["passed"])
+    if not counts:
+        return {}
+    min_samples = min(n for n, _ in counts.values())
+    return {
+        f"pass@{k}": round(sum(pass_at_k(n, c, k) for n, c in counts.values()) / len(counts), 4)
+        for k in PASS_AT_K if k <= min_samples
+    }
+
+
+# Report order for TaskResult.timings keys; anything else follows
+NODES = ("retrieval", "router", "planner", "generator", "reviewer", "execution")
+
+
+def percentile(values: list[float], q: float) -> float:
+    """q-th percentile (0-100) with linear interpolation between closest ranks."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def profile_summary(details: list[dict]) -> dict:
+    """Latency percentiles, per-node time, token throughput and cost per solved problem.
+    Takes result dicts (details rows); rows from before timings were recorded count as zero.
+    Throughput and cost count samples drawn by one request at their amortized share of it."""
+    durations = [r["duration_seconds"] for r in details]
+    node_values: dict[str, list[float]] = defaultdict(list)
+    for r in details:
+        for node, seconds in (r.get("timings") or {}).items():
+            node_values[node].append(seconds)
+    node_total = sum(sum(v) for v in node_values.values())
+    ordered_nodes = sorted(node_values, key=lambda n: (NODES.index(n) if n in NODES else len(NODES), n))
+
+    pipeline_seconds = sum(
+        r["duration_seconds"] if r.get("amortized_seconds") is None else r["amortized_seconds"] for r in details
+    )
+    exec_seconds = sum(node_values.get("execution", []))
+    completion_tokens = sum(r.get("completion_tokens", 0) for r in details)
+    solved = len({r["task_id"] for r in details if r["passed"]})
+    return {
+        "latency_seconds": {f"p{q}": round(percentile(durations, q), 2) for q in (50, 95, 99)},
+        "node_seconds": {
+            node: {
+                "total": round(sum(node_values[node]), 2),
+                "share": round(sum(node_values[node]) / node_total, 4) if node_total else 0,
+                "p50": round(percentile(node_values[node], 50), 3),
+                "p95": round(percentile(node_values[node], 95), 3),
+            }
+            for node in ordered_nodes
+        },
+        "prompt_tokens": sum(r.get("prompt_tokens", 0) for r in details),
+        "completion_tokens": completion_tokens,
+        "tokens_per_second": round(completion_tokens / pipeline_seconds, 1) if pipeline_seconds else 0,
+        # Pipeline plus test execution time spent per problem solved
+        "seconds_per_pass": round((pipeline_seconds + exec_seconds) / solved, 2) if solved else None,
+    }
+
 
 class Reporter:
     """Generate summary statistics from a completed eval run."""
@@ -12,14 +97,21 @@ class Reporter:
 
     def compute_summary(self) -> dict:
         results = self.logger.results
-        total = len(results)
-        passed = sum(1 for r in results if r.passed)
+        # With --samples there are several results per problem; problem counts use
+        # "any sample passed", error and timing figures are per sample
+        tasks: dict[str, bool] = {}
+        for r in results:
+            tasks[r.task_id] = tasks.get(r.task_id, False) or r.passed
+        total = len(tasks)
+        passed = sum(tasks.values())
+        rows = [asdict(r) for r in results]
+        pass_at = pass_at_k_summary(rows)
 
         pipeline_errors = sum(1 for r in results if r.pipeline_error)
         exec_errors = sum(1 for r in results if not r.passed and r.exec_error and not r.pipeline_error)
 
-        avg_duration = sum(r.duration_seconds for r in results) / total if total else 0
-        avg_iterations = sum(r.iterations for r in results) / total if total else 0
+        avg_duration = sum(r.duration_seconds for r in results) / len(results) if results else 0
+        avg_iterations = sum(r.iterations for r in results) / len(results) if results else 0
 
         return {
             "run_id": self.logger.run_id,
@@ -29,11 +121,14 @@ class Reporter:
             "total": total,
             "passed": passed,
             "failed": total - passed,
-            "pass_at_1": round(passed / total, 4) if total else 0,
+            "pass_at_1": pass_at.get("pass@1", 0),
+            "samples_per_task": round(len(results) / total, 2) if total else 0,
+            "pass_at_k": pass_at,
             "pipeline_errors": pipeline_errors,
             "execution_errors": exec_errors,
             "avg_duration_seconds": round(avg_duration, 2),
             "avg_iterations": round(avg_iterations, 2),
+            "profile": profile_summary(rows),
         }
 
     def print_summary(self):
@@ -46,20 +141,38 @@ class Reporter:
         print(f"  Passed:           {s['passed']}")
         print(f"  Failed:           {s['failed']}")
         print(f"  pass@1:           {s['pass_at_1']:.1%}")
+        if s["samples_per_task"] > 1:
+            print(f"  Samples/problem:  {s['samples_per_task']:g}")
+            for name, value in s["pass_at_k"].items():
+                if name != "pass@1":
+                    print(f"  {name + ':':<18}{value:.1%}")
         print(f"  Pipeline errors:  {s['pipeline_errors']}")
         print(f"  Execution errors: {s['execution_errors']}")
         print(f"  Avg duration:     {s['avg_duration_seconds']:.1f}s")
         print(f"  Avg iterations:   {s['avg_iterations']:.1f}")
+        p = s["profile"]
+        latency = p["latency_seconds"]
+        print(f"  Latency p50/p95/p99: {latency['p50']:.1f}s / {latency['p95']:.1f}s / {latency['p99']:.1f}s")
+        print(f"  Tokens:           {p['prompt_tokens']} prompt, {p['completion_tokens']} completion "
+              f"({p['tokens_per_second']:.1f} tok/s)")
+        if p["seconds_per_pass"] is not None:
+            print(f"  Seconds per pass: {p['seconds_per_pass']:.1f}s")
+        for node, t in p["node_seconds"].items():
+            print(f"    {node:<14}{t['share']:6.1%}  p50 {t['p50']:.2f}s  p95 {t['p95']:.2f}s")
         print(f"{'=' * 60}")
 
-    def save_summary(self):
-        summary = self.compute_summary()
+    def save_summary(self, extra: dict | None = None):
+        """Write the summary (plus any extra keys) to the store and <run_id>_summary.json."""
+        summary = {**self.compute_summary(), **(extra or {})}
+        # Marks the run finished in the store; generate_report reads it from there
+        self.logger.store.finish_run(self.logger.run_id, summary, finished_at=datetime.now().isoformat())
         path = os.path.join(self.logger.output_dir, f"{self.logger.run_id}_summary.json")
         with open(path, "w") as f:
             json.dump(summary, f, indent=2)
         print(f"Summary saved to {path}")
 
-        failed_ids = [r.task_id for r in self.logger.results if not r.passed]
+        passed_ids = {r.task_id for r in self.logger.results if r.passed}
+        failed_ids = list(dict.fromkeys(r.task_id for r in self.logger.results if r.task_id not in passed_ids))
         if failed_ids:
             failed_path = os.path.join(self.logger.output_dir, f"{self.logger.run_id}_failed.json")
             with open(failed_path, "w") as f:
@@ -0,0 +1,266 @@
+"""
+SQLite store for eval runs and their per-task results.
+
+Usage:
+    python -m evals.results.store import evals/output      # load existing *_details.jsonl / *_summary.json
+    python -m evals.results.store runs
+    python -m evals.results.store history HumanEval/0     # one task across all runs
+"""
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import threading
+from dataclasses import asdict, fields
+
+from evals.results.logger import TaskResult
+
+DB_NAME = "results.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id      TEXT PRIMARY KEY,
+    benchmark   TEXT NOT NULL,
+    mode        TEXT NOT NULL,
+    model       TEXT NOT NULL,
+    config      TEXT,           -- EvalConfig as JSON, NULL for imported runs
+    started_at  TEXT NOT NULL,
+    finished_at TEXT,           -- NULL while running, or if the run crashed
+    summary     TEXT            -- Reporter.compute_summary() as JSON
+);
+CREATE INDEX IF NOT EXISTS runs_latest ON runs (benchmark, mode, finished_at);
+
+CREATE TABLE IF NOT EXISTS task_results (
+    run_id            TEXT NOT NULL REFERENCES runs (run_id),
+    task_id           TEXT NOT NULL,
+    sample_index      INTEGER NOT NULL,
+    benchmark         TEXT NOT NULL,
+    mode              TEXT NOT NULL,
+    model             TEXT NOT NULL,
+    passed            INTEGER NOT NULL,
+    generated_code    TEXT,
+    extracted_code    TEXT,
+    iterations        INTEGER,
+    duration_seconds  REAL,
+    pipeline_error    TEXT,
+    exec_error        TEXT,
+    exec_traceback    TEXT,
+    timestamp         TEXT,
+    timings           TEXT,     -- JSON object
+    prompt_tokens     INTEGER,
+    completion_tokens INTEGER,
+    amortized_seconds REAL,
+    PRIMARY KEY (run_id, task_id, sample_index)
+);
+CREATE INDEX IF NOT EXISTS task_results_task ON task_results (task_id, run_id);
+"""
+
+_COLUMNS = [f.name for f in fields(TaskResult)]
+
+# task_results columns added after the table was first created, with their types
+_ADDED_COLUMNS = {"amortized_seconds": "REAL"}
+
+# Columns the report needs; skips the generated code and tracebacks
+REPORT_COLUMNS = (
+    "task_id", "sample_index", "passed", "iterations", "duration_seconds",
+    "pipeline_error", "exec_error", "timings", "prompt_tokens", "completion_tokens", "amortized_seconds",
+)
+
+
+def _row_to_dict(row: sqlite3.Row) -> dict:
+    result = dict(row)
+    result.pop("run_id", None)
+    if "passed" in result:
+        result["passed"] = bool(result["passed"])
+    if "timings" in result:
+        result["timings"] = json.loads(result["timings"] or "{}")
+    return result
+
+
+def _run_to_dict(row: sqlite3.Row) -> dict:
+    run = dict(row)
+    run["config"] = json.loads(run["config"]) if run["config"] else None
+    run["summary"] = json.loads(run["summary"]) if run["summary"] else None
+    return run
+
+
+class ResultsStore:
+    """Runs and task results in one SQLite file (evals/output/results.db by default).
+
+    Each result is committed as it is logged, so a crashed run keeps every
+    finished task and can be resumed. Safe to share between threads.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        existing = {row["name"] for row in self._conn.execute("PRAGMA table_info(task_results)")}
+        for name, kind in _ADDED_COLUMNS.items():
+            if name not in existing:
+                self._conn.execute(f"ALTER TABLE task_results ADD COLUMN {name} {kind}")
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_output_dir(cls, output_dir: str) -> "ResultsStore":
+        return cls(os.path.join(output_dir, DB_NAME))
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _query(self, sql: str, params: tuple = ()) -> list[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # -- writing ------------------------------------------------------------
+
+    def start_run(self, run_id: str, benchmark: str, mode: str, model: str,
+                  started_at: str, config: dict | None = None) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO runs (run_id, benchmark, mode, model, config, started_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, benchmark, mode, model, json.dumps(config) if config is not None else None, started_at),
+            )
+
+    def add_results(self, run_id: str, results: list[TaskResult]) -> None:
+        rows = []
+        for result in results:
+            row = asdict(result)
+            row["timings"] = json.dumps(row["timings"])
+            rows.append((run_id, *(row[c] for c in _COLUMNS)))
+        placeholders = ", ".join("?" * (len(_COLUMNS) + 1))
+        with self._lock, self._conn:
+            # A task rerun after a resume replaces its earlier, incomplete samples
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO task_results (run_id, {', '.join(_COLUMNS)}) VALUES ({placeholders})",
+                rows,
+            )
+
+    def finish_run(self, run_id: str, summary: dict, finished_at: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE runs SET summary = ?, finished_at = ? WHERE run_id = ?",
+                (json.dumps(summary), finished_at, run_id),
+            )
+
+    def drop_incomplete(self, run_id: str, samples: int) -> None:
+        """Delete the results of tasks with fewer than `samples` samples, so a
+        resume reruns them from scratch."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM task_results WHERE run_id = ? AND task_id IN ("
+                "  SELECT task_id FROM task_results WHERE run_id = ? GROUP BY task_id HAVING COUNT(*) < ?)",
+                (run_id, run_id, samples),
+            )
+
+    # -- reading ------------------------------------------------------------
+
+    def run(self, run_id: str) -> dict | None:
+        rows = self._query("SELECT * FROM runs WHERE run_id = ?", (run_id,))
+        return _run_to_dict(rows[0]) if rows else None
+
+    def runs(self, benchmark: str | None = None, mode: str | None = None) -> list[dict]:
+        """All runs, oldest first, with their task counts and pass counts."""
+        rows = self._query(
+            "SELECT runs.*, COUNT(DISTINCT task_id) AS tasks,"
+            "  COUNT(DISTINCT CASE WHEN passed THEN task_id END) AS passed "
+            "FROM runs LEFT JOIN task_results USING (run_id) "
+            "WHERE (?1 IS NULL OR runs.benchmark = ?1) AND (?2 IS NULL OR runs.mode = ?2) "
+            "GROUP BY runs.run_id ORDER BY runs.started_at",
+            (benchmark, mode),
+        )
+        return [_run_to_dict(row) for row in rows]
+
+    def latest_runs(self) -> dict[tuple[str, str], dict]:
+        """The most recently finished run per (benchmark, mode)."""
+        rows = self._query(
+            "SELECT * FROM runs AS r WHERE finished_at = ("
+            "  SELECT MAX(finished_at) FROM runs WHERE benchmark = r.benchmark AND mode = r.mode)"
+        )
+        return {(row["benchmark"], row["mode"]): _run_to_dict(row) for row in rows}
+
+    def results(self, run_id: str, columns: tuple[str, ...] | None = None) -> list[dict]:
+        """A run's result rows (TaskResult fields) in the order they were logged."""
+        select = ", ".join(columns) if columns else ", ".join(_COLUMNS)
+        rows = self._query(f"SELECT {select} FROM task_results WHERE run_id = ? ORDER BY rowid", (run_id,))
+        return [_row_to_dict(row) for row in rows]
+
+    def completed_tasks(self, run_id: str) -> set[str]:
+        return {row["task_id"] for row in self._query(
+            "SELECT DISTINCT task_id FROM task_results WHERE run_id = ?", (run_id,)
+        )}
+
+    def task_history(self, task_id: str) -> list[dict]:
+        """One row per run that attempted task_id: run, mode, model, samples and passes."""
+        rows = self._query(
+            "SELECT run_id, runs.mode, runs.model, runs.started_at,"
+            "  COUNT(*) AS samples, SUM(passed) AS passed "
+            "FROM task_results JOIN runs USING (run_id) WHERE task_id = ? "
+            "GROUP BY run_id ORDER BY runs.started_at",
+            (task_id,),
+        )
+        return [dict(row) for row in rows]
+
+    # -- JSONL import -------------------------------------------------------
+
+    def import_dir(self, output_dir: str) -> list[str]:
+        """Import <run_id>_details.jsonl (+ _summary.json) files for runs the store
+        doesn't have yet. Returns the imported run IDs."""
+        known = {row["run_id"] for row in self._query("SELECT run_id FROM runs")}
+        imported = []
+        for details_path in sorted(glob.glob(os.path.join(output_dir, "*_details.jsonl"))):
+            run_id = os.path.basename(details_path)[: -len("_details.jsonl")]
+            if run_id in known:
+                continue
+            with open(details_path) as f:
+                rows = [json.loads(line) for line in f if line.strip()]
+            if not rows:
+                continue
+            results = [TaskResult(**{c: row[c] for c in _COLUMNS if c in row}) for row in rows]
+            first = results[0]
+            self.start_run(run_id, first.benchmark, first.mode, first.model, started_at=first.timestamp)
+            self.add_results(run_id, results)
+
+            summary_path = os.path.join(output_dir, f"{run_id}_summary.json")
+            if os.path.exists(summary_path):
+                with open(summary_path) as f:
+                    summary = json.load(f)
+                self.finish_run(run_id, summary, finished_at=max(r.timestamp for r in results))
+            imported.append(run_id)
+        return imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query or import eval results")
+    parser.add_argument("--db", default=os.path.join("evals/output", DB_NAME))
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_cmd = commands.add_parser("import", help="Import JSONL results from an output directory")
+    import_cmd.add_argument("output_dir")
+    runs_cmd = commands.add_parser("runs", help="List runs")
+    runs_cmd.add_argument("--benchmark")
+    runs_cmd.add_argument("--mode")
+    history_cmd = commands.add_parser("history", help="Show one task's results across runs")
+    history_cmd.add_argument("task_id")
+    args = parser.parse_args()
+
+    store = ResultsStore(args.db)
+    if args.command == "import":
+        imported = store.import_dir(args.output_dir)
+        print(f"Imported {len(imported)} runs into {store.path}")
+    elif args.command == "runs":
+        for run in store.runs(args.benchmark, args.mode):
+            status = "finished" if run["finished_at"] else "incomplete"
+            print(f"{run['run_id']:<45} {run['model']:<20} {run['passed']:>4}/{run['tasks']:<4} {status}")
+    else:
+        for row in store.task_history(args.task_id):
+            print(f"{row['run_id']:<45} {row['model']:<20} {row['passed']}/{row['samples']} passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,22 +6,144 @@ Usage:
     python -m evals.run --benchmark humaneval --mode multi_agent
     python -m evals.run --benchmark mbpp --mode baseline --limit 20
     python -m evals.run --benchmark humaneval --mode baseline --tasks HumanEval/0,HumanEval/1
+    python -m evals.run --benchmark humaneval --mode baseline --concurrency 16 --rpm 500 --tpm 200000
+    python -m evals.run --benchmark humaneval --mode baseline --cache record
+    python -m evals.run --benchmark humaneval --mode baseline --cache replay   # offline, no model calls
+    python -m evals.run --benchmark humaneval --mode baseline --samples 10 --temperature 0.8
+    python -m evals.run --resume humaneval_baseline_20250101_120000   # finish a crashed run
 """
 import argparse
+import asyncio
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
 from datetime import datetime
 
 # Load .env and configure logging before anything else
 import config as app_config  # noqa: F401
 
+from evals.cache import DEFAULT_CACHE_PATH, LLMResponseCache
 from evals.config import EvalConfig
 from evals.datasets.humaneval import HumanEvalDataset
 from evals.datasets.mbpp import MBPPDataset
 from evals.runners.baseline import BaselineRunner
 from evals.runners.multi_agent import MultiAgentRunner
-from evals.execution.sandbox import execute_with_timeout
+from evals.datasets.base import BenchmarkDataset, EvalProblem
+from evals.execution.pool import SandboxPool
+from evals.execution.sandbox import ExecResult
 from evals.results.logger import ResultLogger, TaskResult
 from evals.results.reporter import Reporter
+from evals.results.store import ResultsStore
+from evals.runners.base import Runner, RunResult
+
+
+def build_task_result(
+    problem: EvalProblem, run_result: RunResult, exec_result: ExecResult | None,
+    eval_config: EvalConfig, model_name: str, sample_index: int = 0, exec_seconds: float = 0.0,
+) -> TaskResult:
+    if run_result.error:
+        passed, exec_error, exec_tb = False, f"Pipeline error: {run_result.error}", None
+    else:
+        passed, exec_error, exec_tb = exec_result.passed, exec_result.error, exec_result.traceback
+
+    timings = dict(run_result.timings)
+    if exec_result:
+        timings["execution"] = exec_seconds
+
+    return TaskResult(
+        task_id=problem.task_id,
+        benchmark=eval_config.benchmark,
+        mode=eval_config.mode,
+        model=model_name,
+        passed=passed,
+        generated_code=run_result.generated_code,
+        extracted_code=run_result.extracted_code,
+        iterations=run_result.iterations,
+        duration_seconds=round(run_result.duration_seconds, 2),
+        pipeline_error=run_result.error,
+        exec_error=exec_error,
+        exec_traceback=exec_tb,
+        timestamp=datetime.now().isoformat(),
+        sample_index=sample_index,
+        timings={node: round(seconds, 3) for node, seconds in timings.items()},
+        prompt_tokens=run_result.prompt_tokens,
+        completion_tokens=run_result.completion_tokens,
+        amortized_seconds=(
+            round(run_result.amortized_seconds, 2) if run_result.amortized_seconds is not None else None
+        ),
+    )
+
+
+def timed_execute(sandbox: SandboxPool, code: str, timeout: int) -> tuple[ExecResult, float]:
+    start = time.time()
+    result = sandbox.execute(code, timeout)
+    return result, time.time() - start
+
+
+def _status_line(task_results: list[TaskResult]) -> str:
+    first = task_results[0]
+    if len(task_results) > 1:
+        passed = sum(r.passed for r in task_results)
+        return f"{passed}/{len(task_results)} samples passed ({first.duration_seconds:.1f}s)"
+    status = "PASS" if first.passed else "FAIL"
+    return f"{status} ({first.duration_seconds:.1f}s, {first.iterations} iter)"
+
+
+async def run_concurrent(
+    problems: list[EvalProblem], runner: Runner, dataset: BenchmarkDataset,
+    eval_config: EvalConfig, model_name: str, result_logger: ResultLogger, sandbox: SandboxPool,
+):
+    """Run up to eval_config.concurrency generations at once.
+
+    Test execution happens outside the generation slot, so the next problem's
+    LLM call overlaps with this one's sandbox run. With --samples k, each
+    generation yields k completions, all executed in the sandbox pool.
+    Results are logged in problem (then sample) order, whatever order they
+    finish in.
+    """
+    loop = asyncio.get_running_loop()
+    generation_slots = asyncio.Semaphore(eval_config.concurrency)
+    # One thread per sandbox worker to wait on it
+    exec_pool = ThreadPoolExecutor(max_workers=sandbox.size)
+
+    async def execute(problem: EvalProblem, run_result: RunResult) -> tuple[ExecResult | None, float]:
+        if run_result.error:
+            return None, 0.0
+        test_code = dataset.build_test_harness(problem, run_result.extracted_code)
+        return await loop.run_in_executor(exec_pool, timed_execute, sandbox, test_code, eval_config.exec_timeout)
+
+    async def evaluate(index: int, problem: EvalProblem) -> tuple[int, list[TaskResult]]:
+        async with generation_slots:
+            run_results = await runner.arun_samples(problem, eval_config.samples)
+        exec_results = await asyncio.gather(*(execute(problem, r) for r in run_results))
+        return index, [
+            build_task_result(problem, run_result, exec_result, eval_config, model_name, sample_index, exec_seconds)
+            for sample_index, (run_result, (exec_result, exec_seconds)) in enumerate(zip(run_results, exec_results))
+        ]
+
+    finished: dict[int, list[TaskResult]] = {}
+    next_to_log = 0
+    try:
+        tasks = [asyncio.create_task(evaluate(i, p)) for i, p in enumerate(problems)]
+        for done, next_result in enumerate(asyncio.as_completed(tasks), start=1):
+            index, task_results = await next_result
+            print(f"[{done}/{len(problems)}] {task_results[0].task_id} ... {_status_line(task_results)}", flush=True)
+            finished[index] = task_results
+            while next_to_log in finished:
+                for task_result in finished.pop(next_to_log):
+                    result_logger.log(task_result)
+                next_to_log += 1
+    finally:
+        exec_pool.shutdown(wait=False, cancel_futures=True)
+
+
+# EvalConfig fields a --resume takes from the original run; the rest (concurrency,
+# rate limits, workers) can change between attempts
+_RESUMED_SETTINGS = (
+    "benchmark", "mode", "baseline_model", "limit", "offset", "task_ids",
+    "exec_timeout", "temperature", "samples",
+)
 
 
 def main():
@@ -34,6 +156,17 @@ def main():
     parser.add_argument("--tasks", type=str, default="", help="Comma-separated task IDs")
     parser.add_argument("--timeout", type=int, default=10, help="Execution timeout in seconds")
     parser.add_argument("--output-dir", default="evals/output")
+    parser.add_argument("--exec-workers", type=int, default=0, help="Sandbox worker processes (0=CPU count)")
+    parser.add_argument("--samples", type=int, default=1, help="Completions per problem, for pass@k")
+    parser.add_argument("--temperature", type=float, default=0.0, help="Sampling temperature")
+    parser.add_argument("--cache", choices=["record", "replay", "off"], default="off",
+                        help="LLM response cache: record responses, replay them offline, or bypass")
+    parser.add_argument("--cache-path", default=DEFAULT_CACHE_PATH)
+    parser.add_argument("--concurrency", type=int, default=1, help="Problems to generate at once")
+    parser.add_argument("--rpm", type=int, default=0, help="OpenAI requests per minute limit (0=none)")
+    parser.add_argument("--tpm", type=int, default=0, help="OpenAI tokens per minute limit (0=none)")
+    parser.add_argument("--resume", metavar="RUN_ID", default="",
+                        help="Continue a run from --output-dir's results store, skipping finished tasks")
     args = parser.parse_args()
 
     eval_config = EvalConfig(
@@ -45,19 +178,41 @@ def main():
         task_ids=[t.strip() for t in args.tasks.split(",") if t.strip()],
         exec_timeout=args.timeout,
         output_dir=args.output_dir,
+        exec_workers=args.exec_workers,
+        temperature=args.temperature,
+        samples=max(1, args.samples),
+        concurrency=max(1, args.concurrency),
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm,
     )
 
+    store = ResultsStore.for_output_dir(eval_config.output_dir)
+    resumed = store.run(args.resume) if args.resume else None
+    if args.resume:
+        if resumed is None or resumed["config"] is None:
+            print(f"No resumable run {args.resume} in {store.path}")
+            sys.exit(1)
+        # The run's problem selection and generation settings win over the command line
+        eval_config = EvalConfig(**{
+            **asdict(eval_config),
+            **{name: resumed["config"][name] for name in _RESUMED_SETTINGS},
+        })
+
     # Load dataset
     if eval_config.benchmark == "humaneval":
         dataset = HumanEvalDataset()
     else:
         dataset = MBPPDataset()
 
-    problems = dataset.load()
+    # With --tasks only those problems are read (from the snapshot's index
+    # when there is one, see evals/snapshot.py)
+    problems = dataset.load(eval_config.task_ids or None)
 
     # Apply filtering
     if eval_config.task_ids:
-        problems = [p for p in problems if p.task_id in eval_config.task_ids]
+        missing = set(eval_config.task_ids) - {p.task_id for p in problems}
+        if missing:
+            print(f"Unknown task IDs: {', '.join(sorted(missing))}")
     else:
         problems = problems[eval_config.offset:]
         if eval_config.limit > 0:
@@ -67,64 +222,68 @@ def main():
         print("No problems to run. Check your filters.")
         sys.exit(1)
 
+    if resumed:
+        run_id = resumed["run_id"]
+        store.drop_incomplete(run_id, eval_config.samples)
+        done = store.completed_tasks(run_id)
+        print(f"Resuming {run_id}: {len(done)} of {len(problems)} problems already done")
+        problems = [p for p in problems if p.task_id not in done]
+    else:
+        run_id = f"{eval_config.benchmark}_{eval_config.mode}_{datetime.now():%Y%m%d_%H%M%S}"
+
+    sandbox = SandboxPool(workers=eval_config.exec_workers)
+
     # Select runner
+    cache = LLMResponseCache(args.cache_path, args.cache)
     if eval_config.mode == "baseline":
-        runner = BaselineRunner(eval_config)
+        runner = BaselineRunner(eval_config, cache)
     else:
-        runner = MultiAgentRunner()
-
-    # Set up logging
-    run_id = f"{eval_config.benchmark}_{eval_config.mode}_{datetime.now():%Y%m%d_%H%M%S}"
-    result_logger = ResultLogger(eval_config.output_dir, run_id)
+        runner = MultiAgentRunner(cache, eval_config.temperature)
 
     model_name = eval_config.baseline_model if eval_config.mode == "baseline" else app_config.CHAT_MODEL
 
+    # Set up logging
+    store.start_run(run_id, eval_config.benchmark, eval_config.mode, model_name,
+                    started_at=datetime.now().isoformat(), config=asdict(eval_config))
+    result_logger = ResultLogger(eval_config.output_dir, run_id, store)
+
     print(f"Starting eval: {eval_config.benchmark} / {eval_config.mode} / {model_name}")
-    print(f"Problems: {len(problems)}")
+    print(f"Problems: {len(problems)}" + (f"  (concurrency {eval_config.concurrency})" if eval_config.concurrency > 1 else ""))
     print(f"Run ID: {run_id}")
+    if eval_config.samples > 1:
+        print(f"Samples: {eval_config.samples} per problem at temperature {eval_config.temperature:g}")
+        if eval_config.temperature == 0:
+            print("Warning: temperature 0 gives (near-)identical samples; pass@k will match pass@1")
+    if cache.mode != "off":
+        print(f"LLM cache: {cache.mode} ({len(cache)} entries in {cache.path})")
     print("-" * 60)
 
-    # Main eval loop
-    for i, problem in enumerate(problems):
-        print(f"[{i + 1}/{len(problems)}] {problem.task_id} ... ", end="", flush=True)
+    with sandbox:
+        if eval_config.concurrency > 1 or eval_config.samples > 1:
+            asyncio.run(run_concurrent(problems, runner, dataset, eval_config, model_name, result_logger, sandbox))
+        else:
+            # Main eval loop
+            for i, problem in enumerate(problems):
+                print(f"[{i + 1}/{len(problems)}] {problem.task_id} ... ", end="", flush=True)
 
-        # Step 1: Run through pipeline
-        run_result = runner.run(problem)
+                # Step 1: Run through pipeline
+                run_result = runner.run(problem)
 
-        # Step 2: Build test harness and execute
-        passed = False
-        exec_error = None
-        exec_tb = None
+                # Step 2: Build test harness and execute
+                exec_result, exec_seconds = None, 0.0
+                if not run_result.error:
+                    test_code = dataset.build_test_harness(problem, run_result.extracted_code)
+                    exec_result, exec_seconds = timed_execute(sandbox, test_code, eval_config.exec_timeout)
 
-        if run_result.error:
-            exec_error = f"Pipeline error: {run_result.error}"
-        else:
-            test_code = dataset.build_test_harness(problem, run_result.extracted_code)
-            exec_result = execute_with_timeout(test_code, timeout=eval_config.exec_timeout)
-            passed = exec_result.passed
-            exec_error = exec_result.error
-            exec_tb = exec_result.traceback
-
-        # Step 3: Log result
-        task_result = TaskResult(
-            task_id=problem.task_id,
-            benchmark=eval_config.benchmark,
-            mode=eval_config.mode,
-            model=model_name,
-            passed=passed,
-            generated_code=run_result.generated_code,
-            extracted_code=run_result.extracted_code,
-            iterations=run_result.iterations,
-            duration_seconds=round(run_result.duration_seconds, 2),
-            pipeline_error=run_result.error,
-            exec_error=exec_error,
-            exec_traceback=exec_tb,
-            timestamp=datetime.now().isoformat(),
-        )
-        result_logger.log(task_result)
-
-        status = "PASS" if passed else "FAIL"
-        print(f"{status} ({run_result.duration_seconds:.1f}s, {run_result.iterations} iter)")
+                # Step 3: Log result
+                task_result = build_task_result(
+                    problem, run_result, exec_result, eval_config, model_name, exec_seconds=exec_seconds,
+                )
+                result_logger.log(task_result)
+                print(_status_line([task_result]))
+
+    if cache.mode != "off":
+        print(f"LLM cache: {cache.stats()}")
 
     # Final report
     reporter = Reporter(result_logger)
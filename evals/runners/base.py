@@ -1,5 +1,6 @@
+import asyncio
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Optional
 
 from evals.datasets.base import EvalProblem
@@ -14,9 +15,24 @@ class RunResult:
     iterations: int         # Number of generate/review loops (1 for baseline)
     duration_seconds: float
     error: Optional[str] = None
+    timings: dict[str, float] = field(default_factory=dict)  # seconds per node (router, generator, ...)
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    # This sample's share of a request it shared with other samples (n > 1);
+    # duration_seconds is the whole request's latency
+    amortized_seconds: Optional[float] = None
 
 
 class Runner(ABC):
     @abstractmethod
     def run(self, problem: EvalProblem) -> RunResult:
         ...
+
+    async def arun(self, problem: EvalProblem) -> RunResult:
+        """Async variant used by --concurrency; runners with async clients override it."""
+        return await asyncio.to_thread(self.run, problem)
+
+    async def arun_samples(self, problem: EvalProblem, samples: int) -> list[RunResult]:
+        """`samples` independent completions of the problem, for pass@k: one arun
+        per sample, concurrently. Runners that can batch samples override it."""
+        return list(await asyncio.gather(*(self.arun(problem) for _ in range(samples))))
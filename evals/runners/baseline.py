@@ -1,56 +1,161 @@
 import time
 
-from openai import OpenAI
-
 from config import OPENAI_API_KEY
+from evals.cache import LLMResponseCache
 from evals.config import EvalConfig
 from evals.datasets.base import EvalProblem
 from evals.runners.base import Runner, RunResult
+from evals.runners.rate_limit import RateLimiter, call_with_backoff
 from evals.extraction.code_extractor import extract_function_body, extract_complete_function
 
+SYSTEM_PROMPT = (
+    "You are an expert Python programmer. "
+    "Return ONLY code, no markdown fences, no explanation."
+)
+
+# Completion tokens reserved per request until the real usage is known
+_COMPLETION_ESTIMATE = 512
+
+
+def _usage(response) -> dict | None:
+    if not response.usage:
+        return None
+    return {"prompt_tokens": response.usage.prompt_tokens, "completion_tokens": response.usage.completion_tokens}
+
 
 class BaselineRunner(Runner):
     """Direct single-call to OpenAI. No router, no reviewer, no RAG."""
 
-    def __init__(self, config: EvalConfig):
-        self.client = OpenAI(api_key=OPENAI_API_KEY)
+    def __init__(self, config: EvalConfig, cache: LLMResponseCache | None = None):
+        self.cache = cache if cache is not None else LLMResponseCache(mode="off")
+        self.limiter = RateLimiter(config.requests_per_minute, config.tokens_per_minute)
         self.model = config.baseline_model
         self.temperature = config.temperature
+        # Clients are created on first use, so replaying from the cache needs no API key
+        self._client = None
+        self._async_client = None
 
-    def run(self, problem: EvalProblem) -> RunResult:
-        start = time.time()
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                temperature=self.temperature,
-                messages=[
-                    {"role": "system", "content": (
-                        "You are an expert Python programmer. "
-                        "Return ONLY code, no markdown fences, no explanation."
-                    )},
-                    {"role": "user", "content": problem.prompt_for_model},
-                ],
-            )
-            raw_code = response.choices[0].message.content or ""
-        except Exception as e:
-            return RunResult(
-                task_id=problem.task_id,
-                generated_code="",
-                extracted_code="",
-                iterations=1,
-                duration_seconds=time.time() - start,
-                error=str(e),
-            )
+    @property
+    def client(self):
+        if self._client is None:
+            from openai import OpenAI
+
+            self._client = OpenAI(api_key=OPENAI_API_KEY)
+        return self._client
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            from openai import AsyncOpenAI
+
+            # Retries are left to call_with_backoff so concurrent runs back off together
+            self._async_client = AsyncOpenAI(api_key=OPENAI_API_KEY, max_retries=0)
+        return self._async_client
 
+    def _cache_key(self, messages: list[dict]) -> dict:
+        return {"node": "baseline", "model": self.model, "temperature": self.temperature, "messages": messages}
+
+    def _messages(self, problem: EvalProblem) -> list[dict]:
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": problem.prompt_for_model},
+        ]
+
+    def _result(
+        self, problem: EvalProblem, raw_code: str, start: float, value: dict, sample: int = 0, samples: int = 1,
+    ) -> RunResult:
+        """RunResult for completion `sample` of `samples` drawn by one request. Each
+        sample reports the request's latency, plus its even share of it as
+        amortized_seconds; token usage is split so the samples add up to the request."""
         if problem.benchmark == "humaneval":
             extracted = extract_function_body(raw_code)
         else:
             extracted = extract_complete_function(raw_code)
 
+        # The cache stores the request's original latency; fall back to wall time
+        # for entries recorded before it did
+        duration = value.get("seconds", time.time() - start)
+        # The first sample also takes the remainder
+        usage = {
+            name: count // samples + (count % samples if sample == 0 else 0)
+            for name, count in (value.get("usage") or {}).items()
+        }
         return RunResult(
             task_id=problem.task_id,
             generated_code=raw_code,
             extracted_code=extracted,
             iterations=1,
+            duration_seconds=duration,
+            timings={"generator": duration},
+            prompt_tokens=usage.get("prompt_tokens", 0),
+            completion_tokens=usage.get("completion_tokens", 0),
+            amortized_seconds=duration / samples if samples > 1 else None,
+        )
+
+    def _error(self, problem: EvalProblem, e: Exception, start: float) -> RunResult:
+        return RunResult(
+            task_id=problem.task_id,
+            generated_code="",
+            extracted_code="",
+            iterations=1,
             duration_seconds=time.time() - start,
+            error=str(e),
         )
+
+    def run(self, problem: EvalProblem) -> RunResult:
+        start = time.time()
+        messages = self._messages(problem)
+
+        def call() -> dict:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                temperature=self.temperature,
+                messages=messages,
+            )
+            return {"content": response.choices[0].message.content or "", "usage": _usage(response)}
+
+        try:
+            value = self.cache.get_or_call(self._cache_key(messages), call)
+        except Exception as e:
+            return self._error(problem, e, start)
+        return self._result(problem, value["content"], start, value)
+
+    async def _complete(self, messages: list[dict], n: int) -> tuple[list[str], dict]:
+        """n completions in one request (OpenAI's n=), through the cache and rate
+        limiter, with the cache value (token usage and latency of the request)."""
+        # Rough prompt size (~4 chars per token) for the tokens-per-minute budget
+        estimate = sum(len(m["content"]) for m in messages) // 4 + _COMPLETION_ESTIMATE * n
+
+        async def call() -> dict:
+            response = await call_with_backoff(
+                lambda: self.async_client.chat.completions.create(
+                    model=self.model,
+                    temperature=self.temperature,
+                    messages=messages,
+                    **({"n": n} if n > 1 else {}),
+                ),
+                self.limiter,
+                tokens=estimate,
+            )
+            if response.usage:
+                self.limiter.adjust(response.usage.total_tokens - estimate)
+            contents = [choice.message.content or "" for choice in response.choices]
+            value = {"content": contents[0]} if n == 1 else {"contents": contents}
+            return {**value, "usage": _usage(response)}
+
+        key = self._cache_key(messages)
+        if n > 1:
+            key["n"] = n
+        value = await self.cache.aget_or_call(key, call)
+        return ([value["content"]] if n == 1 else value["contents"]), value
+
+    async def arun(self, problem: EvalProblem) -> RunResult:
+        return (await self.arun_samples(problem, 1))[0]
+
+    async def arun_samples(self, problem: EvalProblem, samples: int) -> list[RunResult]:
+        start = time.time()
+        try:
+            contents, value = await self._complete(self._messages(problem), samples)
+        except Exception as e:
+            return [self._error(problem, e, start)] * samples
+        return [self._result(problem, raw_code, start, value, i, samples) for i, raw_code in enumerate(contents)]
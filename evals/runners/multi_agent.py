@@ -1,18 +1,24 @@
+import asyncio
 import time
 
 from evals.datasets.base import EvalProblem
 from evals.runners.base import Runner, RunResult
 from evals.extraction.code_extractor import extract_function_body, extract_complete_function
-from agents.graph import agent_graph
+from agents.graph import get_agent_graph
+from agents.llm import CallStats, collect_stats, sampling, set_response_cache
+from evals.cache import LLMResponseCache
 
 
 class MultiAgentRunner(Runner):
     """Runs problems through the full LangGraph multi-agent pipeline."""
 
-    def run(self, problem: EvalProblem) -> RunResult:
-        start = time.time()
+    def __init__(self, cache: LLMResponseCache | None = None, temperature: float = 0.0):
+        # Agent nodes call their LLMs through agents.llm.invoke_llm, which consults this cache
+        set_response_cache(cache if cache is not None and cache.mode != "off" else None)
+        self.temperature = temperature
 
-        initial_state = {
+    def _initial_state(self, problem: EvalProblem) -> dict:
+        return {
             "user_prompt": problem.prompt_for_model,
             "project_id": "",
             "rag_context": "",
@@ -28,20 +34,8 @@ class MultiAgentRunner(Runner):
             "final_response": "",
         }
 
-        try:
-            result = agent_graph.invoke(initial_state)
-            raw_code = result.get("final_response", "")
-            iterations = result.get("iteration", 1)
-        except Exception as e:
-            return RunResult(
-                task_id=problem.task_id,
-                generated_code="",
-                extracted_code="",
-                iterations=0,
-                duration_seconds=time.time() - start,
-                error=str(e),
-            )
-
+    def _result(self, problem: EvalProblem, result: dict, start: float, stats: CallStats) -> RunResult:
+        raw_code = result.get("final_response", "")
         if problem.benchmark == "humaneval":
             extracted = extract_function_body(raw_code)
         else:
@@ -51,6 +45,51 @@ class MultiAgentRunner(Runner):
             task_id=problem.task_id,
             generated_code=raw_code,
             extracted_code=extracted,
-            iterations=iterations,
+            iterations=result.get("iteration", 1),
+            duration_seconds=time.time() - start + stats.replayed_seconds,
+            timings=stats.timings,
+            prompt_tokens=stats.prompt_tokens,
+            completion_tokens=stats.completion_tokens,
+        )
+
+    def _error(self, problem: EvalProblem, e: Exception, start: float) -> RunResult:
+        return RunResult(
+            task_id=problem.task_id,
+            generated_code="",
+            extracted_code="",
+            iterations=0,
             duration_seconds=time.time() - start,
+            error=str(e),
         )
+
+    def run(self, problem: EvalProblem) -> RunResult:
+        start = time.time()
+        try:
+            with sampling(self.temperature, 0), collect_stats() as stats:
+                result = get_agent_graph().invoke(self._initial_state(problem))
+        except Exception as e:
+            return self._error(problem, e, start)
+        return self._result(problem, result, start, stats)
+
+    async def _ainvoke(self, problem: EvalProblem) -> RunResult:
+        # The graph's nodes are sync; ainvoke runs each in a worker thread, so
+        # concurrent problems overlap their Ollama calls
+        start = time.time()
+        try:
+            with collect_stats() as stats:
+                result = await get_agent_graph().ainvoke(self._initial_state(problem))
+        except Exception as e:
+            return self._error(problem, e, start)
+        return self._result(problem, result, start, stats)
+
+    async def arun(self, problem: EvalProblem) -> RunResult:
+        with sampling(self.temperature, 0):
+            return await self._ainvoke(problem)
+
+    async def arun_samples(self, problem: EvalProblem, samples: int) -> list[RunResult]:
+        """One graph run per sample, concurrently, with every node at self.temperature."""
+        async def run_sample(sample: int) -> RunResult:
+            with sampling(self.temperature, sample):
+                return await self._ainvoke(problem)
+
+        return list(await asyncio.gather(*(run_sample(i) for i in range(samples))))
@@ -0,0 +1,92 @@
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute token buckets shared by concurrent runs.
+
+    0 disables a limit. Token counts are estimates up front; `adjust` charges
+    the difference once the real usage is known. `pause` blocks every caller,
+    e.g. after a 429.
+    """
+
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        self.rpm = requests_per_minute
+        self.tpm = tokens_per_minute
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def _wait_time(self, tokens: int) -> float:
+        wait = self._paused_until - time.monotonic()
+        if self.rpm and self._requests < 1:
+            wait = max(wait, (1 - self._requests) * 60 / self.rpm)
+        # A single request larger than the whole bucket only waits for a full bucket
+        needed = min(tokens, self.tpm)
+        if self.tpm and self._tokens < needed:
+            wait = max(wait, (needed - self._tokens) * 60 / self.tpm)
+        return wait
+
+    async def acquire(self, tokens: int = 0) -> None:
+        # Callers queue on the lock, so they are served in arrival order
+        async with self._lock:
+            while True:
+                self._refill()
+                wait = self._wait_time(tokens)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            if self.rpm:
+                self._requests -= 1
+            if self.tpm:
+                self._tokens -= tokens
+
+    def adjust(self, tokens: int) -> None:
+        if self.tpm:
+            self._tokens -= tokens
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+def _is_rate_limited(e: Exception) -> bool:
+    return getattr(e, "status_code", None) == 429
+
+
+def _retry_after(e: Exception) -> float | None:
+    response = getattr(e, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+async def call_with_backoff(
+    call: Callable[[], Awaitable[T]], limiter: RateLimiter, tokens: int = 0, max_retries: int = 6,
+) -> T:
+    """Run call() under the limiter, retrying 429s with exponential backoff and jitter
+    (or the server's Retry-After). The pause applies to all callers sharing the limiter."""
+    for attempt in range(max_retries + 1):
+        await limiter.acquire(tokens)
+        try:
+            return await call()
+        except Exception as e:
+            if not _is_rate_limited(e) or attempt == max_retries:
+                raise
+            delay = _retry_after(e) or min(60.0, 2.0 ** attempt) * random.uniform(0.5, 1.0)
+            limiter.pause(delay)
+    raise AssertionError("unreachable")
@@ -0,0 +1,77 @@
+"""
+Write benchmark datasets to local snapshots under evals/data/.
+
+Eval runs load a benchmark from its snapshot when one exists, so they start
+without importing the HF datasets stack or touching the network, and --tasks
+reads only the listed problems.
+
+Usage:
+    python -m evals.snapshot                      # all benchmarks
+    python -m evals.snapshot --benchmark mbpp
+    python -m evals.snapshot --verify             # check existing snapshots against their checksums
+"""
+import argparse
+import os
+import sys
+import time
+
+from evals.datasets.base import BenchmarkDataset
+from evals.datasets.humaneval import HumanEvalDataset
+from evals.datasets.mbpp import MBPPDataset
+from evals.datasets.snapshot import Snapshot, SnapshotError
+
+DATASETS: dict[str, type[BenchmarkDataset]] = {
+    "humaneval": HumanEvalDataset,
+    "mbpp": MBPPDataset,
+}
+
+SOURCES = {
+    "humaneval": "evals/data/HumanEval.jsonl.gz",
+    "mbpp": "huggingface:mbpp/sanitized/test",
+}
+
+
+def write_snapshot(name: str) -> Snapshot:
+    start = time.time()
+    rows = DATASETS[name]().source_rows()
+    snapshot = Snapshot(name)
+    index = snapshot.write(rows, source=SOURCES[name])
+    size = os.path.getsize(snapshot.data_path)
+    print(
+        f"{name}: {index['count']} tasks, {size / 1024:.0f} KB -> {snapshot.data_path} "
+        f"(sha256 {index['sha256'][:12]}, {time.time() - start:.1f}s)"
+    )
+    return snapshot
+
+
+def verify_snapshot(name: str) -> bool:
+    snapshot = Snapshot(name)
+    if not snapshot.exists:
+        print(f"{name}: no snapshot")
+        return False
+    try:
+        snapshot.verify()
+        snapshot.read()
+    except SnapshotError as e:
+        print(f"{name}: {e}")
+        return False
+    print(f"{name}: OK ({snapshot.index['count']} tasks, created {snapshot.index['created']})")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot eval benchmarks to evals/data/")
+    parser.add_argument("--benchmark", choices=[*DATASETS, "all"], default="all")
+    parser.add_argument("--verify", action="store_true", help="Check existing snapshots instead of writing them")
+    args = parser.parse_args()
+
+    names = list(DATASETS) if args.benchmark == "all" else [args.benchmark]
+    if args.verify:
+        ok = [verify_snapshot(name) for name in names]
+        sys.exit(0 if all(ok) else 1)
+    for name in names:
+        write_snapshot(name)
+
+
+if __name__ == "__main__":
+    main()
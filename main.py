@@ -1,7 +1,11 @@
+import asyncio
+import time
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 import config  # noqa: F401  — initialises logging on import
 
@@ -9,10 +13,93 @@ from api.chat import router as chat_router
 from api.embed import router as embed_router
 from api.embeddings import router as embeddings_router
 from api.terminal import router as terminal_router
+from agents.graph import get_agent_graph
+from rag.db import init_clients, close_clients
+from rag.embed import warm_up as warm_up_embeddings
+from rag.embeddings import get_embedding_pool, shutdown_embedding_pool
+from runner.jobs import job_manager, remove_stale_job_dirs
+from runner.process import remove_stale_run_dirs
+from runner.pyfork import get_forkserver, close_forkserver
 
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="AI IDE Backend", version="1.0.0")
+# Set by warm_up(); /ready reports it
+readiness: dict = {"ready": False, "components": {}}
+
+# Components chat cannot work without; the others (Ollama preload, forkserver,
+# embedding pool) only make first requests faster, so their failure degrades
+# the replica without keeping it out of rotation
+REQUIRED_COMPONENTS = ("embedding_model", "agent_graph")
+
+
+async def _preload_ollama():
+    """Ask Ollama to load the chat/router models into memory (empty generate request)."""
+    import httpx
+
+    async with httpx.AsyncClient(base_url=config.OLLAMA_BASE_URL, timeout=300) as client:
+        for model in sorted({config.CHAT_MODEL, config.ROUTER_MODEL}):
+            response = await client.post("/api/generate", json={"model": model, "keep_alive": config.OLLAMA_KEEP_ALIVE})
+            response.raise_for_status()
+
+
+async def _warm(name: str, coro):
+    start = time.time()
+    try:
+        await coro
+        readiness["components"][name] = "ok"
+        logger.info("Warm-up  %s ready (%.0fms)", name, (time.time() - start) * 1000)
+    except Exception as e:
+        readiness["components"][name] = f"error: {e}"
+        logger.warning("Warm-up  %s failed: %s", name, e)
+
+
+async def warm_up():
+    """Load everything the first chat would otherwise load lazily, then mark the app ready."""
+    start = time.time()
+    tasks = [
+        _warm("embedding_model", asyncio.to_thread(warm_up_embeddings)),
+        _warm("agent_graph", asyncio.to_thread(get_agent_graph)),
+        _warm("ollama", _preload_ollama()),
+    ]
+    if config.TERMINAL_PYFORK:
+        tasks.append(_warm("python_forkserver", get_forkserver().start()))
+    pool = get_embedding_pool()
+    if pool is not None:
+        tasks.append(_warm("embedding_pool", asyncio.to_thread(pool.warm_up)))
+    await asyncio.gather(*tasks)
+    failed = [name for name in REQUIRED_COMPONENTS if readiness["components"].get(name) != "ok"]
+    if failed:
+        logger.error("Warm-up failed, not ready  components=%s", ",".join(failed))
+        return
+    readiness["ready"] = True
+    logger.info("Warm-up done (%.0fms)", (time.time() - start) * 1000)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await init_clients()
+    removed = remove_stale_run_dirs()
+    if removed:
+        logger.info("Removed %d stale terminal run dirs", removed)
+    removed = remove_stale_job_dirs()
+    if removed:
+        logger.info("Removed %d stale terminal job dirs", removed)
+    warm_up_task = None
+    if config.WARMUP_ON_STARTUP:
+        # Runs in the background so /health answers while models load
+        warm_up_task = asyncio.create_task(warm_up())
+    else:
+        readiness["ready"] = True
+    yield
+    if warm_up_task and not warm_up_task.done():
+        warm_up_task.cancel()
+    shutdown_embedding_pool()
+    await job_manager.shutdown()
+    await close_forkserver()
+    await close_clients()
+
+
+app = FastAPI(title="AI IDE Backend", version="1.0.0", lifespan=lifespan)
 
 # CORS - allow the Next.js frontend
 app.add_middleware(
@@ -33,3 +120,10 @@ app.include_router(terminal_router)
 @app.get("/health")
 async def health():
     return {"status": "ok"}
+
+
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 503 until warm-up has finished."""
+    status_code = 200 if readiness["ready"] else 503
+    return JSONResponse(readiness, status_code=status_code)
@@ -0,0 +1,141 @@
+import re
+from dataclasses import dataclass, field
+
+from config import (
+    MATCH_COUNT, CONTEXT_TOKEN_BUDGET, CONTEXT_SCORE_GAP, CONTEXT_MMR_LAMBDA,
+)
+
+_HEADER_RE = re.compile(r"^// (?P<path>.*) \(lines (?P<start>\d+)-(?P<end>\d+)\)$")
+_TOKEN_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]+")
+
+SEPARATOR = "\n\n---\n\n"
+
+
+@dataclass
+class Segment:
+    """A contiguous line range of one file, built from one or more retrieved chunks."""
+    file_path: str
+    start: int  # 1-based, inclusive
+    lines: list[str]
+    score: float
+    tokens: set[str] = field(default_factory=set)
+
+    @property
+    def end(self) -> int:
+        return self.start + len(self.lines) - 1
+
+    def render(self) -> str:
+        return f"// {self.file_path} (lines {self.start}-{self.end})\n" + "\n".join(self.lines)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), good enough for budgeting."""
+    return len(text) // 4 + 1
+
+
+def _to_segment(match: dict) -> Segment:
+    """Recover the file line range from a chunk's header (see rag.embeddings.chunk_file)."""
+    header, _, body = match["content"].partition("\n")
+    parsed = _HEADER_RE.match(header)
+    start = int(parsed.group("start")) if parsed else 1
+    return Segment(match["file_path"], start, body.split("\n"), match.get("similarity", 0.0))
+
+
+def _in_open_file(segment: Segment, current_file_path: str, current_file_content: str) -> bool:
+    if current_file_path and segment.file_path == current_file_path:
+        return True
+    body = "\n".join(segment.lines).strip()
+    return bool(current_file_content and body and body in current_file_content)
+
+
+def cut_at_score_gap(segments: list[Segment], max_gap: float = CONTEXT_SCORE_GAP) -> list[Segment]:
+    """Keep the leading run of score-sorted segments up to the first drop larger than max_gap."""
+    ranked = sorted(segments, key=lambda s: s.score, reverse=True)
+    for i in range(1, len(ranked)):
+        if ranked[i - 1].score - ranked[i].score > max_gap:
+            return ranked[:i]
+    return ranked
+
+
+def merge_segments(segments: list[Segment]) -> list[Segment]:
+    """Merge overlapping or adjacent segments of the same file into one line range."""
+    by_file: dict[str, list[Segment]] = {}
+    for segment in segments:
+        by_file.setdefault(segment.file_path, []).append(segment)
+
+    merged = []
+    for file_segments in by_file.values():
+        file_segments.sort(key=lambda s: s.start)
+        current = file_segments[0]
+        for segment in file_segments[1:]:
+            if segment.start <= current.end + 1:
+                overlap = current.end - segment.start + 1
+                current = Segment(
+                    current.file_path,
+                    current.start,
+                    current.lines + segment.lines[max(overlap, 0):],
+                    max(current.score, segment.score),
+                )
+            else:
+                merged.append(current)
+                current = segment
+        merged.append(current)
+    return merged
+
+
+def _similarity(a: Segment, b: Segment) -> float:
+    """Lexical overlap (Jaccard over identifiers) used as the MMR redundancy term."""
+    if not a.tokens or not b.tokens:
+        return 0.0
+    return len(a.tokens & b.tokens) / len(a.tokens | b.tokens)
+
+
+def select_mmr(
+    segments: list[Segment],
+    token_budget: int = CONTEXT_TOKEN_BUDGET,
+    max_segments: int = MATCH_COUNT,
+    mmr_lambda: float = CONTEXT_MMR_LAMBDA,
+) -> list[Segment]:
+    """Greedy maximal marginal relevance selection under a token budget."""
+    for segment in segments:
+        segment.tokens = set(_TOKEN_RE.findall("\n".join(segment.lines)))
+
+    remaining = list(segments)
+    selected: list[Segment] = []
+    used = 0
+    while remaining and len(selected) < max_segments:
+        def mmr(s: Segment) -> float:
+            redundancy = max((_similarity(s, t) for t in selected), default=0.0)
+            return mmr_lambda * s.score - (1 - mmr_lambda) * redundancy
+
+        best = max(remaining, key=mmr)
+        remaining.remove(best)
+        cost = estimate_tokens(best.render())
+        if used + cost > token_budget:
+            continue
+        selected.append(best)
+        used += cost
+    return selected
+
+
+def assemble_context(
+    matches: list[dict],
+    current_file_path: str = "",
+    current_file_content: str = "",
+    token_budget: int = CONTEXT_TOKEN_BUDGET,
+) -> str:
+    """Turn raw match_code_chunks rows into a deduplicated, token-budgeted context string.
+
+    Drops chunks already visible in the open file, cuts at the first large
+    score gap, merges overlapping chunks of a file into contiguous ranges and
+    picks the final set with MMR so near-duplicate code does not crowd out
+    other relevant files.
+    """
+    segments = [_to_segment(m) for m in matches]
+    segments = [s for s in segments if not _in_open_file(s, current_file_path, current_file_content)]
+    if not segments:
+        return ""
+
+    segments = merge_segments(cut_at_score_gap(segments))
+    selected = select_mmr(segments, token_budget=token_budget)
+    return SEPARATOR.join(s.render() for s in selected)
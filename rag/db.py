@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import threading
+from typing import TYPE_CHECKING
+
+from config import (
+    SUPABASE_URL, SUPABASE_KEY,
+    SUPABASE_POOL_SIZE, SUPABASE_KEEPALIVE_EXPIRY, SUPABASE_TIMEOUT,
+)
+
+# supabase/httpx are imported inside the functions below to keep app and CLI startup fast
+if TYPE_CHECKING:
+    import httpx
+    from supabase import AsyncClient, Client
+
+logger = logging.getLogger(__name__)
+
+_client: "Client | None" = None
+_async_client: "AsyncClient | None" = None
+_lock = threading.Lock()
+# Concurrent first callers of get_async_client would otherwise each build a
+# client (and connection pool), leaking all but one
+_async_lock = asyncio.Lock()
+
+
+def _pool_limits() -> "httpx.Limits":
+    import httpx
+
+    return httpx.Limits(
+        max_connections=SUPABASE_POOL_SIZE,
+        max_keepalive_connections=SUPABASE_POOL_SIZE,
+        keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY,
+    )
+
+
+def _pooled_session(session: "httpx.Client | httpx.AsyncClient", cls: type):
+    """Rebuild a PostgREST HTTP session with our pool limits, keeping its URL, headers and timeout."""
+    return cls(
+        base_url=session.base_url,
+        headers=session.headers,
+        timeout=session.timeout,
+        limits=_pool_limits(),
+        follow_redirects=True,
+        http2=True,
+    )
+
+
+def get_client() -> "Client":
+    """Shared Supabase client. Created on app startup, or on first use outside the app (evals, scripts)."""
+    global _client
+    if _client is None:
+        from postgrest.utils import SyncClient
+        from supabase import ClientOptions, create_client
+
+        with _lock:
+            if _client is None:
+                client = create_client(SUPABASE_URL, SUPABASE_KEY,
+                                       options=ClientOptions(postgrest_client_timeout=SUPABASE_TIMEOUT))
+                default_session = client.postgrest.session
+                client.postgrest.session = _pooled_session(default_session, SyncClient)
+                default_session.close()
+                _client = client
+    return _client
+
+
+async def get_async_client() -> "AsyncClient":
+    """Shared async Supabase client for use from async handlers and nodes."""
+    global _async_client
+    if _async_client is None:
+        import httpx
+        from supabase import AsyncClientOptions, acreate_client
+
+        async with _async_lock:
+            if _async_client is None:
+                client = await acreate_client(SUPABASE_URL, SUPABASE_KEY,
+                                              options=AsyncClientOptions(postgrest_client_timeout=SUPABASE_TIMEOUT))
+                default_session = client.postgrest.session
+                client.postgrest.session = _pooled_session(default_session, httpx.AsyncClient)
+                await default_session.aclose()
+                _async_client = client
+    return _async_client
+
+
+async def init_clients() -> None:
+    """Create both clients up front so the first request doesn't pay for it."""
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        logger.warning("SUPABASE_URL/SUPABASE_KEY not set, Supabase clients not initialised")
+        return
+    get_client()
+    await get_async_client()
+    logger.info("Supabase clients ready  pool_size=%d", SUPABASE_POOL_SIZE)
+
+
+async def close_clients() -> None:
+    """Close pooled connections. Called on app shutdown."""
+    global _client, _async_client
+    if _client is not None:
+        _client.postgrest.aclose()
+        _client = None
+    if _async_client is not None:
+        await _async_client.postgrest.aclose()
+        _async_client = None
@@ -1,25 +1,127 @@
-from sentence_transformers import SentenceTransformer
+import os
+import logging
+import threading
+from typing import TYPE_CHECKING
 
-from config import EMBEDDING_MODEL
+from config import (
+    EMBEDDING_MODEL, EMBEDDING_BACKEND, EMBEDDING_THREADS,
+    EMBEDDING_ONNX_DIR, EMBEDDING_ONNX_QUANTIZATION,
+    QUERY_EMBEDDING_CACHE_SIZE, QUERY_EMBEDDING_CACHE_TTL,
+)
+from rag.cache import TTLCache, normalize_query
 
-_model: SentenceTransformer | None = None
+if TYPE_CHECKING:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
 
+logger = logging.getLogger(__name__)
 
-def _get_model() -> SentenceTransformer:
+BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+_model: "SentenceTransformer | None" = None
+# Warm-up and request threads can ask for the model at the same time
+_model_lock = threading.Lock()
+
+# Query embeddings keyed on normalized query text
+query_embedding_cache = TTLCache(QUERY_EMBEDDING_CACHE_SIZE, QUERY_EMBEDDING_CACHE_TTL)
+
+
+def _onnx_model_kwargs(threads: int) -> dict:
+    """ONNX Runtime session settings, pinned to CPU and the configured thread count."""
+    kwargs: dict = {"provider": "CPUExecutionProvider"}
+    if threads > 0:
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        kwargs["session_options"] = options
+    return kwargs
+
+
+def _load_onnx_int8(model_name: str, threads: int) -> "SentenceTransformer":
+    """Load a dynamically int8-quantized ONNX export, creating it on first use."""
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    local_dir = os.path.join(EMBEDDING_ONNX_DIR, model_name.replace("/", "__"))
+    file_name = f"onnx/model_qint8_{EMBEDDING_ONNX_QUANTIZATION}.onnx"
+
+    if not os.path.exists(os.path.join(local_dir, file_name)):
+        logger.info("Exporting int8 ONNX model  model=%s  dir=%s", model_name, local_dir)
+        fp32 = SentenceTransformer(model_name, device="cpu", backend="onnx",
+                                   model_kwargs={"provider": "CPUExecutionProvider"})
+        fp32.save(local_dir)
+        export_dynamic_quantized_onnx_model(fp32, EMBEDDING_ONNX_QUANTIZATION, local_dir)
+
+    model_kwargs = _onnx_model_kwargs(threads)
+    model_kwargs["file_name"] = file_name
+    return SentenceTransformer(local_dir, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+
+
+def load_model(
+    backend: str = EMBEDDING_BACKEND,
+    model_name: str = EMBEDDING_MODEL,
+    threads: int = EMBEDDING_THREADS,
+) -> "SentenceTransformer":
+    """Load the embedding model for the given inference backend (see config.EMBEDDING_BACKEND)."""
+    # Imported here: sentence-transformers pulls in torch, which dominates startup time
+    from sentence_transformers import SentenceTransformer
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {', '.join(BACKENDS)}")
+
+    if threads > 0:
+        import torch
+
+        torch.set_num_threads(threads)
+
+    if backend == "onnx":
+        return SentenceTransformer(model_name, device="cpu", backend="onnx",
+                                   model_kwargs=_onnx_model_kwargs(threads))
+    if backend == "onnx-int8":
+        return _load_onnx_int8(model_name, threads)
+
+    model = SentenceTransformer(model_name, device="cpu")
+    if backend == "torch-int8":
+        import torch
+
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+
+def _get_model() -> "SentenceTransformer":
     global _model
     if _model is None:
-        _model = SentenceTransformer(EMBEDDING_MODEL)
+        with _model_lock:
+            if _model is None:
+                logger.info("Loading embedding model  model=%s  backend=%s", EMBEDDING_MODEL, EMBEDDING_BACKEND)
+                _model = load_model()
     return _model
 
 
-def embed_texts(texts: list[str], prefix: str = "passage: ") -> list[list[float]]:
-    """Embed a list of texts. Use prefix='query: ' for search queries."""
+def warm_up() -> None:
+    """Load the model and run one encode so the first request doesn't pay for it."""
+    _get_model().encode(["query: warm-up"], normalize_embeddings=True)
+
+
+def embed_array(texts: list[str], prefix: str = "passage: ") -> "np.ndarray":
+    """Embed a list of texts into an (n, dim) float32 array. Use prefix='query: ' for search queries."""
     model = _get_model()
     prefixed = [f"{prefix}{t}" for t in texts]
-    embeddings = model.encode(prefixed, normalize_embeddings=True)
-    return embeddings.tolist()
+    return model.encode(prefixed, normalize_embeddings=True)
+
+
+def embed_texts(texts: list[str], prefix: str = "passage: ") -> list[list[float]]:
+    """Embed a list of texts. Use prefix='query: ' for search queries."""
+    return embed_array(texts, prefix=prefix).tolist()
 
 
 def embed_query(text: str) -> list[float]:
-    """Embed a single search query."""
-    return embed_texts([text], prefix="query: ")[0]
+    """Embed a single search query, reusing cached embeddings of repeated queries."""
+    key = normalize_query(text)
+    embedding = query_embedding_cache.get(key)
+    if embedding is None:
+        # Normalization only widens cache hits; the model sees the query as written
+        embedding = embed_texts([text], prefix="query: ")[0]
+        query_embedding_cache.set(key, embedding)
+    return embedding
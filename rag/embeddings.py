@@ -1,11 +1,27 @@
-from supabase import create_client
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 from config import (
-    SUPABASE_URL, SUPABASE_KEY,
     CHUNK_SIZE, CHUNK_OVERLAP,
-    EMBEDDING_BATCH_SIZE, INSERT_BATCH_SIZE,
+    EMBEDDING_BATCH_SIZE, EMBEDDING_WORKERS, EMBEDDING_WORKER_THREADS,
+    INSERT_BATCH_SIZE, INSERT_BATCH_BYTES,
+    INSERT_CONCURRENCY, INSERT_MAX_RETRIES, INSERT_RETRY_BASE_DELAY,
+    PROJECT_IGNORE_CACHE_SIZE, PROJECT_IGNORE_CACHE_TTL,
 )
+from rag.cache import TTLCache
+from rag.db import get_async_client
 from rag.embed import embed_texts
+from rag.file_filter import IGNORE_FILES, FilePolicy, FilterReport, default_policy
+from rag.quantization import storage_row
+from rag.retriever import invalidate_project
+
+logger = logging.getLogger(__name__)
 
 
 def chunk_file(file_path: str, content: str) -> list[dict]:
@@ -45,43 +61,326 @@ def chunk_project(file_contents: dict[str, str]) -> list[dict]:
     return all_chunks
 
 
-async def index_project(project_id: str) -> int:
-    """Index a project's files into vector embeddings. Returns chunk count."""
-    supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Model held by each EmbeddingPool worker process
+_worker_model = None
+
+
+def _init_worker(threads: int) -> None:
+    global _worker_model
+    from rag.embed import load_model
+
+    _worker_model = load_model(threads=threads)
+
+
+def _encode_in_worker(texts: list[str], prefix: str):
+    return _worker_model.encode([f"{prefix}{t}" for t in texts], normalize_embeddings=True)
+
+
+class EmbeddingPool:
+    """Worker processes that each load the embedding model once, with pinned thread counts.
+
+    Spreads batches across processes instead of relying on PyTorch intra-op
+    threading, which scales poorly at indexing batch sizes.
+    """
+
+    def __init__(self, workers: int, threads: int = 0):
+        self.workers = workers
+        self.threads = threads or max(1, (os.cpu_count() or 1) // workers)
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.threads,),
+        )
+
+    def warm_up(self) -> None:
+        """Start every worker and load its model."""
+        list(self._executor.map(_encode_in_worker, [["warm-up"]] * self.workers, ["passage: "] * self.workers))
+
+    async def encode(self, batches: list[list[str]], prefix: str = "passage: ") -> list[list[list[float]]]:
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(*(
+            loop.run_in_executor(self._executor, _encode_in_worker, batch, prefix) for batch in batches
+        ))
+        return [r.tolist() for r in results]
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(cancel_futures=True)
+
+
+_pool: EmbeddingPool | None = None
+
+
+def get_embedding_pool() -> EmbeddingPool | None:
+    """Shared indexing pool, or None when EMBEDDING_WORKERS <= 1."""
+    global _pool
+    if _pool is None and EMBEDDING_WORKERS > 1:
+        _pool = EmbeddingPool(EMBEDDING_WORKERS, EMBEDDING_WORKER_THREADS)
+        logger.info("Embedding pool started  workers=%d  threads=%d", _pool.workers, _pool.threads)
+    return _pool
+
+
+def shutdown_embedding_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+
+
+def length_buckets(texts: list[str], batch_size: int) -> list[list[int]]:
+    """Indices grouped into batches of similar length, longest first.
+
+    Similar lengths in a batch cut padding; longest-first lets a pool start
+    the slowest batches early.
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+async def embed_passages(
+    texts: list[str],
+    pool: EmbeddingPool | None = None,
+    batch_size: int = EMBEDDING_BATCH_SIZE,
+) -> list[list[float]]:
+    """Embed chunk texts for indexing, in length buckets, on the pool if one is given.
+
+    Without a pool, batches are encoded one at a time in a worker thread so the
+    event loop stays responsive. Results are returned in input order.
+    """
+    buckets = length_buckets(texts, batch_size)
+    batches = [[texts[i] for i in bucket] for bucket in buckets]
+
+    if pool is not None:
+        results = await pool.encode(batches)
+    else:
+        results = [await asyncio.to_thread(embed_texts, batch) for batch in batches]
+
+    embeddings: list[list[float]] = [[] for _ in texts]
+    for bucket, batch_embeddings in zip(buckets, results):
+        for i, embedding in zip(bucket, batch_embeddings):
+            embeddings[i] = embedding
+    return embeddings
+
+
+def batch_rows(rows: list[dict], max_rows: int, max_bytes: int) -> list[list[dict]]:
+    """Group rows into insert batches bounded by row count and JSON payload size."""
+    batches: list[list[dict]] = []
+    batch: list[dict] = []
+    batch_bytes = 0
+    for row in rows:
+        row_bytes = len(json.dumps(row))
+        if batch and (len(batch) >= max_rows or batch_bytes + row_bytes > max_bytes):
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+        batch.append(row)
+        batch_bytes += row_bytes
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+# Unique key from supabase/migrations/20260415000000_ann_indexes.sql
+CHUNK_KEY = "project_id,index_version,file_path,chunk_index"
 
-    result = supabase.table("projects").select("file_contents").eq("id", project_id).single().execute()
+
+async def _insert_with_retry(supabase, batch: list[dict]) -> None:
+    """Insert one batch, retrying with exponential backoff and jitter.
+
+    Rows go in as an upsert on the chunk key that skips rows already there, so
+    retrying a batch whose commit went through but whose response was lost
+    neither duplicates chunks nor fails on the key.
+    """
+    for attempt in range(INSERT_MAX_RETRIES + 1):
+        try:
+            await supabase.table("code_chunks").upsert(
+                batch, on_conflict=CHUNK_KEY, ignore_duplicates=True, returning="minimal",
+            ).execute()
+            return
+        except Exception as e:
+            if attempt == INSERT_MAX_RETRIES:
+                raise
+            delay = INSERT_RETRY_BASE_DELAY * 2 ** attempt * (1 + random.random())
+            logger.warning("Insert of %d rows failed (%s), retrying in %.1fs", len(batch), e, delay)
+            await asyncio.sleep(delay)
+
+
+async def insert_rows(supabase, rows: list[dict]) -> int:
+    """Insert rows in size-bounded batches with bounded parallelism. Returns the batch count."""
+    batches = batch_rows(rows, INSERT_BATCH_SIZE, INSERT_BATCH_BYTES)
+    semaphore = asyncio.Semaphore(INSERT_CONCURRENCY)
+
+    async def insert(batch: list[dict]):
+        async with semaphore:
+            await _insert_with_retry(supabase, batch)
+
+    await asyncio.gather(*(insert(batch) for batch in batches))
+    return len(batches)
+
+
+# Per-file saves (index_files) made while index_project builds a new version
+# of a project, one {path: entry} dict per running build. They land in the
+# version active at the time, which the build replaces, so each build replays
+# its saves once its version is active.
+_build_saves: dict[str, list[dict[str, dict]]] = {}
+
+
+async def index_project(project_id: str) -> tuple[int, FilterReport]:
+    """Index a project's files into vector embeddings.
+
+    Returns the chunk count and a report of the files the indexing policy
+    skipped (rag/file_filter.py).
+
+    Chunks are written under a new index version that only becomes visible to
+    the match RPCs once every row is in, then older versions are deleted.
+    """
+    saves: dict[str, dict] = {}
+    _build_saves.setdefault(project_id, []).append(saves)
+    try:
+        return await _build_index(project_id, saves)
+    finally:
+        _build_saves[project_id].remove(saves)
+        if not _build_saves[project_id]:
+            del _build_saves[project_id]
+
+
+async def _build_index(project_id: str, saves: dict[str, dict]) -> tuple[int, FilterReport]:
+    supabase = await get_async_client()
+
+    result = await supabase.table("projects").select("file_contents").eq("id", project_id).single().execute()
     if not result.data:
         raise ValueError("Project not found")
 
     file_contents: dict[str, str] = result.data.get("file_contents", {})
+    _project_ignores.set(project_id, _ignore_files(file_contents))
+    file_contents, report = default_policy.with_project_ignores(file_contents).filter(file_contents)
+    if report.files_skipped:
+        logger.info("Files skipped  project=%s  files=%d  bytes=%d  reasons=%s", project_id,
+                    report.files_skipped, report.bytes_skipped,
+                    {reason: len(paths) for reason, paths in report.skipped.items()})
     chunks = chunk_project(file_contents)
 
     if not chunks:
-        return 0
+        return 0, report
 
-    # Generate embeddings in batches
-    embeddings: list[list[float]] = []
-    for i in range(0, len(chunks), EMBEDDING_BATCH_SIZE):
-        batch = chunks[i:i + EMBEDDING_BATCH_SIZE]
-        batch_embeddings = embed_texts([c["content"] for c in batch])
-        embeddings.extend(batch_embeddings)
+    embeddings = await embed_passages([c["content"] for c in chunks], pool=get_embedding_pool())
 
-    # Delete old chunks and insert new ones
-    supabase.table("code_chunks").delete().eq("project_id", project_id).execute()
+    # Microsecond timestamps keep versions increasing across workers and restarts
+    version = time.time_ns() // 1000
 
     rows = [
         {
             "project_id": project_id,
+            "index_version": version,
             "file_path": chunk["file_path"],
             "chunk_index": chunk["chunk_index"],
             "content": chunk["content"],
-            "embedding": embeddings[i],
+            **storage_row(embeddings[i]),
         }
         for i, chunk in enumerate(chunks)
     ]
 
-    for i in range(0, len(rows), INSERT_BATCH_SIZE):
-        batch = rows[i:i + INSERT_BATCH_SIZE]
-        supabase.table("code_chunks").insert(batch).execute()
+    try:
+        batch_count = await insert_rows(supabase, rows)
+    except Exception:
+        # Leave the active version untouched and drop the partial one
+        await supabase.table("code_chunks").delete().eq("project_id", project_id).eq("index_version", version).execute()
+        raise
+
+    activated = await supabase.rpc("activate_index_version", {
+        "p_project_id": project_id,
+        "p_version": version,
+    }).execute()
+    active_version = activated.data
+    logger.info("Index version active  project=%s  version=%s  batches=%d", project_id, active_version, batch_count)
+
+    if saves:
+        logger.info("Replaying saves made during the build  project=%s  files=%d", project_id, len(saves))
+        try:
+            await index_files(project_id, list(saves.values()))
+        except Exception:
+            logger.warning("Failed to replay saves  project=%s  paths=%s", project_id, list(saves), exc_info=True)
+
+    # Garbage-collect everything older than the active version
+    try:
+        await supabase.table("code_chunks").delete().eq("project_id", project_id).lt("index_version", active_version).execute()
+    except Exception:
+        logger.warning("Failed to delete old index versions  project=%s", project_id, exc_info=True)
+
+    invalidate_project(project_id)
+    return len(chunks), report
+
+
+# The ignore files of projects, keyed on project_id, so per-file re-indexing
+# applies the same rules as index_project without loading every file
+_project_ignores = TTLCache(PROJECT_IGNORE_CACHE_SIZE, PROJECT_IGNORE_CACHE_TTL)
+
+
+def _ignore_files(file_contents: dict[str, str]) -> dict[str, str]:
+    return {name: file_contents.get(name) or "" for name in IGNORE_FILES}
+
+
+async def _project_policy(supabase, project_id: str, files: list[dict]) -> FilePolicy:
+    """default_policy extended with the project's .gitignore/.aiignore, taking
+    ignore files saved in this same request into account."""
+    ignores = _project_ignores.get(project_id)
+    if ignores is None:
+        result = await supabase.table("projects").select("file_contents").eq("id", project_id).single().execute()
+        ignores = _ignore_files((result.data or {}).get("file_contents") or {})
+        _project_ignores.set(project_id, ignores)
+    saved = {f["path"]: "" if f.get("deleted") else f.get("content") or "" for f in files if f["path"] in IGNORE_FILES}
+    if saved:
+        ignores = {**ignores, **saved}
+        _project_ignores.set(project_id, ignores)
+    return default_policy.with_project_ignores(ignores)
+
+
+async def index_files(project_id: str, files: list[dict]) -> dict[str, int]:
+    """Re-index individual files in the project's active index version.
+
+    Each entry is {"path", "content"} or {"path", "deleted": True}. A file's
+    old chunks are replaced in one transaction (replace_file_chunks RPC).
+    Files the indexing policy skips, including the project's .gitignore and
+    .aiignore rules, are treated like deletions, so a file that grew past the
+    size limit or became ignored doesn't keep stale chunks. Returns the number of
+    chunks written per path (0 for deletions and skipped files).
+
+    During a full index_project of the same project the files are also
+    recorded, and re-indexed into the new version once it is active.
+    """
+    for saves in _build_saves.get(project_id, []):
+        saves.update((f["path"], f) for f in files)
+    supabase = await get_async_client()
+    policy = await _project_policy(supabase, project_id, files)
+
+    chunks_by_path = {}
+    for f in files:
+        content = f.get("content") or ""
+        reason = None if f.get("deleted") else policy.skip_reason(f["path"], content)
+        if reason:
+            logger.info("File skipped  project=%s  path=%s  reason=%s", project_id, f["path"], reason)
+        skip = f.get("deleted") or reason
+        chunks_by_path[f["path"]] = [] if skip else chunk_file(f["path"], content)
+    all_chunks = [c for chunks in chunks_by_path.values() for c in chunks]
+    embeddings = await embed_passages([c["content"] for c in all_chunks], pool=get_embedding_pool())
+    for chunk, embedding in zip(all_chunks, embeddings):
+        chunk["embedding"] = embedding
+
+    counts = {}
+    for path, chunks in chunks_by_path.items():
+        rows = [
+            {
+                "chunk_index": c["chunk_index"],
+                "content": c["content"],
+                **storage_row(c["embedding"]),
+            }
+            for c in chunks
+        ]
+        result = await supabase.rpc("replace_file_chunks", {
+            "p_project_id": project_id,
+            "p_file_path": path,
+            "p_rows": rows,
+        }).execute()
+        counts[path] = result.data or 0
 
-    return len(chunks)
+    invalidate_project(project_id)
+    return counts
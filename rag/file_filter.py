@@ -0,0 +1,179 @@
+import os
+import re
+from dataclasses import dataclass, field
+
+from config import (
+    INDEX_IGNORE_PATTERNS, INDEX_MAX_FILE_BYTES, INDEX_ALLOWED_EXTENSIONS,
+)
+
+# Project-level ignore files read from file_contents, in addition to INDEX_IGNORE_PATTERNS
+IGNORE_FILES = (".gitignore", ".aiignore")
+
+_GENERATED_MARKERS = ("@generated", "do not edit", "auto-generated", "autogenerated", "code generated by")
+
+
+def _translate(pattern: str) -> str:
+    """Translate a gitignore glob (without leading ! or trailing /) into a regex body."""
+    i, out = 0, []
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i):
+            out.append("(?:/.*)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(out)
+
+
+@dataclass
+class IgnoreRule:
+    regex: re.Pattern
+    negate: bool
+
+
+def compile_ignore(patterns: list[str]) -> list[IgnoreRule]:
+    """Compile gitignore-style patterns (comments, !negation, dir/ and anchored /paths)."""
+    rules = []
+    for raw in patterns:
+        pattern = raw.strip()
+        if not pattern or pattern.startswith("#"):
+            continue
+        negate = pattern.startswith("!")
+        pattern = pattern.lstrip("!")
+        dir_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        anchored = "/" in pattern
+        body = _translate(pattern.lstrip("/"))
+        prefix = "^" if anchored else "^(?:.*/)?"
+        # A matching directory ignores everything below it; dir/ patterns only match directories
+        suffix = "/.*$" if dir_only else "(?:/.*)?$"
+        rules.append(IgnoreRule(re.compile(prefix + body + suffix), negate))
+    return rules
+
+
+def is_ignored(path: str, rules: list[IgnoreRule]) -> bool:
+    """Gitignore semantics: the last matching rule wins."""
+    path = path.removeprefix("./").lstrip("/")
+    ignored = False
+    for rule in rules:
+        if rule.regex.match(path):
+            ignored = not rule.negate
+    return ignored
+
+
+def looks_binary(content: str) -> bool:
+    sample = content[:8192]
+    if "\x00" in sample:
+        return True
+    control = sum(1 for ch in sample if ord(ch) < 32 and ch not in "\n\r\t\f\b")
+    return bool(sample) and control / len(sample) > 0.1
+
+
+def looks_minified(content: str) -> bool:
+    """Bundles and minified assets: very long lines and few of them."""
+    if len(content) < 2000:
+        return False
+    lines = content.count("\n") + 1
+    longest = max(len(line) for line in content.split("\n"))
+    return longest > 1000 and len(content) / lines > 300
+
+
+def looks_generated(content: str) -> bool:
+    head = "\n".join(content.split("\n", 5)[:5]).lower()
+    return any(marker in head for marker in _GENERATED_MARKERS)
+
+
+@dataclass
+class FilterReport:
+    """What an indexing run left out and why."""
+    files_kept: int = 0
+    bytes_kept: int = 0
+    skipped: dict[str, list[str]] = field(default_factory=dict)
+    bytes_skipped: int = 0
+
+    def skip(self, path: str, reason: str, size: int) -> None:
+        self.skipped.setdefault(reason, []).append(path)
+        self.bytes_skipped += size
+
+    @property
+    def files_skipped(self) -> int:
+        return sum(len(paths) for paths in self.skipped.values())
+
+    def as_dict(self) -> dict:
+        return {
+            "filesKept": self.files_kept,
+            "bytesKept": self.bytes_kept,
+            "filesSkipped": self.files_skipped,
+            "bytesSkipped": self.bytes_skipped,
+            "skipped": {reason: sorted(paths) for reason, paths in self.skipped.items()},
+        }
+
+
+class FilePolicy:
+    """Decides which project files are worth embedding."""
+
+    def __init__(
+        self,
+        patterns: list[str] = INDEX_IGNORE_PATTERNS,
+        max_file_bytes: int = INDEX_MAX_FILE_BYTES,
+        allowed_extensions: list[str] = INDEX_ALLOWED_EXTENSIONS,
+    ):
+        self.rules = compile_ignore(patterns)
+        self.max_file_bytes = max_file_bytes
+        self.allowed_extensions = {"." + e.lower().lstrip(".") for e in allowed_extensions}
+
+    def with_project_ignores(self, file_contents: dict[str, str]) -> "FilePolicy":
+        """Copy of this policy extended with the project's own .gitignore/.aiignore (root only)."""
+        patterns = [line for name in IGNORE_FILES for line in (file_contents.get(name) or "").split("\n")]
+        policy = FilePolicy.__new__(FilePolicy)
+        policy.rules = self.rules + compile_ignore(patterns)
+        policy.max_file_bytes = self.max_file_bytes
+        policy.allowed_extensions = self.allowed_extensions
+        return policy
+
+    def skip_reason(self, path: str, content: str) -> str | None:
+        """Why a file should not be indexed, or None to index it."""
+        if is_ignored(path, self.rules):
+            return "ignored"
+        extension = os.path.splitext(path)[1].lower()
+        if self.allowed_extensions and extension not in self.allowed_extensions:
+            return "extension"
+        if len(content.encode("utf-8", errors="replace")) > self.max_file_bytes:
+            return "too_large"
+        if looks_binary(content):
+            return "binary"
+        if looks_minified(content):
+            return "minified"
+        if looks_generated(content):
+            return "generated"
+        return None
+
+    def filter(self, file_contents: dict[str, str]) -> tuple[dict[str, str], FilterReport]:
+        report = FilterReport()
+        kept = {}
+        for path, content in file_contents.items():
+            content = content or ""
+            size = len(content.encode("utf-8", errors="replace"))
+            reason = self.skip_reason(path, content)
+            if reason:
+                report.skip(path, reason, size)
+            else:
+                kept[path] = content
+                report.files_kept += 1
+                report.bytes_kept += size
+        return kept, report
+
+
+default_policy = FilePolicy()
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable
+
+from config import FILE_INDEX_DEBOUNCE, FILE_INDEX_MAX_DELAY
+
+logger = logging.getLogger(__name__)
+
+IndexFn = Callable[[str, list[dict]], Awaitable[dict[str, int]]]
+
+
+class FileIndexQueue:
+    """Debounces per-file re-index requests coming from editor saves.
+
+    Repeated saves of the same (project, path) within `delay` seconds collapse
+    into one re-index of the latest content. A file that keeps being saved is
+    still flushed `max_delay` seconds after its first pending save. Runs for
+    the same file are serialized so an older save can never overwrite a newer one.
+    """
+
+    def __init__(self, index_fn: IndexFn, delay: float = FILE_INDEX_DEBOUNCE, max_delay: float = FILE_INDEX_MAX_DELAY):
+        self.index_fn = index_fn
+        self.delay = delay
+        self.max_delay = max_delay
+        self._pending: dict[tuple[str, str], dict] = {}
+        self._first_seen: dict[tuple[str, str], float] = {}
+        self._waiters: dict[tuple[str, str], list[asyncio.Future]] = {}
+        self._timers: dict[tuple[str, str], asyncio.TimerHandle] = {}
+        # Held while a key's entry is indexed; dropped when no run holds or awaits it
+        self._locks: dict[tuple[str, str], asyncio.Lock] = {}
+        self._lock_users: dict[tuple[str, str], int] = {}
+
+    def submit(self, project_id: str, entry: dict) -> asyncio.Future:
+        """Queue a file entry. The returned future resolves to its chunk count once indexed."""
+        loop = asyncio.get_running_loop()
+        key = (project_id, entry["path"])
+
+        self._pending[key] = entry
+        now = time.monotonic()
+        first_seen = self._first_seen.setdefault(key, now)
+
+        timer = self._timers.pop(key, None)
+        if timer:
+            timer.cancel()
+        wait = max(0.0, min(self.delay, first_seen + self.max_delay - now))
+        self._timers[key] = loop.call_later(wait, self._flush, key)
+
+        future = loop.create_future()
+        # Failures are logged in _run; mark them retrieved for callers that don't wait
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._waiters.setdefault(key, []).append(future)
+        return future
+
+    def _flush(self, key: tuple[str, str]) -> None:
+        self._timers.pop(key, None)
+        self._first_seen.pop(key, None)
+        entry = self._pending.pop(key)
+        waiters = self._waiters.pop(key, [])
+        asyncio.get_running_loop().create_task(self._run(key, entry, waiters))
+
+    async def _run(self, key: tuple[str, str], entry: dict, waiters: list[asyncio.Future]) -> None:
+        project_id, path = key
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        self._lock_users[key] = self._lock_users.get(key, 0) + 1
+        try:
+            async with lock:
+                start = time.time()
+                try:
+                    counts = await self.index_fn(project_id, [entry])
+                except Exception as e:
+                    logger.exception("File re-index failed  project=%s  path=%s", project_id, path)
+                    for future in waiters:
+                        if not future.done():
+                            future.set_exception(e)
+                    return
+        finally:
+            self._lock_users[key] -= 1
+            if not self._lock_users[key]:
+                del self._lock_users[key]
+                del self._locks[key]
+
+        logger.info("File re-indexed  project=%s  path=%s  chunks=%d  saves=%d  duration=%.0fms",
+                    project_id, path, counts.get(path, 0), len(waiters), (time.time() - start) * 1000)
+        for future in waiters:
+            if not future.done():
+                future.set_result(counts.get(path, 0))
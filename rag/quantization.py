@@ -0,0 +1,125 @@
+import numpy as np
+
+from config import EMBEDDING_STORAGE, RESCORE_MULTIPLIER, HNSW_EF_SEARCH
+
+STORAGE_MODES = ("float32", "float16", "binary")
+
+# Supabase RPC used for each storage mode (see supabase/migrations)
+MATCH_RPCS = {
+    "float32": "match_code_chunks",
+    "float16": "match_code_chunks_half",
+    "binary": "match_code_chunks_binary",
+}
+
+# Number of set bits for every byte value, used for hamming distances
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint16)
+
+
+def to_float16(embeddings) -> np.ndarray:
+    return np.asarray(embeddings, dtype=np.float16)
+
+
+def to_binary(embeddings) -> np.ndarray:
+    """Sign-bit quantization: one bit per dimension (x > 0), packed 8 per byte."""
+    return np.packbits(np.asarray(embeddings) > 0, axis=-1)
+
+
+def hamming_distances(query_bits: np.ndarray, bits: np.ndarray) -> np.ndarray:
+    """Hamming distance from one packed query to every packed row."""
+    return _POPCOUNT[np.bitwise_xor(bits, query_bits)].sum(axis=1)
+
+
+def storage_row(embedding: list[float], storage: str = EMBEDDING_STORAGE) -> dict:
+    """Embedding column(s) to write on a code_chunks row for the storage mode.
+
+    In "binary" mode the sign bits are a generated column derived from
+    embedding_half, so only the halfvec is sent.
+    """
+    if storage == "float32":
+        return {"embedding": embedding}
+    return {"embedding_half": embedding}
+
+
+def match_rpc(
+    query_embedding: list[float],
+    project_id: str,
+    match_threshold: float,
+    match_count: int,
+    storage: str = EMBEDDING_STORAGE,
+) -> tuple[str, dict]:
+    """RPC name and params for a similarity search under the storage mode."""
+    if storage not in STORAGE_MODES:
+        raise ValueError(f"Unknown embedding storage {storage!r}, expected one of {', '.join(STORAGE_MODES)}")
+    params = {
+        "query_embedding": query_embedding,
+        "match_project_id": project_id,
+        "match_threshold": match_threshold,
+        "match_count": match_count,
+        "ef_search": HNSW_EF_SEARCH,
+    }
+    if storage == "binary":
+        params["rescore_count"] = match_count * RESCORE_MULTIPLIER
+    return MATCH_RPCS[storage], params
+
+
+class LocalIndex:
+    """In-memory vector index with the same storage modes as the Supabase path.
+
+    Embeddings are expected to be L2-normalized, so the dot product is the
+    cosine similarity. In "binary" mode a hamming scan over sign bits picks
+    rescore_multiplier * match_count candidates, which are then rescored
+    exactly against their float16 vectors.
+    """
+
+    def __init__(self, storage: str = EMBEDDING_STORAGE, rescore_multiplier: int = RESCORE_MULTIPLIER):
+        if storage not in STORAGE_MODES:
+            raise ValueError(f"Unknown embedding storage {storage!r}, expected one of {', '.join(STORAGE_MODES)}")
+        self.storage = storage
+        self.rescore_multiplier = rescore_multiplier
+        self.rows: list[dict] = []
+        self._vectors: np.ndarray | None = None
+        self._bits: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the stored vectors (excluding row metadata)."""
+        return sum(a.nbytes for a in (self._vectors, self._bits) if a is not None)
+
+    def add(self, rows: list[dict], embeddings) -> None:
+        dtype = np.float32 if self.storage == "float32" else np.float16
+        vectors = np.asarray(embeddings, dtype=dtype).reshape(len(rows), -1)
+        self.rows.extend(rows)
+        self._vectors = vectors if self._vectors is None else np.vstack([self._vectors, vectors])
+        if self.storage == "binary":
+            bits = to_binary(vectors)
+            self._bits = bits if self._bits is None else np.vstack([self._bits, bits])
+
+    def clear(self) -> None:
+        self.rows = []
+        self._vectors = None
+        self._bits = None
+
+    def search(self, query_embedding, match_count: int, match_threshold: float = -1.0) -> list[dict]:
+        """Return up to match_count rows above match_threshold, each with a 'similarity' key."""
+        if self._vectors is None or match_count <= 0:
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32)
+
+        if self.storage == "binary":
+            candidate_count = min(len(self.rows), match_count * self.rescore_multiplier)
+            distances = hamming_distances(to_binary(query), self._bits)
+            candidates = np.argpartition(distances, candidate_count - 1)[:candidate_count]
+        else:
+            candidates = np.arange(len(self.rows))
+
+        scores = self._vectors[candidates].astype(np.float32) @ query
+        order = np.argsort(-scores)[:match_count]
+
+        return [
+            {**self.rows[candidates[i]], "similarity": float(scores[i])}
+            for i in order
+            if scores[i] > match_threshold
+        ]
@@ -1,28 +1,112 @@
-from supabase import create_client
+import asyncio
+import logging
 
 from config import (
-    SUPABASE_URL, SUPABASE_KEY,
-    MATCH_THRESHOLD, MATCH_COUNT,
+    MATCH_THRESHOLD, MATCH_CANDIDATES,
+    RETRIEVAL_CACHE_SIZE, RETRIEVAL_CACHE_TTL, INDEX_GENERATION_TTL,
 )
+from rag.cache import TTLCache, normalize_query
+from rag.context import assemble_context
+from rag.db import get_client, get_async_client
 from rag.embed import embed_query
+from rag.quantization import match_rpc
 
+logger = logging.getLogger(__name__)
 
-def retrieve_context(project_id: str, query: str) -> str:
-    """Embed the query and retrieve relevant code chunks via pgvector similarity search."""
-    if not project_id:
-        return ""
+# match_code_chunks results keyed on (project_id, index generation, normalized query)
+retrieval_cache = TTLCache(RETRIEVAL_CACHE_SIZE, RETRIEVAL_CACHE_TTL)
+
+# Index generation per project (index_generation RPC). The database bumps it on
+# every re-index, including ones made by other API workers, so older cache keys
+# stop matching at most INDEX_GENERATION_TTL seconds after the change.
+_generations = TTLCache(RETRIEVAL_CACHE_SIZE, INDEX_GENERATION_TTL)
+
+
+def invalidate_project(project_id: str) -> None:
+    """Drop cached retrieval results for a project after this process changed its index."""
+    _generations.invalidate(lambda key: key == project_id)
+    removed = retrieval_cache.invalidate(lambda key: key[0] == project_id)
+    logger.debug("Retrieval cache invalidated  project=%s  entries=%d", project_id, removed)
+
+
+def _index_generation(project_id: str) -> int:
+    generation = _generations.get(project_id)
+    if generation is None:
+        generation = get_client().rpc("index_generation", {"p_project_id": project_id}).execute().data or 0
+        _generations.set(project_id, generation)
+    return generation
 
-    supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+async def _index_generation_async(project_id: str) -> int:
+    generation = _generations.get(project_id)
+    if generation is None:
+        supabase = await get_async_client()
+        generation = (await supabase.rpc("index_generation", {"p_project_id": project_id}).execute()).data or 0
+        _generations.set(project_id, generation)
+    return generation
+
+
+def retrieve_matches(project_id: str, query: str) -> list[dict]:
+    """Embed the query and run the similarity search RPC, reusing cached results."""
+    key = (project_id, _index_generation(project_id), normalize_query(query))
+    matches = retrieval_cache.get(key)
+    if matches is not None:
+        return matches
 
     query_embedding = embed_query(query)
 
-    result = supabase.rpc("match_code_chunks", {
-        "query_embedding": query_embedding,
-        "match_project_id": project_id,
-        "match_threshold": MATCH_THRESHOLD,
-        "match_count": MATCH_COUNT,
-    }).execute()
+    rpc_name, params = match_rpc(query_embedding, project_id, MATCH_THRESHOLD, MATCH_CANDIDATES)
+    result = get_client().rpc(rpc_name, params).execute()
 
     matches = result.data or []
-    context = "\n\n---\n\n".join(m["content"] for m in matches)
-    return context
+    retrieval_cache.set(key, matches)
+    return matches
+
+
+async def retrieve_matches_async(project_id: str, query: str) -> list[dict]:
+    """Async variant of retrieve_matches. Embedding runs in a worker thread."""
+    key = (project_id, await _index_generation_async(project_id), normalize_query(query))
+    matches = retrieval_cache.get(key)
+    if matches is not None:
+        return matches
+
+    query_embedding = await asyncio.to_thread(embed_query, query)
+
+    rpc_name, params = match_rpc(query_embedding, project_id, MATCH_THRESHOLD, MATCH_CANDIDATES)
+    supabase = await get_async_client()
+    result = await supabase.rpc(rpc_name, params).execute()
+
+    matches = result.data or []
+    retrieval_cache.set(key, matches)
+    return matches
+
+
+def retrieve_context(
+    project_id: str,
+    query: str,
+    current_file_path: str = "",
+    current_file_content: str = "",
+) -> str:
+    """Embed the query and retrieve relevant code chunks via pgvector similarity search.
+
+    Chunks already covered by the open file are left out (it is in the prompt anyway).
+    """
+    if not project_id:
+        return ""
+
+    matches = retrieve_matches(project_id, query)
+    return assemble_context(matches, current_file_path, current_file_content)
+
+
+async def retrieve_context_async(
+    project_id: str,
+    query: str,
+    current_file_path: str = "",
+    current_file_content: str = "",
+) -> str:
+    """Async variant of retrieve_context for async graph nodes."""
+    if not project_id:
+        return ""
+
+    matches = await retrieve_matches_async(project_id, query)
+    return assemble_context(matches, current_file_path, current_file_content)
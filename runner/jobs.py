@@ -0,0 +1,310 @@
+import asyncio
+import codecs
+import logging
+import os
+import shutil
+import signal
+import threading
+import time
+import uuid
+from typing import AsyncIterator, Callable
+
+from config import JOB_DIR, JOB_MEMORY_BYTES, JOB_DISK_BYTES, JOB_RETENTION, JOB_MAX_FINISHED, TERMINAL_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+# Max bytes handed to an attached client per read
+_READ_SIZE = 64 * 1024
+
+
+class OutputBuffer:
+    """Append-only job output addressed by byte offset, with bounded memory.
+
+    The last memory_bytes stay in memory for live followers. Everything is
+    also written to disk in two rotating segments of disk_bytes / 2, so
+    reattaching clients can replay older output; beyond that the oldest
+    output is dropped and `start` moves forward. Disk writes run in a worker
+    thread, one at a time, after the data is already readable from memory.
+    """
+
+    def __init__(self, path_prefix: str, memory_bytes: int = JOB_MEMORY_BYTES, disk_bytes: int = JOB_DISK_BYTES):
+        self.path_prefix = path_prefix
+        self.memory_bytes = memory_bytes
+        self.segment_bytes = disk_bytes // 2
+        self.total = 0
+        self._tail = bytearray()
+        self._segments: list[tuple[int, str]] = []  # (start offset, path), oldest first
+        self._file = None
+        self._file_bytes = 0
+        self._disk_total = 0  # bytes written to disk so far; may trail total
+        self._disk_lock = threading.Lock()
+
+    @property
+    def start(self) -> int:
+        """Oldest offset still available."""
+        if self._segments:
+            return self._segments[0][0]
+        return self.total - len(self._tail)
+
+    def _rotate(self) -> None:
+        if self._file:
+            self._file.close()
+        if len(self._segments) == 2:
+            _, oldest = self._segments.pop(0)
+            os.unlink(oldest)
+        path = f"{self.path_prefix}.{self._disk_total}.log"
+        self._file = open(path, "wb")
+        self._file_bytes = 0
+        self._segments.append((self._disk_total, path))
+
+    def _persist(self, data: bytes) -> None:
+        with self._disk_lock:
+            if self._file is None or self._file_bytes >= self.segment_bytes:
+                self._rotate()
+            self._file.write(data)
+            self._file.flush()
+            self._file_bytes += len(data)
+            self._disk_total += len(data)
+
+    async def append(self, data: bytes) -> None:
+        self._tail += data
+        if len(self._tail) > self.memory_bytes:
+            del self._tail[:len(self._tail) - self.memory_bytes]
+        self.total += len(data)
+        if self.segment_bytes:
+            await asyncio.to_thread(self._persist, data)
+
+    def in_memory(self, offset: int) -> bool:
+        return offset >= self.total - len(self._tail)
+
+    def read(self, offset: int, limit: int = _READ_SIZE) -> tuple[int, bytes]:
+        """(actual offset, data) from offset onwards; offset is moved up to `start` if
+        that output was already dropped. Reads from disk unless in_memory(offset)."""
+        offset = max(offset, self.start)
+        tail_start = self.total - len(self._tail)
+        if offset >= tail_start:
+            return offset, bytes(self._tail[offset - tail_start:offset - tail_start + limit])
+        for segment_start, path in reversed(list(self._segments)):
+            if offset >= segment_start:
+                try:
+                    with open(path, "rb") as f:
+                        f.seek(offset - segment_start)
+                        return offset, f.read(limit)
+                except FileNotFoundError:
+                    # Rotated away while we read from a thread: continue from the new start
+                    return self.read(offset, limit)
+        return offset, b""
+
+    def close(self) -> None:
+        with self._disk_lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def remove(self) -> None:
+        self.close()
+        for _, path in self._segments:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        self._segments = []
+
+
+class Job:
+    """A terminal run that outlives the HTTP request that started it.
+
+    `produce` is the run's output generator (process start, streaming, exit
+    trailer); the job drains it into an OutputBuffer in a background task so
+    any number of clients can follow, detach and reattach by offset.
+    """
+
+    def __init__(self, produce: Callable[["Job"], AsyncIterator[str]], command: str,
+                 project_id: str | None, client_key: str | None):
+        self.id = uuid.uuid4().hex[:12]
+        self.command = command
+        self.project_id = project_id
+        self.client_key = client_key
+        self.status = "running"
+        self.exit_code: int | None = None  # set by produce
+        self.created_at = time.time()
+        self.finished_at: float | None = None
+        self.buffer = OutputBuffer(os.path.join(process_job_dir(), self.id))
+        self._changed = asyncio.Event()
+        self._task = asyncio.create_task(self._drain(produce))
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    async def _append(self, text: str) -> None:
+        await self.buffer.append(text.encode("utf-8"))
+        # Wake every follower, then hand out a fresh event for the next write
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def _drain(self, produce) -> None:
+        try:
+            async for chunk in produce(self):
+                await self._append(chunk)
+            self.status = "exited"
+            if self.exit_code is None:
+                self.exit_code = -1  # failed before the process started
+        except asyncio.CancelledError:
+            self.status = "killed"
+            self.exit_code = -signal.SIGTERM
+            await self._append(f"\n[Job killed]\n\n__EXIT_CODE__:{self.exit_code}\n")
+        except Exception as e:
+            logger.exception("Job failed  job=%s", self.id)
+            self.status = "failed"
+            await self._append(f"\n[Job failed: {e}]\n\n__EXIT_CODE__:-1\n")
+        finally:
+            self.finished_at = time.time()
+            self.buffer.close()
+            self._changed.set()
+
+    def kill(self) -> None:
+        """Cancel the run; its ProcessRun stops the whole process group."""
+        if not self.done:
+            self._task.cancel()
+
+    async def follow(self, offset: int = 0) -> AsyncIterator[str]:
+        """Output from offset (bytes) until the job ends, then stop. An offset past
+        the output written so far starts at its end rather than skipping what comes next."""
+        offset = min(offset, self.buffer.total)
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        while True:
+            changed = self._changed
+            if self.buffer.in_memory(offset):
+                offset, data = self.buffer.read(offset)
+            else:
+                offset, data = await asyncio.to_thread(self.buffer.read, offset)
+            if data:
+                offset += len(data)
+                text = decoder.decode(data)
+                if text:
+                    yield text
+                continue
+            if self.done:
+                break
+            await changed.wait()
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+    def info(self) -> dict:
+        return {
+            "jobId": self.id,
+            "command": self.command,
+            "projectId": self.project_id,
+            "status": self.status,
+            "exitCode": self.exit_code,
+            "createdAt": self.created_at,
+            "finishedAt": self.finished_at,
+            "outputStart": self.buffer.start,
+            "outputBytes": self.buffer.total,
+        }
+
+
+class JobManager:
+    """Jobs of this server process. Finished jobs are kept for JOB_RETENTION
+    seconds (at most JOB_MAX_FINISHED of them) so clients can still read them."""
+
+    def __init__(self):
+        self.jobs: dict[str, Job] = {}
+
+    def start(self, produce: Callable[[Job], AsyncIterator[str]], command: str,
+              project_id: str | None = None, client_key: str | None = None) -> tuple[Job, bool]:
+        """Start a job, or return the running one with the same client_key (a retried request).
+        Returns (job, created)."""
+        self.prune()
+        job = self.find(client_key, project_id)
+        if job:
+            return job, False
+        os.makedirs(process_job_dir(), exist_ok=True)
+        job = Job(produce, command, project_id, client_key)
+        self.jobs[job.id] = job
+        logger.info("Job started  job=%s  project=%s  command=%.80s", job.id, project_id, command)
+        return job, True
+
+    def find(self, client_key: str | None, project_id: str | None = None) -> Job | None:
+        """The running job started with this client_key, if any."""
+        if not client_key:
+            return None
+        return next((j for j in self.jobs.values()
+                     if j.client_key == client_key and j.project_id == project_id and not j.done), None)
+
+    def get(self, job_id: str) -> Job | None:
+        return self.jobs.get(job_id)
+
+    def list(self, project_id: str | None = None) -> list[Job]:
+        self.prune()
+        jobs = [j for j in self.jobs.values() if project_id is None or j.project_id == project_id]
+        return sorted(jobs, key=lambda j: j.created_at, reverse=True)
+
+    def prune(self) -> None:
+        finished = sorted((j for j in self.jobs.values() if j.done), key=lambda j: j.finished_at)
+        cutoff = time.time() - JOB_RETENTION
+        excess = len(finished) - JOB_MAX_FINISHED
+        for i, job in enumerate(finished):
+            if i < excess or job.finished_at < cutoff:
+                job.buffer.remove()
+                del self.jobs[job.id]
+
+    async def shutdown(self) -> None:
+        """Kill running jobs and wait for their processes to be stopped."""
+        running = [j for j in self.jobs.values() if not j.done]
+        for job in running:
+            job.kill()
+        await asyncio.gather(*(j._task for j in running), return_exceptions=True)
+        shutil.rmtree(process_job_dir(), ignore_errors=True)
+
+
+_process_dir: tuple[int, str] | None = None
+
+
+def process_job_dir() -> str:
+    """This process's spill directory under JOB_DIR. Server processes (workers,
+    or old and new ones during a restart) share JOB_DIR, so each gets its own."""
+    global _process_dir
+    # Recomputed after a fork, so workers forked from a preloaded app don't share one
+    if _process_dir is None or _process_dir[0] != os.getpid():
+        _process_dir = (os.getpid(), os.path.join(JOB_DIR, f"{os.getpid()}-{uuid.uuid4().hex[:8]}"))
+    return _process_dir[1]
+
+
+def _last_modified(path: str) -> float:
+    latest = os.stat(path).st_mtime
+    for entry in os.scandir(path):
+        try:
+            latest = max(latest, entry.stat(follow_symlinks=False).st_mtime)
+        except OSError:
+            continue
+    return latest
+
+
+def remove_stale_job_dirs(max_age: float = TERMINAL_TIMEOUT + JOB_RETENTION) -> int:
+    """Delete spill directories of server processes that are gone. Returns how many were removed.
+
+    A directory counts as stale once nothing in it was written for max_age:
+    a live process writes at least once per run (runs are capped at
+    TERMINAL_TIMEOUT) and drops a job's files JOB_RETENTION after it ends.
+    """
+    if not os.path.isdir(JOB_DIR):
+        return 0
+    own = process_job_dir()
+    cutoff = time.time() - max_age
+    removed = 0
+    for entry in os.scandir(JOB_DIR):
+        if entry.path == own or not entry.is_dir(follow_symlinks=False):
+            continue
+        try:
+            if _last_modified(entry.path) < cutoff:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+        except OSError:
+            continue
+    return removed
+
+
+job_manager = JobManager()
@@ -0,0 +1,222 @@
+import asyncio
+import logging
+import os
+import shutil
+import signal
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator
+
+from config import (
+    TERMINAL_TIMEOUT, TERMINAL_CPU_SECONDS, TERMINAL_MEMORY_BYTES, TERMINAL_FILE_BYTES, TERMINAL_NICE,
+    TERMINAL_MAX_PROCESSES, TERMINAL_MAX_PER_PROJECT, TERMINAL_QUEUE_TIMEOUT, TERMINAL_KILL_GRACE,
+)
+from runner.pyfork import ForkServerUnavailable, PythonForkServer, python_file_argv
+from runner.rlimits import apply_limits
+from runner.stream import spawn, stream_output
+
+logger = logging.getLogger(__name__)
+
+RUN_DIR_PREFIX = "ai-ide-run-"
+
+
+@dataclass
+class ResourceLimits:
+    """Per-process limits applied in the child before exec (0 = unlimited)."""
+    cpu_seconds: int = TERMINAL_CPU_SECONDS
+    memory_bytes: int = TERMINAL_MEMORY_BYTES
+    file_bytes: int = TERMINAL_FILE_BYTES
+    nice: int = TERMINAL_NICE
+
+    def apply(self) -> None:
+        """Runs in the forked child (preexec_fn); must not touch asyncio or locks."""
+        apply_limits(self.cpu_seconds, self.memory_bytes, self.file_bytes, self.nice)
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+default_limits = ResourceLimits()
+
+
+class QueueTimeout(Exception):
+    """No run slot became free within the queue timeout."""
+
+
+class ConcurrencyLimiter:
+    """Caps running processes globally and per project; callers wait in FIFO order for a slot."""
+
+    def __init__(self, max_processes: int = TERMINAL_MAX_PROCESSES, max_per_project: int = TERMINAL_MAX_PER_PROJECT):
+        self.max_per_project = max_per_project
+        self._global = asyncio.Semaphore(max_processes)
+        # Held or awaited by a project's runs; dropped once none holds or awaits it
+        self._projects: dict[str, asyncio.Semaphore] = {}
+        self._project_users: dict[str, int] = {}
+
+    def _enter(self, project_id: str) -> asyncio.Semaphore:
+        self._project_users[project_id] = self._project_users.get(project_id, 0) + 1
+        return self._projects.setdefault(project_id, asyncio.Semaphore(self.max_per_project))
+
+    def _leave(self, project_id: str) -> None:
+        self._project_users[project_id] -= 1
+        if not self._project_users[project_id]:
+            del self._project_users[project_id]
+            del self._projects[project_id]
+
+    async def acquire(self, project_id: str | None, timeout: float = TERMINAL_QUEUE_TIMEOUT) -> None:
+        """Take a project slot, then a global one, so a busy project can't hold global slots while queued."""
+        deadline = time.monotonic() + timeout
+        project = self._enter(project_id) if project_id else None
+        try:
+            if project:
+                await asyncio.wait_for(project.acquire(), timeout)
+            try:
+                await asyncio.wait_for(self._global.acquire(), max(0.0, deadline - time.monotonic()))
+            except BaseException:
+                if project:
+                    project.release()
+                raise
+        except BaseException as e:
+            if project_id:
+                self._leave(project_id)
+            if isinstance(e, asyncio.TimeoutError):
+                raise QueueTimeout(f"no free slot within {timeout:g}s") from None
+            raise
+
+    def release(self, project_id: str | None) -> None:
+        self._global.release()
+        if project_id:
+            self._projects[project_id].release()
+            self._leave(project_id)
+
+
+def make_run_dir(name: str, content: str) -> tuple[str, str]:
+    """Private temp dir holding one file. Returns (dir, file path)."""
+    run_dir = tempfile.mkdtemp(prefix=RUN_DIR_PREFIX)
+    file_path = os.path.normpath(os.path.join(run_dir, name))
+    if not file_path.startswith(run_dir + os.sep):
+        remove_run_dir(run_dir)
+        raise ValueError(f"Invalid file name: {name}")
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return run_dir, file_path
+
+
+def remove_run_dir(run_dir: str | None) -> None:
+    if run_dir:
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+
+def remove_stale_run_dirs(max_age: float = 2 * TERMINAL_TIMEOUT) -> int:
+    """Delete run dirs left behind by a crash or restart. Returns how many were removed.
+
+    Only dirs older than max_age are touched, so other server processes
+    sharing the temp dir keep their live runs.
+    """
+    root = tempfile.gettempdir()
+    cutoff = time.time() - max_age
+    removed = 0
+    for entry in os.scandir(root):
+        if entry.name.startswith(RUN_DIR_PREFIX) and entry.is_dir(follow_symlinks=False):
+            try:
+                if entry.stat(follow_symlinks=False).st_mtime < cutoff:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                    removed += 1
+            except OSError:
+                continue
+    return removed
+
+
+def _signal_group(pid: int, sig: int) -> None:
+    try:
+        os.killpg(pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+class ProcessRun:
+    """One shell command in its own process group, with limits and a wall-clock timeout.
+
+    Stopping is synchronous (signals plus a timer), so it also works from a
+    cancelled task, e.g. when the client disconnects mid-stream.
+    """
+
+    def __init__(
+        self,
+        command: str,
+        cwd: str,
+        env: dict,
+        pty_mode: bool = False,
+        limits: ResourceLimits = default_limits,
+        timeout: float = TERMINAL_TIMEOUT,
+        forkserver: PythonForkServer | None = None,
+    ):
+        self.command = command
+        self.cwd = cwd
+        self.env = env
+        self.pty_mode = pty_mode
+        self.limits = limits
+        self.timeout = timeout
+        self.forkserver = forkserver
+        self.forked = False
+        self.process: asyncio.subprocess.Process | None = None
+        self.exit_code: int | None = None
+        self.stop_reason: str | None = None
+
+    def stop(self, reason: str) -> None:
+        """SIGTERM the whole process group, SIGKILL it after TERMINAL_KILL_GRACE."""
+        if self.process is None or self.stop_reason:
+            return
+        self.stop_reason = reason
+        pid = self.process.pid
+        logger.info("Terminal stop  pid=%d  reason=%s", pid, reason)
+        _signal_group(pid, signal.SIGTERM)
+        asyncio.get_running_loop().call_later(TERMINAL_KILL_GRACE, _signal_group, pid, signal.SIGKILL)
+
+    def status_message(self) -> str:
+        """Why the run ended, when it was not a normal exit."""
+        if self.stop_reason == "timeout":
+            return f"\n[Process killed: exceeded the {self.timeout:g}s time limit]\n"
+        # A shell that didn't exec its command reports signals as 128 + signum
+        if self.exit_code in (-signal.SIGXCPU, 128 + signal.SIGXCPU):
+            return f"\n[Process killed: exceeded the {self.limits.cpu_seconds}s CPU limit]\n"
+        if self.exit_code in (-signal.SIGXFSZ, 128 + signal.SIGXFSZ):
+            return "\n[Process killed: file size limit exceeded]\n"
+        return ""
+
+    async def _spawn(self):
+        argv = python_file_argv(self.command) if self.forkserver else None
+        if argv:
+            try:
+                result = await self.forkserver.spawn(argv, self.cwd, self.env, self.limits.as_dict(), self.pty_mode)
+                self.forked = True
+                return result
+            except ForkServerUnavailable as e:
+                logger.warning("Python forkserver unavailable, using a shell: %s", e)
+        return await spawn(
+            self.command,
+            cwd=self.cwd,
+            env=self.env,
+            pty_mode=self.pty_mode,
+            start_new_session=True,
+            preexec_fn=self.limits.apply,
+        )
+
+    async def stream(self) -> AsyncIterator[str]:
+        """Start the command and yield its output; exit_code is set once it finishes."""
+        self.process, readers = await self._spawn()
+        timer = asyncio.get_running_loop().call_later(self.timeout, self.stop, "timeout")
+        try:
+            async for chunk in stream_output(readers):
+                yield chunk
+            self.exit_code = await self.process.wait()
+        finally:
+            timer.cancel()
+            if self.exit_code is None:
+                # Cancelled (client gone) or failed mid-stream
+                self.stop("disconnected")
+            else:
+                # Reap background children the command left in its group
+                _signal_group(self.process.pid, signal.SIGKILL)
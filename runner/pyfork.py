@@ -0,0 +1,165 @@
+import asyncio
+import json
+import logging
+import os
+import shlex
+import shutil
+import socket
+import sys
+import tempfile
+
+from config import TERMINAL_PYFORK_PRELOAD
+from runner.stream import open_pty, open_reader
+
+logger = logging.getLogger(__name__)
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Commands with any of these need a real shell
+_SHELL_CHARS = set("|&;<>()$`\\*?[]{}~!#\n")
+
+
+class ForkServerUnavailable(Exception):
+    pass
+
+
+def python_file_argv(command: str) -> list[str] | None:
+    """Script argv for a plain `python[3] file.py [args]` command, else None."""
+    if _SHELL_CHARS & set(command.replace('"', "").replace("'", "")):
+        return None
+    try:
+        argv = shlex.split(command)
+    except ValueError:
+        return None
+    if len(argv) < 2 or argv[0] not in ("python", "python3") or not argv[1].endswith(".py"):
+        return None
+    return argv[1:]
+
+
+class ForkedProcess:
+    """The bits of asyncio.subprocess.Process that ProcessRun uses, for a forkserver child."""
+
+    def __init__(self, pid: int, conn: socket.socket):
+        self.pid = pid
+        self.returncode: int | None = None
+        self._conn = conn
+
+    async def wait(self) -> int:
+        if self.returncode is None:
+            message = await asyncio.get_running_loop().sock_recv(self._conn, 64)
+            # An empty message means the forkserver died; the child went with it
+            self.returncode = int(message.split()[1]) if message.startswith(b"exit ") else -9
+            self._conn.close()
+        return self.returncode
+
+
+class PythonForkServer:
+    """Client for runner/pyfork_server.py: a warm interpreter with common libraries
+    preloaded that forks a fresh child for every single-file Python run.
+
+    Runs use the server's interpreter (sys.executable), not whatever `python`
+    resolves to on PATH.
+    """
+
+    def __init__(self, preload: list[str] = TERMINAL_PYFORK_PRELOAD):
+        self.preload = preload
+        self._process: asyncio.subprocess.Process | None = None
+        self._dir: str | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def socket_path(self) -> str:
+        return os.path.join(self._dir, "sock")
+
+    async def start(self) -> None:
+        """Start (or restart after a crash) the server and wait until its imports are done."""
+        async with self._lock:
+            if self._process is not None and self._process.returncode is None:
+                return
+            self._cleanup_dir()
+            self._dir = tempfile.mkdtemp(prefix="ai-ide-pyfork-")
+            self._process = await asyncio.create_subprocess_exec(
+                sys.executable, "-m", "runner.pyfork_server", self.socket_path, ",".join(self.preload),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                cwd=_ROOT,
+            )
+            line = await self._process.stdout.readline()
+            if line.strip() != b"ready":
+                raise ForkServerUnavailable("forkserver failed to start")
+            logger.info("Python forkserver ready  pid=%d  preload=%s", self._process.pid, ",".join(self.preload))
+
+    async def spawn(
+        self, argv: list[str], cwd: str, env: dict, limits: dict, pty_mode: bool = False,
+    ) -> tuple[ForkedProcess, list[asyncio.StreamReader]]:
+        """Fork a child running argv[0] as __main__; same return shape as runner.stream.spawn."""
+        try:
+            await self.start()
+        except OSError as e:
+            raise ForkServerUnavailable(str(e)) from e
+
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        if pty_mode:
+            master, slave = open_pty()
+            child_fds, parent_fds = [devnull, slave, slave], [master]
+        else:
+            out_r, out_w = os.pipe()
+            err_r, err_w = os.pipe()
+            child_fds, parent_fds = [devnull, out_w, err_w], [out_r, err_r]
+
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        try:
+            conn.connect(self.socket_path)
+            request = {"argv": argv, "cwd": cwd, "env": env, "limits": limits}
+            socket.send_fds(conn, [json.dumps(request).encode()], child_fds)
+            conn.setblocking(False)
+            reply = await asyncio.get_running_loop().sock_recv(conn, 64)
+            if not reply.startswith(b"pid "):
+                raise ForkServerUnavailable("forkserver did not start the run")
+        except BaseException as e:
+            conn.close()
+            for fd in parent_fds:
+                os.close(fd)
+            if isinstance(e, OSError):
+                raise ForkServerUnavailable(str(e)) from e
+            raise
+        finally:
+            # The child has its own copies now
+            for fd in set(child_fds):
+                os.close(fd)
+
+        readers = [await open_reader(fd) for fd in parent_fds]
+        return ForkedProcess(int(reply.split()[1]), conn), readers
+
+    def _cleanup_dir(self) -> None:
+        if self._dir:
+            shutil.rmtree(self._dir, ignore_errors=True)
+            self._dir = None
+
+    async def close(self) -> None:
+        if self._process is not None and self._process.returncode is None:
+            # Closing stdin tells the server to kill its children and exit
+            self._process.stdin.close()
+            try:
+                await asyncio.wait_for(self._process.wait(), 5)
+            except asyncio.TimeoutError:
+                self._process.kill()
+        self._process = None
+        self._cleanup_dir()
+
+
+_forkserver: PythonForkServer | None = None
+
+
+def get_forkserver() -> PythonForkServer:
+    global _forkserver
+    if _forkserver is None:
+        _forkserver = PythonForkServer()
+    return _forkserver
+
+
+async def close_forkserver() -> None:
+    global _forkserver
+    if _forkserver is not None:
+        await _forkserver.close()
+        _forkserver = None
@@ -0,0 +1,219 @@
+"""
+Forkserver for single-file Python runs from /api/terminal (see runner/pyfork.py).
+
+Imports the preload modules once, then forks a fresh child per run, so each
+run starts with those imports already done but shares no state with other
+runs. Requests arrive on a SOCK_SEQPACKET Unix socket, one connection per
+run: a JSON message carrying argv/cwd/env/limits plus the child's stdin,
+stdout and stderr fds (SCM_RIGHTS). The server answers "pid <n>", then
+"exit <code>" when the child is reaped (negative code = killed by signal,
+like subprocess). It exits, killing its children, when its stdin closes.
+
+Runs as `python -m runner.pyfork_server <socket path> <comma-separated modules>`
+and deliberately imports nothing from the app, so none of it leaks into user code.
+"""
+import gc
+import importlib
+import io
+import json
+import os
+import runpy
+import selectors
+import signal
+import socket
+import sys
+import traceback
+
+from runner.rlimits import apply_limits
+
+MAX_REQUEST_BYTES = 1 << 20
+
+
+def _preload(modules: list[str]) -> None:
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            print(f"pyfork: preload of {name} failed: {e}", file=sys.stderr, flush=True)
+    # Keep the preloaded objects out of future collections so forked children
+    # don't touch (and copy) their pages
+    gc.collect()
+    gc.freeze()
+
+
+def _exit_code(exc: SystemExit) -> int:
+    if exc.code is None:
+        return 0
+    if isinstance(exc.code, int):
+        return exc.code
+    print(exc.code, file=sys.stderr)
+    return 1
+
+
+def _print_traceback(script: str) -> None:
+    """Uncaught exception report without the runpy/forkserver frames, as `python script.py` prints it."""
+    exc_type, exc, tb = sys.exc_info()
+    while tb is not None and os.path.abspath(tb.tb_frame.f_code.co_filename) != script:
+        tb = tb.tb_next
+    traceback.print_exception(exc_type, exc, tb)
+
+
+def _run_child(request: dict) -> None:
+    """In the forked child, with fds 0-2 already in place. Never returns."""
+    code = 1
+    try:
+        os.setsid()
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        apply_limits(**request["limits"])
+        os.chdir(request["cwd"])
+        os.environ.clear()
+        os.environ.update(request["env"])
+
+        # Same stdio setup as a fresh `python -u script.py`
+        sys.stdin = io.TextIOWrapper(io.FileIO(0, "r", closefd=False), encoding="utf-8")
+        sys.stdout = io.TextIOWrapper(io.FileIO(1, "w", closefd=False), encoding="utf-8", write_through=True)
+        sys.stderr = io.TextIOWrapper(io.FileIO(2, "w", closefd=False), encoding="utf-8",
+                                      errors="backslashreplace", write_through=True)
+
+        script = os.path.abspath(request["argv"][0])
+        sys.argv = list(request["argv"])
+        sys.path[0] = os.path.dirname(script)
+        code = 0
+        try:
+            runpy.run_path(script, run_name="__main__")
+        except SystemExit as e:
+            code = _exit_code(e)
+        except BaseException:
+            _print_traceback(script)
+            code = 1
+        # What interpreter shutdown would do: wait for non-daemon threads, run atexit hooks
+        if "threading" in sys.modules:
+            sys.modules["threading"]._shutdown()
+        import atexit
+        atexit._run_exitfuncs()
+        sys.stdout.flush()
+        sys.stderr.flush()
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        os._exit(code)
+
+
+class ForkServer:
+    def __init__(self, socket_path: str):
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        self.listener.bind(socket_path)
+        self.listener.listen(64)
+        self.wake_r, self.wake_w = socket.socketpair()
+        self.wake_r.setblocking(False)
+        self.wake_w.setblocking(False)
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.listener, selectors.EVENT_READ)
+        self.selector.register(self.wake_r, selectors.EVENT_READ)
+        self.selector.register(sys.stdin.fileno(), selectors.EVENT_READ)
+        self.children: dict[int, socket.socket | None] = {}  # pid -> its request connection
+        self.running: dict[socket.socket, int] = {}
+
+    def _fork(self, conn: socket.socket) -> None:
+        message, fds, _, _ = socket.recv_fds(conn, MAX_REQUEST_BYTES, 3)
+        if not message or len(fds) != 3:
+            for fd in fds:
+                os.close(fd)
+            self._close(conn)
+            return
+        request = json.loads(message)
+        pid = os.fork()
+        if pid == 0:
+            # Child: drop every server fd, move the run's fds to 0-2
+            signal.set_wakeup_fd(-1)
+            self.selector.close()
+            for sock in (self.listener, self.wake_r, self.wake_w, conn, *self.running):
+                sock.close()
+            for target, fd in enumerate(fds):
+                os.dup2(fd, target)
+            for fd in set(fds):
+                if fd > 2:
+                    os.close(fd)
+            _run_child(request)
+        for fd in fds:
+            os.close(fd)
+        self.children[pid] = conn
+        self.running[conn] = pid
+        conn.send(f"pid {pid}".encode())
+
+    def _close(self, conn: socket.socket) -> None:
+        self.selector.unregister(conn)
+        pid = self.running.pop(conn, None)
+        if pid is not None:
+            self.children[pid] = None
+        conn.close()
+
+    def _reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            conn = self.children.pop(pid, None)
+            if conn is not None:
+                try:
+                    conn.send(f"exit {os.waitstatus_to_exitcode(status)}".encode())
+                except OSError:
+                    pass
+                self._close(conn)
+
+    def _shutdown(self) -> None:
+        for pid in self.children:
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except OSError:
+                pass
+        sys.exit(0)
+
+    def serve(self) -> None:
+        signal.set_wakeup_fd(self.wake_w.fileno())
+        signal.signal(signal.SIGCHLD, lambda *_: None)
+        print("ready", flush=True)
+        while True:
+            for key, _ in self.selector.select():
+                source = key.fileobj
+                if isinstance(source, socket.socket) and source.fileno() == -1:
+                    continue  # closed earlier in this batch
+                if source is self.listener:
+                    conn, _ = self.listener.accept()
+                    self.selector.register(conn, selectors.EVENT_READ)
+                elif source is self.wake_r:
+                    while True:
+                        try:
+                            if not self.wake_r.recv(4096):
+                                break
+                        except BlockingIOError:
+                            break
+                    self._reap()
+                elif source == sys.stdin.fileno():
+                    if not os.read(source, 4096):
+                        self._shutdown()
+                elif source in self.running:
+                    # The API side hung up before the child exited: don't leave it running
+                    if not source.recv(16):
+                        try:
+                            os.killpg(self.running[source], signal.SIGKILL)
+                        except OSError:
+                            pass
+                        self._close(source)
+                else:
+                    self._fork(source)
+
+
+def main():
+    socket_path = sys.argv[1]
+    modules = [m.strip() for m in (sys.argv[2] if len(sys.argv) > 2 else "").split(",") if m.strip()]
+    _preload(modules)
+    ForkServer(socket_path).serve()
+
+
+if __name__ == "__main__":
+    main()
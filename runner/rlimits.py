@@ -0,0 +1,21 @@
+# Imported by the forkserver (runner/pyfork_server.py) as well as the API, so
+# this module must not import config or anything else from the app.
+import os
+import resource
+
+
+def apply_limits(cpu_seconds: int, memory_bytes: int, file_bytes: int, nice: int, open_files: int = 0) -> None:
+    """Set rlimits and niceness on the current process (0 = leave unlimited/unchanged)."""
+    # No core dumps from SIGXCPU/SIGXFSZ in the run dir
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    if cpu_seconds:
+        # SIGXCPU at the soft limit, SIGKILL a little later if it is ignored
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 5))
+    if memory_bytes:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+    if file_bytes:
+        resource.setrlimit(resource.RLIMIT_FSIZE, (file_bytes, file_bytes))
+    if open_files:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (open_files, open_files))
+    if nice:
+        os.nice(nice)
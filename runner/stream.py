@@ -0,0 +1,142 @@
+import asyncio
+import codecs
+import errno
+import os
+from typing import AsyncIterator
+
+from config import TERMINAL_READ_SIZE, TERMINAL_FLUSH_INTERVAL, TERMINAL_FLUSH_BYTES
+
+# Queue marker: the flush interval elapsed
+_FLUSH = object()
+
+
+async def open_reader(fd: int) -> asyncio.StreamReader:
+    """StreamReader over a pipe or PTY master fd (takes ownership of the fd)."""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=TERMINAL_READ_SIZE * 4)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), os.fdopen(fd, "rb", 0))
+    return reader
+
+
+def open_pty() -> tuple[int, int]:
+    """(master, slave) pseudo-terminal pair with \\n -> \\r\\n output translation off."""
+    import pty
+    import termios
+
+    master, slave = pty.openpty()
+    attrs = termios.tcgetattr(slave)
+    attrs[1] &= ~termios.ONLCR
+    termios.tcsetattr(slave, termios.TCSANOW, attrs)
+    return master, slave
+
+
+async def spawn(command: str, cwd: str, env: dict, pty_mode: bool = False, **kwargs) -> tuple[asyncio.subprocess.Process, list[asyncio.StreamReader]]:
+    """Start a shell command and return it with the readers for its output.
+
+    In pipe mode stdout and stderr are separate pipes. In PTY mode both go to
+    one pseudo-terminal, so tools that block-buffer when not attached to a TTY
+    (Python, most libc programs) flush line by line. Output post-processing
+    (\\n -> \\r\\n) is turned off on the PTY so both modes produce the same text.
+    """
+    if not pty_mode:
+        process = await asyncio.create_subprocess_shell(
+            command,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=cwd,
+            env=env,
+            **kwargs,
+        )
+        return process, [process.stdout, process.stderr]
+
+    master, slave = open_pty()
+    try:
+        process = await asyncio.create_subprocess_shell(
+            command,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=slave,
+            stderr=slave,
+            cwd=cwd,
+            env=env,
+            **kwargs,
+        )
+    except BaseException:
+        os.close(master)
+        raise
+    finally:
+        # The child holds its own copy; the master sees EOF (EIO) once every copy is closed
+        os.close(slave)
+    return process, [await open_reader(master)]
+
+
+async def _pump(reader: asyncio.StreamReader, queue: asyncio.Queue) -> None:
+    """Decode one stream incrementally (multi-byte characters may span reads) into the queue."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    try:
+        while True:
+            try:
+                data = await reader.read(TERMINAL_READ_SIZE)
+            except OSError as e:
+                # A PTY master reports EIO instead of EOF after the child side closes
+                if e.errno != errno.EIO:
+                    raise
+                data = b""
+            if not data:
+                break
+            text = decoder.decode(data)
+            if text:
+                queue.put_nowait(text)
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            queue.put_nowait(tail)
+    finally:
+        queue.put_nowait(None)
+
+
+async def stream_output(
+    readers: list[asyncio.StreamReader],
+    flush_interval: float = TERMINAL_FLUSH_INTERVAL,
+    flush_bytes: int = TERMINAL_FLUSH_BYTES,
+) -> AsyncIterator[str]:
+    """Interleave decoded output of all readers as it arrives, until every one hits EOF.
+
+    Small writes are coalesced: a chunk is yielded once flush_interval has
+    passed since the first buffered write, or once flush_bytes characters are
+    buffered, whichever comes first.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    pumps = [asyncio.create_task(_pump(reader, queue)) for reader in readers]
+    remaining = len(pumps)
+    buffer: list[str] = []
+    size = 0
+    deadline = None
+    try:
+        while remaining:
+            timeout = None if deadline is None else max(0.0, deadline - loop.time())
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                item = _FLUSH
+            if item is None:
+                remaining -= 1
+                continue
+            if item is not _FLUSH:
+                buffer.append(item)
+                size += len(item)
+                if deadline is None:
+                    deadline = loop.time() + flush_interval
+                if size < flush_bytes:
+                    continue
+            if buffer:
+                yield "".join(buffer)
+            buffer, size, deadline = [], 0, None
+        if buffer:
+            yield "".join(buffer)
+        # Surface reader errors other than EOF
+        for pump in pumps:
+            await pump
+    finally:
+        for pump in pumps:
+            pump.cancel()
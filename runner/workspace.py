@@ -0,0 +1,316 @@
+import asyncio
+import errno
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable
+
+from config import WORKSPACE_ROOT, WORKSPACE_QUOTA_BYTES, WORKSPACE_MAX_PROJECTS, WORKSPACE_EVICT_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# Linux FICLONE ioctl: copy-on-write clone on btrfs, XFS (reflink=1), bcachefs, ...
+_FICLONE = 0x40049409
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _clone(src: str, dst: str) -> None:
+    """Copy-on-write clone of src where the filesystem supports it, else a plain copy.
+
+    Never a hardlink: commands write to project files in place, which would
+    change the shared blob for every workspace linked to it.
+    """
+    import fcntl
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+            return
+        except OSError as e:
+            if e.errno not in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS):
+                raise
+        shutil.copyfileobj(fsrc, fdst, 1024 * 1024)
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_blocks * 512
+            except OSError:
+                continue
+    return total
+
+
+def validate_project_id(project_id: str) -> str:
+    """The canonical form of a project id (a UUID). Raises ValueError otherwise,
+    so no id can name a path outside root/projects."""
+    try:
+        return str(uuid.UUID(project_id))
+    except (ValueError, AttributeError, TypeError):
+        raise ValueError(f"Invalid project id: {project_id!r}") from None
+
+
+async def load_project_files(project_id: str) -> dict[str, str]:
+    from rag.db import get_async_client
+
+    supabase = await get_async_client()
+    result = await supabase.table("projects").select("file_contents").eq("id", project_id).single().execute()
+    if not result.data:
+        raise ValueError("Project not found")
+    return result.data.get("file_contents") or {}
+
+
+class Workspace:
+    """One project's materialized files: tree/ is the working directory for its runs,
+    manifest.json maps every project file written there to [content hash, size, mtime_ns]
+    (the stat part detects files a run changed in place)."""
+
+    def __init__(self, root: str, project_id: str):
+        self.project_id = validate_project_id(project_id)
+        self.dir = os.path.join(root, "projects", self.project_id)
+        self.tree = os.path.join(self.dir, "tree")
+        self.manifest_path = os.path.join(self.dir, "manifest.json")
+        self.manifest: dict[str, list] = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+
+    @property
+    def exists(self) -> bool:
+        return os.path.exists(self.manifest_path)
+
+    def path_for(self, file_path: str) -> str:
+        target = os.path.normpath(os.path.join(self.tree, file_path.lstrip("/")))
+        if target != self.tree and not target.startswith(self.tree + os.sep):
+            raise ValueError(f"Invalid file path: {file_path}")
+        return target
+
+    def save_manifest(self) -> None:
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp, self.manifest_path)
+
+    def touch(self) -> None:
+        os.utime(self.manifest_path)
+
+    @property
+    def last_used(self) -> float:
+        try:
+            return os.stat(self.manifest_path).st_mtime
+        except OSError:
+            return 0.0
+
+
+class WorkspaceCache:
+    """Per-project working directories on local disk, reused across /api/terminal runs.
+
+    A cold workspace is materialized from projects.file_contents; later runs
+    only apply the files whose content hash changed. File contents live once
+    in a content-addressed blob store and are cloned (copy-on-write where the
+    filesystem supports it) into workspaces. Idle workspaces are evicted
+    least-recently-used first when the cache exceeds its disk quota or
+    project count.
+    """
+
+    def __init__(
+        self,
+        root: str = WORKSPACE_ROOT,
+        quota_bytes: int = WORKSPACE_QUOTA_BYTES,
+        max_projects: int = WORKSPACE_MAX_PROJECTS,
+        evict_interval: float = WORKSPACE_EVICT_INTERVAL,
+        loader: Callable[[str], Awaitable[dict[str, str]]] = load_project_files,
+    ):
+        self.root = root
+        self.blobs = os.path.join(root, "blobs")
+        self.quota_bytes = quota_bytes
+        self.max_projects = max_projects
+        self.evict_interval = evict_interval
+        self.loader = loader
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._in_use: dict[str, int] = {}
+        self._last_evict = 0.0
+        self._evict_task: asyncio.Task | None = None
+        # Serializes disk changes between prepare threads and eviction
+        self._disk_lock = threading.Lock()
+        os.makedirs(self.blobs, exist_ok=True)
+        os.makedirs(os.path.join(root, "projects"), exist_ok=True)
+
+    def _blob(self, digest: str, content: str) -> str:
+        path = os.path.join(self.blobs, digest[:2], digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8", newline="") as f:
+                f.write(content)
+            os.replace(tmp, path)
+        return path
+
+    def _write(self, workspace: Workspace, file_path: str, content: str) -> bool:
+        """Write one file unless the workspace already has this content. Returns whether it wrote."""
+        digest = content_hash(content)
+        target = workspace.path_for(file_path)
+        entry = workspace.manifest.get(file_path)
+        if entry and entry[0] == digest:
+            try:
+                st = os.lstat(target)
+                if [st.st_size, st.st_mtime_ns] == entry[1:]:
+                    return False
+            except FileNotFoundError:
+                pass
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if os.path.lexists(target):
+            os.unlink(target)
+        _clone(self._blob(digest, content), target)
+        st = os.lstat(target)
+        workspace.manifest[file_path] = [digest, st.st_size, st.st_mtime_ns]
+        return True
+
+    def _delete(self, workspace: Workspace, file_path: str) -> bool:
+        target = workspace.path_for(file_path)
+        workspace.manifest.pop(file_path, None)
+        try:
+            os.unlink(target)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _apply(self, workspace: Workspace, files: dict[str, str | None], full: bool) -> tuple[int, int]:
+        """Bring the workspace in line with files (None = deleted). With full=True, project
+        files missing from `files` are deleted too; files created by runs are never touched."""
+        os.makedirs(workspace.tree, exist_ok=True)
+        written = deleted = 0
+        if full:
+            for file_path in set(workspace.manifest) - set(files):
+                deleted += self._delete(workspace, file_path)
+        for file_path, content in files.items():
+            if content is None:
+                deleted += self._delete(workspace, file_path)
+            else:
+                written += self._write(workspace, file_path, content)
+        workspace.save_manifest()
+        return written, deleted
+
+    def _sync(self, project_id: str, files: dict[str, str] | None, changes: dict[str, str | None]) -> tuple[Workspace, int, int] | None:
+        """Apply files (full contents, cold start) or just changes. None if the
+        workspace has to be loaded first (it doesn't exist, or was just evicted)."""
+        with self._disk_lock:
+            workspace = Workspace(self.root, project_id)
+            if files is None:
+                if not workspace.exists:
+                    return None
+                written, deleted = self._apply(workspace, changes, full=False)
+            else:
+                written, deleted = self._apply(workspace, {**files, **changes}, full=True)
+            workspace.touch()
+            return workspace, written, deleted
+
+    async def prepare(
+        self, project_id: str, changes: dict[str, str | None] | None = None, full_sync: bool = False,
+    ) -> Workspace:
+        """Materialize (cold) or update (warm) a project's workspace and return it.
+
+        full_sync reloads every file from the project, e.g. after edits this
+        server never saw; unchanged files are still not rewritten.
+        """
+        project_id = validate_project_id(project_id)
+        lock = self._locks.setdefault(project_id, asyncio.Lock())
+        async with lock:
+            start = time.time()
+            changes = changes or {}
+            result = None if full_sync else await asyncio.to_thread(self._sync, project_id, None, changes)
+            loaded = result is None
+            if loaded:
+                files = await self.loader(project_id)
+                result = await asyncio.to_thread(self._sync, project_id, files, changes)
+            workspace, written, deleted = result
+            logger.info("Workspace ready  project=%s  loaded=%s  written=%d  deleted=%d  duration=%.0fms",
+                        project_id, loaded, written, deleted, (time.time() - start) * 1000)
+        return workspace
+
+    @asynccontextmanager
+    async def use(
+        self, project_id: str, changes: dict[str, str | None] | None = None, full_sync: bool = False,
+    ) -> AsyncIterator[Workspace]:
+        """Prepare the workspace and keep it from being evicted while a run uses it."""
+        project_id = validate_project_id(project_id)
+        self._in_use[project_id] = self._in_use.get(project_id, 0) + 1
+        try:
+            yield await self.prepare(project_id, changes, full_sync)
+        finally:
+            self._in_use[project_id] -= 1
+            if not self._in_use[project_id]:
+                del self._in_use[project_id]
+            evicting = self._evict_task is not None and not self._evict_task.done()
+            if not evicting and time.time() - self._last_evict > self.evict_interval:
+                self._last_evict = time.time()
+                # Referenced so the task isn't garbage-collected mid-run
+                self._evict_task = asyncio.create_task(asyncio.to_thread(self.evict))
+
+    def evict(self) -> list[str]:
+        """Drop idle workspaces, least recently used first, until under quota and project cap,
+        then delete blobs no remaining workspace references. Returns evicted project ids."""
+        projects_dir = os.path.join(self.root, "projects")
+        workspaces = []
+        for name in os.listdir(projects_dir):
+            try:
+                workspaces.append(Workspace(self.root, name))
+            except ValueError:
+                logger.warning("Ignoring unexpected entry in workspace root  name=%s", name)
+        workspaces.sort(key=lambda w: w.last_used)
+        sizes = {w.project_id: _dir_size(w.dir) for w in workspaces}
+        total = sum(sizes.values()) + _dir_size(self.blobs)
+
+        evicted = []
+        with self._disk_lock:
+            for workspace in workspaces:
+                over_quota = total > self.quota_bytes
+                over_count = len(workspaces) - len(evicted) > self.max_projects
+                if not (over_quota or over_count):
+                    break
+                if workspace.project_id in self._in_use:
+                    continue
+                shutil.rmtree(workspace.dir, ignore_errors=True)
+                total -= sizes[workspace.project_id]
+                evicted.append(workspace.project_id)
+
+            # Re-read manifests: workspaces may have been updated while sizes were measured
+            referenced = {
+                digest
+                for w in workspaces if w.project_id not in evicted
+                for digest, *_ in Workspace(self.root, w.project_id).manifest.values()
+            }
+            removed_blobs = 0
+            for dirpath, _, filenames in os.walk(self.blobs):
+                for name in filenames:
+                    if name not in referenced:
+                        try:
+                            os.unlink(os.path.join(dirpath, name))
+                            removed_blobs += 1
+                        except OSError:
+                            continue
+        if evicted or removed_blobs:
+            logger.info("Workspace eviction  evicted=%d  blobs_removed=%d  size=%dMB",
+                        len(evicted), removed_blobs, total // (1024 * 1024))
+        return evicted
+
+
+_cache: WorkspaceCache | None = None
+
+
+def get_workspace_cache() -> WorkspaceCache:
+    global _cache
+    if _cache is None:
+        _cache = WorkspaceCache()
+    return _cache
@@ -0,0 +1,34 @@
+-- Baseline schema for RAG chunk storage, as used by rag/embeddings.py and
+-- rag/retriever.py. Requires the projects table (id uuid, file_contents jsonb).
+
+create extension if not exists vector;
+
+create table if not exists code_chunks (
+    id bigserial primary key,
+    project_id uuid not null references projects (id) on delete cascade,
+    file_path text not null,
+    chunk_index int not null,
+    content text not null,
+    embedding vector(1024),
+    created_at timestamptz not null default now()
+);
+
+create index if not exists code_chunks_project_id_idx on code_chunks (project_id);
+
+create or replace function match_code_chunks(
+    query_embedding vector(1024),
+    match_project_id uuid,
+    match_threshold float,
+    match_count int
+)
+returns table (id bigint, file_path text, chunk_index int, content text, similarity float)
+language sql stable
+as $$
+    select c.id, c.file_path, c.chunk_index, c.content,
+           1 - (c.embedding <=> query_embedding) as similarity
+    from code_chunks c
+    where c.project_id = match_project_id
+      and 1 - (c.embedding <=> query_embedding) > match_threshold
+    order by c.embedding <=> query_embedding
+    limit match_count;
+$$;
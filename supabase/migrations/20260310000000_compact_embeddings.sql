@@ -0,0 +1,65 @@
+-- Compact embedding storage (config.EMBEDDING_STORAGE = "float16" | "binary").
+-- Requires pgvector >= 0.7 for halfvec and binary_quantize.
+--
+-- embedding_half stores the vector as float16 (2 bytes/dim instead of 4).
+-- embedding_bits is derived from it: one sign bit per dimension, 128 bytes for
+-- 1024 dims, small enough to stay inline in the heap tuple while the halfvec is
+-- TOASTed. The binary RPC scans only the bits, then rescores the shortlisted
+-- rows exactly against embedding_half.
+
+alter table code_chunks alter column embedding drop not null;
+
+alter table code_chunks add column if not exists embedding_half halfvec(1024);
+
+alter table code_chunks add column if not exists embedding_bits bit(1024)
+    generated always as (binary_quantize(embedding_half)::bit(1024)) stored;
+
+-- Backfill existing rows. Once every writer uses a compact mode, reclaim the
+-- float32 space with: update code_chunks set embedding = null; vacuum full code_chunks;
+update code_chunks
+set embedding_half = embedding::halfvec(1024)
+where embedding_half is null and embedding is not null;
+
+create or replace function match_code_chunks_half(
+    query_embedding vector(1024),
+    match_project_id uuid,
+    match_threshold float,
+    match_count int
+)
+returns table (id bigint, file_path text, chunk_index int, content text, similarity float)
+language sql stable
+as $$
+    select c.id, c.file_path, c.chunk_index, c.content,
+           1 - (c.embedding_half <=> query_embedding::halfvec(1024)) as similarity
+    from code_chunks c
+    where c.project_id = match_project_id
+      and 1 - (c.embedding_half <=> query_embedding::halfvec(1024)) > match_threshold
+    order by c.embedding_half <=> query_embedding::halfvec(1024)
+    limit match_count;
+$$;
+
+create or replace function match_code_chunks_binary(
+    query_embedding vector(1024),
+    match_project_id uuid,
+    match_threshold float,
+    match_count int,
+    rescore_count int default 32
+)
+returns table (id bigint, file_path text, chunk_index int, content text, similarity float)
+language sql stable
+as $$
+    with candidates as (
+        select c.id
+        from code_chunks c
+        where c.project_id = match_project_id
+        order by c.embedding_bits <~> binary_quantize(query_embedding)::bit(1024)
+        limit greatest(rescore_count, match_count)
+    )
+    select c.id, c.file_path, c.chunk_index, c.content,
+           1 - (c.embedding_half <=> query_embedding::halfvec(1024)) as similarity
+    from candidates
+    join code_chunks c using (id)
+    where 1 - (c.embedding_half <=> query_embedding::halfvec(1024)) > match_threshold
+    order by c.embedding_half <=> query_embedding::halfvec(1024)
+    limit match_count;
+$$;
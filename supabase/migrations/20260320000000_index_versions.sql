@@ -0,0 +1,108 @@
+-- Versioned indexes: index_project writes a new version of a project's chunks
+-- next to the live one, then flips code_index_versions.active_version in a
+-- single statement. The match RPCs only read the active version, so readers
+-- never see a half-written or empty index. Older versions are deleted after
+-- the flip.
+
+alter table code_chunks add column if not exists index_version bigint not null default 0;
+
+create index if not exists code_chunks_project_version_idx on code_chunks (project_id, index_version);
+
+create table if not exists code_index_versions (
+    project_id uuid primary key references projects (id) on delete cascade,
+    active_version bigint not null,
+    updated_at timestamptz not null default now()
+);
+
+-- Make p_version the active version, unless a newer one is already active
+-- (a slower concurrent re-index must not roll the project back).
+-- Returns the version that is active afterwards.
+create or replace function activate_index_version(p_project_id uuid, p_version bigint)
+returns bigint
+language sql volatile
+as $$
+    insert into code_index_versions as v (project_id, active_version)
+    values (p_project_id, p_version)
+    on conflict (project_id) do update
+        set active_version = excluded.active_version, updated_at = now()
+        where v.active_version < excluded.active_version;
+
+    select active_version from code_index_versions where project_id = p_project_id;
+$$;
+
+-- Rows written before versioning have index_version 0 and no entry in
+-- code_index_versions, so they stay visible until the first re-index.
+create or replace function active_index_version(p_project_id uuid)
+returns bigint
+language sql stable
+as $$
+    select coalesce(
+        (select active_version from code_index_versions where project_id = p_project_id),
+        0
+    );
+$$;
+
+create or replace function match_code_chunks(
+    query_embedding vector(1024),
+    match_project_id uuid,
+    match_threshold float,
+    match_count int
+)
+returns table (id bigint, file_path text, chunk_index int, content text, similarity float)
+language sql stable
+as $$
+    select c.id, c.file_path, c.chunk_index, c.content,
+           1 - (c.embedding <=> query_embedding) as similarity
+    from code_chunks c
+    where c.project_id = match_project_id
+      and c.index_version = active_index_version(match_project_id)
+      and 1 - (c.embedding <=> query_embedding) > match_threshold
+    order by c.embedding <=> query_embedding
+    limit match_count;
+$$;
+
+create or replace function match_code_chunks_half(
+    query_embedding vector(1024),
+    match_project_id uuid,
+    match_threshold float,
+    match_count int
+)
+returns table (id bigint, file_path text, chunk_index int, content text, similarity float)
+language sql stable
+as $$
+    select c.id, c.file_path, c.chunk_index, c.content,
+           1 - (c.embedding_half <=> query_embedding::halfvec(1024)) as similarity
+    from code_chunks c
+    where c.project_id = match_project_id
+      and c.index_version = active_index_version(match_project_id)
+      and 1 - (c.embedding_half <=> query_embedding::halfvec(1024)) > match_threshold
+    order by c.embedding_half <=> query_embedding::halfvec(1024)
+    limit match_count;
+$$;
+
+create or replace function match_code_chunks_binary(
+    query_embedding vector(1024),
+    match_project_id uuid,
+    match_threshold float,
+    match_count int,
+    rescore_count int default 32
+)
+returns table (id bigint, file_path text, chunk_index int, content text, similarity float)
+language sql stable
+as $$
+    with candidates as (
+        select c.id
+        from code_chunks c
+        where c.project_id = match_project_id
+          and c.index_version = active_index_version(match_project_id)
+        order by c.embedding_bits <~> binary_quantize(query_embedding)::bit(1024)
+        limit greatest(rescore_count, match_count)
+    )
+    select c.id, c.file_path, c.chunk_index, c.content,
+           1 - (c.embedding_half <=> query_embedding::halfvec(1024)) as similarity
+    from candidates
+    join code_chunks c using (id)
+    where 1 - (c.embedding_half <=> query_embedding::halfvec(1024)) > match_threshold
+    order by c.embedding_half <=> query_embedding::halfvec(1024)
+    limit match_count;
+$$;
@@ -0,0 +1,32 @@
+-- Per-file re-indexing (POST /api/embeddings/files): swap one file's chunks in
+-- the project's active index version inside a single transaction, so readers
+-- see either the old or the new chunks of the file, never neither.
+-- p_rows is a JSON array of {chunk_index, content, embedding | embedding_half};
+-- an empty array just removes the file.
+
+create or replace function replace_file_chunks(p_project_id uuid, p_file_path text, p_rows jsonb)
+returns int
+language plpgsql volatile
+as $$
+declare
+    v_version bigint := active_index_version(p_project_id);
+    v_count int;
+begin
+    delete from code_chunks
+    where project_id = p_project_id
+      and index_version = v_version
+      and file_path = p_file_path;
+
+    insert into code_chunks (project_id, index_version, file_path, chunk_index, content, embedding, embedding_half)
+    select p_project_id, v_version, p_file_path, r.chunk_index, r.content, r.embedding, r.embedding_half
+    from jsonb_to_recordset(p_rows) as r(
+        chunk_index int,
+        content text,
+        embedding vector(1024),
+        embedding_half halfvec(1024)
+    );
+
+    get diagnostics v_count = row_count;
+    return v_count;
+end;
+$$;
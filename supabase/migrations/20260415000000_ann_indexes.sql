@@ -0,0 +1,167 @@
+-- Approximate nearest-neighbour search for large, multi-project tables.
+-- Requires pgvector >= 0.8 for iterative index scans (hnsw.iterative_scan).
+--
+-- Every match RPC filters on (project_id, index_version) and orders by vector
+-- distance. The planner now has two plans for that:
+--   * small projects: the (project_id, index_version, ...) btree below, then an
+--     exact sort of that project's rows; cost grows with the project, not the
+--     table
+--   * large projects: the HNSW index, walking the graph in distance order and
+--     dropping other projects' rows. Iterative scans keep walking until
+--     match_count rows survive the filter, instead of returning too few.
+-- ef_search (candidate list size) is a parameter of the RPCs so recall can be
+-- traded for latency per call (config.HNSW_EF_SEARCH).
+--
+-- Index builds are much faster when the graph fits in memory; on big tables
+-- raise maintenance_work_mem (e.g. '2GB') for this migration.
+
+-- One row per chunk per index version. A version is written next to the live
+-- one during a re-index, so index_version is part of the key. Drop duplicates
+-- left by retried inserts before enforcing it.
+delete from code_chunks c
+using code_chunks d
+where c.project_id = d.project_id
+  and c.index_version = d.index_version
+  and c.file_path = d.file_path
+  and c.chunk_index = d.chunk_index
+  and c.id > d.id;
+
+create unique index if not exists code_chunks_project_version_file_chunk_key
+    on code_chunks (project_id, index_version, file_path, chunk_index);
+
+-- Covered by the unique index above (same leading columns)
+drop index if exists code_chunks_project_version_idx;
+drop index if exists code_chunks_project_id_idx;
+
+create index if not exists code_chunks_embedding_hnsw_idx
+    on code_chunks using hnsw (embedding vector_cosine_ops) with (m = 16, ef_construction = 64);
+
+create index if not exists code_chunks_embedding_half_hnsw_idx
+    on code_chunks using hnsw (embedding_half halfvec_cosine_ops) with (m = 16, ef_construction = 64);
+
+create index if not exists code_chunks_embedding_bits_hnsw_idx
+    on code_chunks using hnsw (embedding_bits bit_hamming_ops) with (m = 16, ef_construction = 64);
+
+-- The RPCs gain an ef_search parameter; drop the old signatures so PostgREST
+-- doesn't see two overloads.
+drop function if exists match_code_chunks(vector, uuid, float, int);
+drop function if exists match_code_chunks_half(vector, uuid, float, int);
+drop function if exists match_code_chunks_binary(vector, uuid, float, int, int);
+
+-- The nearest rows are picked first and the similarity threshold applied
+-- afterwards: a threshold inside the index scan would make an iterative scan
+-- keep walking the graph looking for rows that don't exist. relaxed_order may
+-- return the candidates slightly out of order, so they are re-sorted.
+create or replace function match_code_chunks(
+    query_embedding vector(1024),
+    match_project_id uuid,
+    match_threshold float,
+    match_count int,
+    ef_search int default 40
+)
+returns table (id bigint, file_path text, chunk_index int, content text, similarity float)
+language plpgsql stable
+as $$
+#variable_conflict use_column
+declare
+    v_version bigint := active_index_version(match_project_id);
+begin
+    perform set_config('hnsw.ef_search', greatest(ef_search, match_count)::text, true);
+    perform set_config('hnsw.iterative_scan', 'relaxed_order', true);
+
+    return query
+    with nearest as materialized (
+        select c.id, c.file_path, c.chunk_index, c.content,
+               c.embedding <=> query_embedding as distance
+        from code_chunks c
+        where c.project_id = match_project_id
+          and c.index_version = v_version
+        order by c.embedding <=> query_embedding
+        limit match_count
+    )
+    select n.id, n.file_path, n.chunk_index, n.content, 1 - n.distance
+    from nearest n
+    where 1 - n.distance > match_threshold
+    order by n.distance;
+end;
+$$;
+
+create or replace function match_code_chunks_half(
+    query_embedding vector(1024),
+    match_project_id uuid,
+    match_threshold float,
+    match_count int,
+    ef_search int default 40
+)
+returns table (id bigint, file_path text, chunk_index int, content text, similarity float)
+language plpgsql stable
+as $$
+#variable_conflict use_column
+declare
+    v_version bigint := active_index_version(match_project_id);
+    v_query halfvec(1024) := query_embedding::halfvec(1024);
+begin
+    perform set_config('hnsw.ef_search', greatest(ef_search, match_count)::text, true);
+    perform set_config('hnsw.iterative_scan', 'relaxed_order', true);
+
+    return query
+    with nearest as materialized (
+        select c.id, c.file_path, c.chunk_index, c.content,
+               c.embedding_half <=> v_query as distance
+        from code_chunks c
+        where c.project_id = match_project_id
+          and c.index_version = v_version
+        order by c.embedding_half <=> v_query
+        limit match_count
+    )
+    select n.id, n.file_path, n.chunk_index, n.content, 1 - n.distance
+    from nearest n
+    where 1 - n.distance > match_threshold
+    order by n.distance;
+end;
+$$;
+
+create or replace function match_code_chunks_binary(
+    query_embedding vector(1024),
+    match_project_id uuid,
+    match_threshold float,
+    match_count int,
+    rescore_count int default 32,
+    ef_search int default 40
+)
+returns table (id bigint, file_path text, chunk_index int, content text, similarity float)
+language plpgsql stable
+as $$
+#variable_conflict use_column
+declare
+    v_version bigint := active_index_version(match_project_id);
+    v_query halfvec(1024) := query_embedding::halfvec(1024);
+    v_bits bit(1024) := binary_quantize(query_embedding)::bit(1024);
+    v_candidates int := greatest(rescore_count, match_count);
+begin
+    perform set_config('hnsw.ef_search', greatest(ef_search, v_candidates)::text, true);
+    perform set_config('hnsw.iterative_scan', 'relaxed_order', true);
+
+    return query
+    with candidates as materialized (
+        select c.id
+        from code_chunks c
+        where c.project_id = match_project_id
+          and c.index_version = v_version
+        order by c.embedding_bits <~> v_bits
+        limit v_candidates
+    ),
+    nearest as (
+        select c.id, c.file_path, c.chunk_index, c.content,
+               c.embedding_half <=> v_query as distance
+        from candidates k
+        join code_chunks c on c.id = k.id
+        order by c.embedding_half <=> v_query
+        limit match_count
+    )
+    select n.id, n.file_path, n.chunk_index, n.content, 1 - n.distance
+    from nearest n
+    where 1 - n.distance > match_threshold
+    order by n.distance;
+end;
+$$;
@@ -0,0 +1,65 @@
+-- Index generations: a counter per project that changes whenever the chunks
+-- the match RPCs can return change, i.e. when a new index version is activated
+-- and when replace_file_chunks rewrites a file in the active version. API
+-- workers key their retrieval caches on it (rag/retriever.py), so a re-index
+-- through one worker invalidates the cached results of all of them.
+
+alter table code_index_versions add column if not exists generation bigint not null default 0;
+
+-- Same as before, plus a generation bump. A project's first row starts at
+-- generation 1, since index_generation() reports 0 for projects without one.
+create or replace function activate_index_version(p_project_id uuid, p_version bigint)
+returns bigint
+language sql volatile
+as $$
+    insert into code_index_versions as v (project_id, active_version, generation)
+    values (p_project_id, p_version, 1)
+    on conflict (project_id) do update
+        set active_version = excluded.active_version, generation = v.generation + 1, updated_at = now()
+        where v.active_version < excluded.active_version;
+
+    select active_version from code_index_versions where project_id = p_project_id;
+$$;
+
+create or replace function index_generation(p_project_id uuid)
+returns bigint
+language sql stable
+as $$
+    select coalesce(
+        (select generation from code_index_versions where project_id = p_project_id),
+        0
+    );
+$$;
+
+create or replace function replace_file_chunks(p_project_id uuid, p_file_path text, p_rows jsonb)
+returns int
+language plpgsql volatile
+as $$
+declare
+    v_version bigint := active_index_version(p_project_id);
+    v_count int;
+begin
+    delete from code_chunks
+    where project_id = p_project_id
+      and index_version = v_version
+      and file_path = p_file_path;
+
+    insert into code_chunks (project_id, index_version, file_path, chunk_index, content, embedding, embedding_half)
+    select p_project_id, v_version, p_file_path, r.chunk_index, r.content, r.embedding, r.embedding_half
+    from jsonb_to_recordset(p_rows) as r(
+        chunk_index int,
+        content text,
+        embedding vector(1024),
+        embedding_half halfvec(1024)
+    );
+
+    get diagnostics v_count = row_count;
+
+    insert into code_index_versions as v (project_id, active_version, generation)
+    values (p_project_id, v_version, 1)
+    on conflict (project_id) do update
+        set generation = v.generation + 1, updated_at = now();
+
+    return v_count;
+end;
+$$;
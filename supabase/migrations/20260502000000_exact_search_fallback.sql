@@ -0,0 +1,174 @@
+-- Exact-search fallback for the match RPCs.
+--
+-- The HNSW indexes from 20260415000000_ann_indexes.sql cover the whole table,
+-- not one project: a filtered search walks the shared graph and drops other
+-- projects' rows. Iterative scans keep walking until match_count rows survive
+-- the filter, but only up to hnsw.max_scan_tuples (20000 by default). For a
+-- small project in a large table the walk can hit that cutoff first and the
+-- RPC silently returns fewer rows than the project has.
+--
+-- When the index scan comes back short, the RPCs now rerun the search exactly
+-- over the project's rows through the (project_id, index_version, ...) btree.
+-- Adding 0 to the distance keeps the planner from using the HNSW index for
+-- that ordering. A short result means the project is small or the cutoff hit
+-- on a sparse project, so the exact pass only ever scans few rows. The
+-- fallback's condition is evaluated once, before it is planned to run, so the
+-- common case pays nothing for it.
+
+create or replace function match_code_chunks(
+    query_embedding vector(1024),
+    match_project_id uuid,
+    match_threshold float,
+    match_count int,
+    ef_search int default 40
+)
+returns table (id bigint, file_path text, chunk_index int, content text, similarity float)
+language plpgsql stable
+as $$
+#variable_conflict use_column
+declare
+    v_version bigint := active_index_version(match_project_id);
+begin
+    perform set_config('hnsw.ef_search', greatest(ef_search, match_count)::text, true);
+    perform set_config('hnsw.iterative_scan', 'relaxed_order', true);
+
+    return query
+    with ann as materialized (
+        select c.id, c.file_path, c.chunk_index, c.content,
+               c.embedding <=> query_embedding as distance
+        from code_chunks c
+        where c.project_id = match_project_id
+          and c.index_version = v_version
+        order by c.embedding <=> query_embedding
+        limit match_count
+    ),
+    exact as materialized (
+        select c.id, c.file_path, c.chunk_index, c.content,
+               c.embedding <=> query_embedding as distance
+        from code_chunks c
+        where c.project_id = match_project_id
+          and c.index_version = v_version
+          and (select count(*) from ann) < match_count
+        order by (c.embedding <=> query_embedding) + 0
+        limit match_count
+    ),
+    nearest as (
+        select * from ann where (select count(*) from ann) >= match_count
+        union all
+        select * from exact
+    )
+    select n.id, n.file_path, n.chunk_index, n.content, 1 - n.distance
+    from nearest n
+    where 1 - n.distance > match_threshold
+    order by n.distance;
+end;
+$$;
+
+create or replace function match_code_chunks_half(
+    query_embedding vector(1024),
+    match_project_id uuid,
+    match_threshold float,
+    match_count int,
+    ef_search int default 40
+)
+returns table (id bigint, file_path text, chunk_index int, content text, similarity float)
+language plpgsql stable
+as $$
+#variable_conflict use_column
+declare
+    v_version bigint := active_index_version(match_project_id);
+    v_query halfvec(1024) := query_embedding::halfvec(1024);
+begin
+    perform set_config('hnsw.ef_search', greatest(ef_search, match_count)::text, true);
+    perform set_config('hnsw.iterative_scan', 'relaxed_order', true);
+
+    return query
+    with ann as materialized (
+        select c.id, c.file_path, c.chunk_index, c.content,
+               c.embedding_half <=> v_query as distance
+        from code_chunks c
+        where c.project_id = match_project_id
+          and c.index_version = v_version
+        order by c.embedding_half <=> v_query
+        limit match_count
+    ),
+    exact as materialized (
+        select c.id, c.file_path, c.chunk_index, c.content,
+               c.embedding_half <=> v_query as distance
+        from code_chunks c
+        where c.project_id = match_project_id
+          and c.index_version = v_version
+          and (select count(*) from ann) < match_count
+        order by (c.embedding_half <=> v_query) + 0
+        limit match_count
+    ),
+    nearest as (
+        select * from ann where (select count(*) from ann) >= match_count
+        union all
+        select * from exact
+    )
+    select n.id, n.file_path, n.chunk_index, n.content, 1 - n.distance
+    from nearest n
+    where 1 - n.distance > match_threshold
+    order by n.distance;
+end;
+$$;
+
+create or replace function match_code_chunks_binary(
+    query_embedding vector(1024),
+    match_project_id uuid,
+    match_threshold float,
+    match_count int,
+    rescore_count int default 32,
+    ef_search int default 40
+)
+returns table (id bigint, file_path text, chunk_index int, content text, similarity float)
+language plpgsql stable
+as $$
+#variable_conflict use_column
+declare
+    v_version bigint := active_index_version(match_project_id);
+    v_query halfvec(1024) := query_embedding::halfvec(1024);
+    v_bits bit(1024) := binary_quantize(query_embedding)::bit(1024);
+    v_candidates int := greatest(rescore_count, match_count);
+begin
+    perform set_config('hnsw.ef_search', greatest(ef_search, v_candidates)::text, true);
+    perform set_config('hnsw.iterative_scan', 'relaxed_order', true);
+
+    return query
+    with ann as materialized (
+        select c.id
+        from code_chunks c
+        where c.project_id = match_project_id
+          and c.index_version = v_version
+        order by c.embedding_bits <~> v_bits
+        limit v_candidates
+    ),
+    exact as materialized (
+        select c.id
+        from code_chunks c
+        where c.project_id = match_project_id
+          and c.index_version = v_version
+          and (select count(*) from ann) < v_candidates
+        order by (c.embedding_bits <~> v_bits) + 0
+        limit v_candidates
+    ),
+    candidates as (
+        select * from ann where (select count(*) from ann) >= v_candidates
+        union all
+        select * from exact
+    ),
+    nearest as (
+        select c.id, c.file_path, c.chunk_index, c.content,
+               c.embedding_half <=> v_query as distance
+        from candidates k
+        join code_chunks c on c.id = k.id
+        order by c.embedding_half <=> v_query
+        limit match_count
+    )
+    select n.id, n.file_path, n.chunk_index, n.content, 1 - n.distance
+    from nearest n
+    where 1 - n.distance > match_threshold
+    order by n.distance;
+end;
+$$;
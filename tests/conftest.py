@@ -0,0 +1,21 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from runner import jobs
+
+
+@pytest.fixture
+def terminal_client(tmp_path, monkeypatch):
+    """TestClient for the /api/terminal routes with a fresh job manager spilling under tmp_path."""
+    from api import terminal
+
+    monkeypatch.setattr(jobs, "JOB_DIR", str(tmp_path / "jobs"))
+    monkeypatch.setattr(jobs, "_process_dir", None)
+    monkeypatch.setattr(jobs, "job_manager", jobs.JobManager())
+    monkeypatch.setattr(terminal, "job_manager", jobs.job_manager)
+    monkeypatch.setattr(terminal, "limiter", terminal.ConcurrencyLimiter())
+    app = FastAPI()
+    app.include_router(terminal.router)
+    with TestClient(app) as client:
+        yield client
@@ -0,0 +1,78 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from evals.cache import LLMResponseCache
+from evals.config import EvalConfig
+from evals.datasets.base import EvalProblem
+from evals.results.reporter import profile_summary
+from evals.results.store import ResultsStore
+from evals.runners.baseline import BaselineRunner
+
+PROBLEM = EvalProblem(
+    task_id="HumanEval/0", prompt_for_model="def f():\n", test_code="", entry_point="f",
+    reference_solution="", benchmark="humaneval",
+)
+
+
+def _runner(value: dict) -> BaselineRunner:
+    """A runner whose requests are answered with `value` without calling the API."""
+    runner = BaselineRunner(EvalConfig(), LLMResponseCache(mode="off"))
+
+    async def complete(messages, n):
+        return (value.get("contents") or [value["content"]]), value
+
+    runner._complete = complete
+    return runner
+
+
+def test_samples_report_request_latency_and_amortized_share():
+    value = {
+        "contents": ["    return 1\n"] * 3,
+        "usage": {"prompt_tokens": 100, "completion_tokens": 302},
+        "seconds": 6.0,
+    }
+    results = asyncio.run(_runner(value).arun_samples(PROBLEM, 3))
+
+    assert [r.duration_seconds for r in results] == [6.0] * 3
+    assert [r.timings for r in results] == [{"generator": 6.0}] * 3
+    assert [r.amortized_seconds for r in results] == [pytest.approx(2.0)] * 3
+    # Token counts add up to the request's usage
+    assert [r.prompt_tokens for r in results] == [34, 33, 33]
+    assert [r.completion_tokens for r in results] == [102, 100, 100]
+
+
+def test_single_sample_has_no_amortized_share():
+    value = {"content": "    return 1\n", "usage": {"prompt_tokens": 10, "completion_tokens": 5}, "seconds": 1.5}
+    result = asyncio.run(_runner(value).arun(PROBLEM))
+    assert (result.duration_seconds, result.amortized_seconds) == (1.5, None)
+    assert (result.prompt_tokens, result.completion_tokens) == (10, 5)
+
+
+def test_throughput_counts_shared_requests_once():
+    shared = [
+        {"task_id": "a", "passed": True, "duration_seconds": 4.0, "amortized_seconds": 2.0, "completion_tokens": 50},
+        {"task_id": "a", "passed": False, "duration_seconds": 4.0, "amortized_seconds": 2.0, "completion_tokens": 50},
+    ]
+    single = [{"task_id": "b", "passed": True, "duration_seconds": 1.0, "amortized_seconds": None, "completion_tokens": 20}]
+    profile = profile_summary(shared + single)
+    assert profile["latency_seconds"]["p50"] == 4.0
+    assert profile["tokens_per_second"] == pytest.approx(120 / 5, abs=0.1)
+    assert profile["seconds_per_pass"] == 2.5
+
+
+def test_store_adds_amortized_column_to_existing_database(tmp_path):
+    path = tmp_path / "results.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE task_results (run_id TEXT, task_id TEXT, sample_index INTEGER, duration_seconds REAL)")
+    conn.execute("INSERT INTO task_results VALUES ('run', 'a', 0, 1.0)")
+    conn.commit()
+    conn.close()
+
+    store = ResultsStore(str(path))
+    rows = store.results("run", ("task_id", "duration_seconds", "amortized_seconds"))
+    assert rows == [{"task_id": "a", "duration_seconds": 1.0, "amortized_seconds": None}]
+    # Opening it again doesn't try to add the column twice
+    ResultsStore(str(path)).close()
+    store.close()
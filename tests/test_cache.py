@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+from evals.cache import CacheMiss, LLMResponseCache
+
+KEY = {"node": "generator", "model": "m", "temperature": 0.0, "messages": [{"role": "user", "content": "hi"}]}
+
+
+def test_record_then_replay(tmp_path):
+    path = str(tmp_path / "responses.jsonl")
+    recorder = LLMResponseCache(path, mode="record")
+    calls = []
+
+    def call():
+        calls.append(1)
+        return {"content": "hello", "usage": {"input_tokens": 1, "output_tokens": 2}}
+
+    first = recorder.get_or_call(KEY, call)
+    assert recorder.get_or_call(KEY, call) == first
+    assert len(calls) == 1
+    assert "seconds" in first
+
+    replay = LLMResponseCache(path, mode="replay")
+    assert replay.get_or_call(KEY, lambda: pytest.fail("replay called the model")) == first
+
+
+def test_replay_miss_raises(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "responses.jsonl"), mode="replay")
+
+    with pytest.raises(CacheMiss):
+        cache.get_or_call(KEY, lambda: pytest.fail("replay called the model"))
+
+    async def call():
+        pytest.fail("replay called the model")
+
+    with pytest.raises(CacheMiss):
+        asyncio.run(cache.aget_or_call({**KEY, "sample": 1}, call))
+    assert cache.misses == 2
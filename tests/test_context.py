@@ -0,0 +1,32 @@
+from rag.context import Segment, cut_at_score_gap, select_mmr
+
+
+def _segment(path: str, score: float, text: str = "x", start: int = 1) -> Segment:
+    return Segment(path, start, text.split("\n"), score)
+
+
+def test_cut_at_score_gap():
+    segments = [_segment("c", 0.5), _segment("a", 0.9), _segment("b", 0.85), _segment("d", 0.45)]
+    assert [s.file_path for s in cut_at_score_gap(segments, max_gap=0.2)] == ["a", "b"]
+    assert [s.file_path for s in cut_at_score_gap(segments, max_gap=0.5)] == ["a", "b", "c", "d"]
+    assert cut_at_score_gap([]) == []
+
+
+def test_select_mmr_prefers_diverse_segments():
+    duplicate = "def load_user(user_id): return db.users.get(user_id)"
+    segments = [
+        _segment("a.py", 0.9, duplicate),
+        _segment("b.py", 0.88, duplicate),
+        _segment("c.py", 0.8, "class PaymentGateway: charge refund"),
+    ]
+    selected = select_mmr(segments, token_budget=1000, max_segments=2, mmr_lambda=0.5)
+    assert [s.file_path for s in selected] == ["a.py", "c.py"]
+    # With lambda=1 only relevance counts
+    selected = select_mmr(segments, token_budget=1000, max_segments=2, mmr_lambda=1.0)
+    assert [s.file_path for s in selected] == ["a.py", "b.py"]
+
+
+def test_select_mmr_respects_token_budget():
+    segments = [_segment("big.py", 0.9, "y" * 400), _segment("small.py", 0.5, "z")]
+    # The oversized segment is skipped, the next one still fits
+    assert [s.file_path for s in select_mmr(segments, token_budget=50, max_segments=5)] == ["small.py"]
@@ -0,0 +1,47 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+import supabase
+
+from rag import db
+
+
+@pytest.fixture
+def clients(monkeypatch):
+    created = []
+
+    async def acreate_client(url, key, options=None):
+        await asyncio.sleep(0.01)  # let concurrent callers interleave
+        client = SimpleNamespace(postgrest=SimpleNamespace(session=httpx.AsyncClient(base_url="http://db.test")))
+        created.append(client)
+        return client
+
+    monkeypatch.setattr(supabase, "acreate_client", acreate_client)
+    monkeypatch.setattr(db, "_async_client", None)
+    monkeypatch.setattr(db, "_async_lock", asyncio.Lock())
+    return created
+
+
+def test_concurrent_first_callers_share_one_client(clients):
+    async def main():
+        results = await asyncio.gather(*(db.get_async_client() for _ in range(10)))
+        await db._async_client.postgrest.session.aclose()
+        return results
+
+    results = asyncio.run(main())
+    assert len(clients) == 1
+    assert all(client is clients[0] for client in results)
+
+
+def test_client_session_uses_pool_limits(clients):
+    async def main():
+        client = await db.get_async_client()
+        session = client.postgrest.session
+        await session.aclose()
+        return session
+
+    session = asyncio.run(main())
+    assert str(session.base_url) == "http://db.test"
+    assert session._transport._pool._max_connections == db.SUPABASE_POOL_SIZE
@@ -0,0 +1,80 @@
+import base64
+import json
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api import embed as embed_api
+from api.embed import JSON, MSGPACK, OCTET_STREAM, encode_embeddings, negotiate
+
+EMBEDDINGS = np.array([[0.5, -0.25, 1.0], [0.0, 2.0, -1.5]], dtype=np.float32)
+
+
+@pytest.mark.parametrize("accept, expected", [
+    ("", JSON),
+    ("application/json", JSON),
+    ("*/*", JSON),
+    ("text/html", JSON),
+    ("application/octet-stream", OCTET_STREAM),
+    ("application/x-msgpack", MSGPACK),
+    ("application/vnd.msgpack, application/json", MSGPACK),
+    ("application/json, application/msgpack", JSON),
+    ("application/json;q=0.1, application/x-msgpack", MSGPACK),
+    ("application/msgpack;q=0.5, application/octet-stream;q=0.9, */*;q=0.1", OCTET_STREAM),
+    ("application/octet-stream;q=0, application/json;q=0.2", JSON),
+    ("Application/Octet-Stream ; Q=0.8, application/json;q=0.7", OCTET_STREAM),
+    ("application/msgpack;q=abc, application/json;q=0.9", MSGPACK),
+])
+def test_negotiate(accept, expected):
+    assert negotiate(accept) == expected
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+def test_binary_round_trip(dtype):
+    response = encode_embeddings(EMBEDDINGS, OCTET_STREAM, "float", dtype, "embeddings")
+    assert response.headers["x-embedding-shape"] == "2,3"
+    assert response.headers["x-embedding-dtype"] == dtype
+    decoded = np.frombuffer(response.body, dtype=np.dtype(dtype).newbyteorder("<")).reshape(2, 3)
+    np.testing.assert_array_equal(decoded, EMBEDDINGS.astype(dtype))
+
+
+def test_msgpack_round_trip():
+    msgpack = pytest.importorskip("msgpack")
+    response = encode_embeddings(EMBEDDINGS, MSGPACK, "float", "float16", "embeddings")
+    body = msgpack.unpackb(response.body)
+    assert body["shape"] == [2, 3] and body["dtype"] == "float16"
+    decoded = np.frombuffer(body["embeddings"], dtype="<f2").reshape(body["shape"])
+    np.testing.assert_array_equal(decoded, EMBEDDINGS.astype(np.float16))
+
+
+def test_json_float_and_base64():
+    body = json.loads(encode_embeddings(EMBEDDINGS, JSON, "float", "float32", "embeddings").body)
+    assert body == {"embeddings": EMBEDDINGS.tolist()}
+
+    body = json.loads(encode_embeddings(EMBEDDINGS, JSON, "base64", "float32", "embeddings").body)
+    rows = [np.frombuffer(base64.b64decode(v), dtype="<f4") for v in body["embeddings"]]
+    np.testing.assert_array_equal(np.stack(rows), EMBEDDINGS)
+
+    # A single vector is one string, not a list
+    body = json.loads(encode_embeddings(EMBEDDINGS[0], JSON, "base64", "float16", "embedding").body)
+    np.testing.assert_array_equal(np.frombuffer(base64.b64decode(body["embedding"]), dtype="<f2"),
+                                  EMBEDDINGS[0].astype(np.float16))
+
+
+def test_endpoint_negotiates(monkeypatch):
+    monkeypatch.setattr(embed_api, "embed_array", lambda texts, prefix: EMBEDDINGS[: len(texts)])
+    app = FastAPI()
+    app.include_router(embed_api.router)
+    client = TestClient(app)
+
+    response = client.post("/api/embed", json={"texts": ["a", "b"]},
+                           headers={"Accept": "application/json;q=0.1, application/octet-stream"})
+    assert response.headers["content-type"] == OCTET_STREAM
+    assert len(response.content) == EMBEDDINGS.nbytes
+
+    response = client.post("/api/embed", json={"texts": ["a"]})
+    assert response.json() == {"embeddings": EMBEDDINGS[:1].tolist()}
+
+    assert client.post("/api/embed", json={"texts": []}).status_code == 400
@@ -0,0 +1,40 @@
+import pytest
+
+from rag.file_filter import compile_ignore, is_ignored
+
+RULES = compile_ignore([
+    "# build output",
+    "",
+    "*.log",
+    "!keep.log",
+    "build/",
+    "/secrets.txt",
+    "docs/**/*.tmp",
+    "node_modules",
+])
+
+
+@pytest.mark.parametrize("path, ignored", [
+    ("app.log", True),
+    ("logs/deep/app.log", True),
+    ("logs/keep.log", False),
+    ("build/out.js", True),
+    ("src/build/out.js", True),
+    ("build", False),  # dir/ patterns only match directories
+    ("secrets.txt", True),
+    ("config/secrets.txt", False),  # anchored to the project root
+    ("docs/a/b/x.tmp", True),
+    ("docs/x.tmp", True),
+    ("other/x.tmp", False),
+    ("web/node_modules/react/index.js", True),
+    ("./app.log", True),
+    ("src/main.py", False),
+])
+def test_is_ignored(path, ignored):
+    assert is_ignored(path, RULES) is ignored
+
+
+def test_last_matching_rule_wins():
+    rules = compile_ignore(["!important.log", "*.log"])
+    assert is_ignored("important.log", rules)
+    assert not is_ignored("important.log", compile_ignore(["*.log", "!important.log"]))
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from rag.file_queue import FileIndexQueue
+
+
+class Recorder:
+    def __init__(self, fail: bool = False):
+        self.calls: list[tuple[str, list[dict]]] = []
+        self.fail = fail
+
+    async def __call__(self, project_id: str, entries: list[dict]) -> dict[str, int]:
+        self.calls.append((project_id, entries))
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise RuntimeError("index failed")
+        return {entry["path"]: len(entry["content"]) for entry in entries}
+
+
+def test_saves_within_delay_collapse_to_latest():
+    index = Recorder()
+
+    async def main():
+        queue = FileIndexQueue(index, delay=0.05, max_delay=1.0)
+        futures = [queue.submit("p", {"path": "a.py", "content": "x" * n}) for n in (1, 2, 3)]
+        other = queue.submit("p", {"path": "b.py", "content": "yy"})
+        results = await asyncio.gather(*futures, other)
+        return queue, results
+
+    queue, results = asyncio.run(main())
+    assert results == [3, 3, 3, 2]
+    assert sorted(entries[0]["path"] for _, entries in index.calls) == ["a.py", "b.py"]
+    assert [e["content"] for _, entries in index.calls for e in entries if e["path"] == "a.py"] == ["xxx"]
+    # Finished keys leave no state behind
+    assert not queue._pending and not queue._timers and not queue._locks and not queue._lock_users
+
+
+def test_max_delay_flushes_continuous_saves():
+    index = Recorder()
+
+    async def main():
+        queue = FileIndexQueue(index, delay=0.05, max_delay=0.12)
+        for n in range(10):
+            queue.submit("p", {"path": "a.py", "content": str(n)})
+            await asyncio.sleep(0.03)
+        await asyncio.sleep(0.1)
+
+    asyncio.run(main())
+    # Saves every 30ms never leave a 50ms gap, yet the file is indexed along the way
+    assert 2 <= len(index.calls) <= 4
+    assert index.calls[-1][1][0]["content"] == "9"
+
+
+def test_failure_propagates_to_waiters():
+    async def main():
+        queue = FileIndexQueue(Recorder(fail=True), delay=0.01, max_delay=1.0)
+        with pytest.raises(RuntimeError):
+            await queue.submit("p", {"path": "a.py", "content": "x"})
+
+    asyncio.run(main())
@@ -0,0 +1,111 @@
+import asyncio
+import json
+
+import pytest
+
+from rag import embeddings
+from rag.embeddings import batch_rows, insert_rows
+
+# The retry delays are patched out below; the fake database still needs to yield
+_sleep = asyncio.sleep
+
+
+def _rows(count: int, content: str = "x") -> list[dict]:
+    return [{"chunk_index": i, "content": content} for i in range(count)]
+
+
+def test_batch_rows_by_count():
+    batches = batch_rows(_rows(5), max_rows=2, max_bytes=10_000)
+    assert [len(b) for b in batches] == [2, 2, 1]
+    assert [r["chunk_index"] for b in batches for r in b] == list(range(5))
+
+
+def test_batch_rows_by_payload_size():
+    rows = _rows(6, content="y" * 100)
+    row_bytes = len(json.dumps(rows[0]))
+    batches = batch_rows(rows, max_rows=100, max_bytes=row_bytes * 2 + 1)
+    assert [len(b) for b in batches] == [2, 2, 2]
+    assert all(sum(len(json.dumps(r)) for r in b) <= row_bytes * 2 + 1 for b in batches)
+
+
+def test_batch_rows_oversized_row_goes_alone():
+    rows = [{"content": "a"}, {"content": "b" * 1000}, {"content": "c"}]
+    assert [len(b) for b in batch_rows(rows, max_rows=10, max_bytes=100)] == [1, 1, 1]
+    assert batch_rows([], max_rows=10, max_bytes=100) == []
+
+
+class FakeTable:
+    def __init__(self, db: "FakeDB"):
+        self.db = db
+
+    def upsert(self, batch, **kwargs):
+        self.batch = batch
+        self.db.kwargs = kwargs
+        return self
+
+    async def execute(self):
+        db = self.db
+        db.attempts += 1
+        db.in_flight += 1
+        db.max_in_flight = max(db.max_in_flight, db.in_flight)
+        try:
+            await _sleep(0.01)
+            if db.failures:
+                db.failures -= 1
+                raise ConnectionError("connection reset")
+            db.rows.extend(self.batch)
+        finally:
+            db.in_flight -= 1
+
+
+class FakeDB:
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.attempts = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.rows: list[dict] = []
+        self.kwargs: dict = {}
+
+    def table(self, name: str) -> FakeTable:
+        assert name == "code_chunks"
+        return FakeTable(self)
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    delays = []
+
+    async def sleep(seconds):
+        delays.append(seconds)
+        await _sleep(0)
+
+    monkeypatch.setattr(embeddings.asyncio, "sleep", sleep)
+    monkeypatch.setattr(embeddings, "INSERT_RETRY_BASE_DELAY", 1.0)
+    monkeypatch.setattr(embeddings, "INSERT_MAX_RETRIES", 3)
+    return delays
+
+
+def test_insert_retries_with_backoff(fast_retries):
+    db = FakeDB(failures=2)
+    assert asyncio.run(insert_rows(db, _rows(3))) == 1
+    assert db.attempts == 3 and len(db.rows) == 3
+    # Exponential backoff with up to 100% jitter
+    assert len(fast_retries) == 2
+    assert 1.0 <= fast_retries[0] <= 2.0 and 2.0 <= fast_retries[1] <= 4.0
+
+
+def test_insert_gives_up_after_max_retries():
+    db = FakeDB(failures=10)
+    with pytest.raises(ConnectionError):
+        asyncio.run(insert_rows(db, _rows(3)))
+    assert db.attempts == 4
+
+
+def test_insert_rows_bounds_concurrency(monkeypatch):
+    monkeypatch.setattr(embeddings, "INSERT_BATCH_SIZE", 2)
+    monkeypatch.setattr(embeddings, "INSERT_CONCURRENCY", 3)
+    db = FakeDB()
+    assert asyncio.run(insert_rows(db, _rows(20))) == 10
+    assert sorted(r["chunk_index"] for r in db.rows) == list(range(20))
+    assert db.max_in_flight == 3
@@ -0,0 +1,214 @@
+import asyncio
+import functools
+import os
+import time
+
+import pytest
+
+from runner import jobs
+from runner.jobs import JobManager, OutputBuffer, remove_stale_job_dirs
+
+
+@pytest.fixture
+def job_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_DIR", str(tmp_path / "jobs"))
+    monkeypatch.setattr(jobs, "_process_dir", None)
+    return tmp_path / "jobs"
+
+
+def _produce(*chunks: str, gate: asyncio.Event | None = None):
+    """A job's output: chunks, waiting for gate (if given) before the last one."""
+    async def produce(job):
+        for i, chunk in enumerate(chunks):
+            if gate is not None and i == len(chunks) - 1:
+                await gate.wait()
+            yield chunk
+        job.exit_code = 0
+
+    return produce
+
+
+async def _read_all(job, offset: int = 0) -> str:
+    return "".join([chunk async for chunk in job.follow(offset)])
+
+
+# -- OutputBuffer ---------------------------------------------------------
+
+
+def test_segments_rotate_and_start_moves_forward(tmp_path):
+    buffer = OutputBuffer(str(tmp_path / "out"), memory_bytes=8, disk_bytes=40)
+    data = bytes(range(100))
+
+    async def main():
+        for i in range(0, 100, 10):
+            await buffer.append(data[i:i + 10])
+
+    asyncio.run(main())
+    # Two segments of 20 bytes are kept; everything before them was dropped
+    assert buffer.total == 100
+    assert buffer.start == 60
+    assert sorted(os.listdir(tmp_path)) == ["out.60.log", "out.80.log"]
+    # Reads stop at the end of a segment
+    assert buffer.read(0) == (60, data[60:80])
+    assert buffer.read(80) == (80, data[80:])
+    assert buffer.read(75, limit=3) == (75, data[75:78])
+
+    buffer.remove()
+    assert os.listdir(tmp_path) == []
+
+
+def test_replay_from_disk_and_memory(tmp_path):
+    buffer = OutputBuffer(str(tmp_path / "out"), memory_bytes=16, disk_bytes=1024)
+    data = b"".join(b"line %02d\n" % i for i in range(20))
+    asyncio.run(buffer.append(data))
+
+    # Older output only exists on disk, the tail is served from memory
+    assert not buffer.in_memory(0)
+    assert buffer.in_memory(len(data) - 16)
+    assert buffer.read(0, limit=len(data)) == (0, data)
+    assert buffer.read(len(data) - 16) == (len(data) - 16, data[-16:])
+    # A read crossing from disk into memory stops at the end of the segment
+    offset, chunk = buffer.read(len(data) - 20)
+    assert data[offset:offset + len(chunk)] == chunk
+
+
+def test_memory_only_buffer_drops_old_output(tmp_path):
+    buffer = OutputBuffer(str(tmp_path / "out"), memory_bytes=4, disk_bytes=0)
+    asyncio.run(buffer.append(b"abcdefgh"))
+    assert buffer.start == 4
+    assert buffer.read(0) == (4, b"efgh")
+    assert os.listdir(tmp_path) == []
+
+
+# -- following jobs -------------------------------------------------------
+
+
+def test_follow_reattaches_at_offset(job_dir):
+    async def main():
+        manager = JobManager()
+        job, _ = manager.start(_produce("hello ", "wörld\n", "bye\n"), "cmd")
+        full = await _read_all(job)
+        encoded = full.encode()
+        assert full == "hello wörld\nbye\n"
+        assert await _read_all(job, 6) == "wörld\nbye\n"
+        assert await _read_all(job, len(encoded) - 4) == "bye\n"
+        assert await _read_all(job, len(encoded)) == ""
+
+    asyncio.run(main())
+
+
+def test_follow_replays_dropped_memory_from_disk(job_dir, monkeypatch):
+    monkeypatch.setattr(jobs, "OutputBuffer", functools.partial(OutputBuffer, memory_bytes=8, disk_bytes=4096))
+    lines = [f"line {i}\n" for i in range(50)]
+
+    async def main():
+        job, _ = JobManager().start(_produce(*lines), "cmd")
+        await job._task
+        assert not job.buffer.in_memory(0)
+        assert await _read_all(job) == "".join(lines)
+
+    asyncio.run(main())
+
+
+def test_follow_past_the_end_waits_for_new_output(job_dir):
+    async def main():
+        gate = asyncio.Event()
+        job, _ = JobManager().start(_produce("abc", "def", gate=gate), "cmd")
+        while job.buffer.total < 3:
+            await asyncio.sleep(0.01)
+
+        follower = asyncio.create_task(_read_all(job, 1000))
+        await asyncio.sleep(0.05)
+        gate.set()
+        assert await asyncio.wait_for(follower, 5) == "def"
+
+    asyncio.run(main())
+
+
+def test_offset_header_is_clamped_to_output(terminal_client):
+    job = terminal_client.post("/api/terminal/jobs", json={"command": "printf abc"}).json()
+    output = terminal_client.get(f"/api/terminal/jobs/{job['jobId']}/output")
+    total = len(output.content)
+
+    response = terminal_client.get(f"/api/terminal/jobs/{job['jobId']}/output", params={"offset": total + 100})
+    assert response.headers["X-Job-Offset"] == str(total)
+    assert response.text == ""
+
+
+# -- JobManager -----------------------------------------------------------
+
+
+def test_find_dedupes_running_jobs_by_client_key(job_dir):
+    async def main():
+        manager = JobManager()
+        gate = asyncio.Event()
+        job, created = manager.start(_produce("a", "b", gate=gate), "cmd", "p1", "key")
+        assert created
+
+        again, created = manager.start(_produce("x"), "cmd", "p1", "key")
+        assert (again, created) == (job, False)
+        assert manager.find("key", "p1") is job
+        # Keys are scoped to the project, and no key never matches
+        assert manager.find("key", "p2") is None
+        assert manager.find(None, "p1") is None
+        other, created = manager.start(_produce("x"), "cmd", "p1")
+        assert created and other is not job
+
+        gate.set()
+        await job._task
+        # A finished job is not reattached to: the same key starts a new run
+        assert manager.find("key", "p1") is None
+        rerun, created = manager.start(_produce("x"), "cmd", "p1", "key")
+        assert created and rerun is not job
+        await asyncio.gather(other._task, rerun._task)
+
+    asyncio.run(main())
+
+
+def test_prune_keeps_newest_finished_jobs(job_dir, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_MAX_FINISHED", 2)
+
+    async def main():
+        manager = JobManager()
+        started = [manager.start(_produce("out\n"), f"cmd {i}")[0] for i in range(4)]
+        await asyncio.gather(*(job._task for job in started))
+        for i, job in enumerate(started):
+            job.finished_at = time.time() - 40 + 10 * i
+        gate = asyncio.Event()
+        running, _ = manager.start(_produce("a", "b", gate=gate), "running")
+
+        assert set(manager.jobs) == {started[2].id, started[3].id, running.id}
+        # Dropped jobs' output files are gone
+        for job in started[:2]:
+            assert not any(os.path.exists(path) for _, path in job.buffer._segments)
+            assert not any(name.startswith(job.id) for name in os.listdir(jobs.process_job_dir()))
+
+        # Past the retention time, finished jobs go regardless of the count
+        monkeypatch.setattr(jobs, "JOB_RETENTION", 15)
+        manager.prune()
+        assert set(manager.jobs) == {started[3].id, running.id}
+
+        gate.set()
+        await running._task
+
+    asyncio.run(main())
+
+
+def test_remove_stale_job_dirs(job_dir):
+    own = jobs.process_job_dir()
+    old = time.time() - 3600
+    for name in ("gone", "alive", os.path.basename(own)):
+        path = job_dir / name
+        path.mkdir(parents=True)
+        (path / "job.0.log").write_bytes(b"x")
+    for path in (job_dir / "gone", job_dir / "gone" / "job.0.log", job_dir / "alive", job_dir / own):
+        os.utime(path, (old, old))
+    (job_dir / "stray.txt").write_text("not a job dir")
+
+    # "alive" still has a recently written file; this process's own dir is never removed
+    assert remove_stale_job_dirs(max_age=60) == 1
+    assert sorted(os.listdir(job_dir)) == sorted(["alive", os.path.basename(own), "stray.txt"])
+
+
+def test_remove_stale_job_dirs_without_job_dir(job_dir):
+    assert remove_stale_job_dirs() == 0
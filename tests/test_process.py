@@ -0,0 +1,222 @@
+import asyncio
+import os
+import tempfile
+import time
+
+import pytest
+
+from runner import process
+from runner.process import (
+    ConcurrencyLimiter, ProcessRun, QueueTimeout, make_run_dir, remove_run_dir, remove_stale_run_dirs,
+)
+
+
+def _alive(pid: int) -> bool:
+    """Running (not exited or a zombie waiting to be reaped)."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+def _wait_dead(pid: int, timeout: float = 3.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if not _alive(pid):
+            return True
+        time.sleep(0.02)
+    return False
+
+
+# -- concurrency limits ---------------------------------------------------
+
+
+def test_per_project_cap_queues_in_order():
+    async def main():
+        limiter = ConcurrencyLimiter(max_processes=10, max_per_project=1)
+        order = []
+
+        async def run(name: str, project: str):
+            await limiter.acquire(project, timeout=1)
+            order.append(name)
+            await asyncio.sleep(0.05)
+            limiter.release(project)
+
+        await asyncio.gather(run("a1", "a"), run("a2", "a"), run("b1", "b"), run("a3", "a"))
+        return order, limiter
+
+    order, limiter = asyncio.run(main())
+    assert [name for name in order if name.startswith("a")] == ["a1", "a2", "a3"]
+    # Project b doesn't wait behind project a
+    assert order.index("b1") < order.index("a2")
+    assert limiter._projects == {} and limiter._project_users == {}
+
+
+def test_global_cap():
+    async def main():
+        limiter = ConcurrencyLimiter(max_processes=2, max_per_project=5)
+        running = peak = 0
+
+        async def run(project: str):
+            nonlocal running, peak
+            await limiter.acquire(project, timeout=1)
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+            limiter.release(project)
+
+        await asyncio.gather(*(run(f"p{i}") for i in range(6)), run(None))
+        return peak
+
+    assert asyncio.run(main()) == 2
+
+
+def test_queue_timeout_leaves_no_state_behind():
+    async def main():
+        limiter = ConcurrencyLimiter(max_processes=1, max_per_project=1)
+        await limiter.acquire("a")
+        with pytest.raises(QueueTimeout):
+            await limiter.acquire("a", timeout=0.05)
+        # Waiting for the global slot times out too, and gives the project slot back
+        with pytest.raises(QueueTimeout):
+            await limiter.acquire("b", timeout=0.05)
+        assert set(limiter._projects) == {"a"}
+        limiter.release("a")
+        assert limiter._projects == {}
+        await limiter.acquire("b", timeout=0.05)
+        limiter.release("b")
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_releases_its_project():
+    async def main():
+        limiter = ConcurrencyLimiter(max_processes=1, max_per_project=1)
+        await limiter.acquire("a")
+        waiter = asyncio.create_task(limiter.acquire("a", timeout=5))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        limiter.release("a")
+        return limiter
+
+    assert asyncio.run(main())._projects == {}
+
+
+# -- process lifecycle -----------------------------------------------------
+
+
+def _background_pid(chunks: list[str]) -> int:
+    return int("".join(chunks).split()[0])
+
+
+def test_timeout_kills_the_process_group(monkeypatch):
+    monkeypatch.setattr(process, "TERMINAL_KILL_GRACE", 0.2)
+
+    async def main():
+        run = ProcessRun("sleep 30 & echo $!; sleep 30", cwd=os.getcwd(), env=dict(os.environ), timeout=0.3)
+        chunks = [chunk async for chunk in run.stream()]
+        return run, chunks
+
+    start = time.monotonic()
+    run, chunks = asyncio.run(main())
+    assert time.monotonic() - start < 5
+    assert run.stop_reason == "timeout"
+    assert "0.3s time limit" in run.status_message()
+    # The shell's background child was in the same group
+    assert _wait_dead(_background_pid(chunks))
+
+
+def test_sigterm_is_escalated_to_sigkill(monkeypatch):
+    monkeypatch.setattr(process, "TERMINAL_KILL_GRACE", 0.2)
+
+    async def main():
+        run = ProcessRun("trap '' TERM; sleep 30 & echo $!; wait", cwd=os.getcwd(), env=dict(os.environ), timeout=0.2)
+        return run, [chunk async for chunk in run.stream()]
+
+    run, chunks = asyncio.run(main())
+    assert run.exit_code == -9
+    assert _wait_dead(_background_pid(chunks))
+
+
+def test_disconnect_kills_the_process_group(monkeypatch):
+    monkeypatch.setattr(process, "TERMINAL_KILL_GRACE", 0.2)
+
+    async def main():
+        run = ProcessRun("sleep 30 & echo $!; sleep 30", cwd=os.getcwd(), env=dict(os.environ), timeout=30)
+        stream = run.stream()
+        first = await stream.__anext__()
+        # What StreamingResponse does when the client goes away
+        await stream.aclose()
+        await asyncio.sleep(0.5)  # let the SIGKILL timer fire
+        return run, first
+
+    run, first = asyncio.run(main())
+    assert run.stop_reason == "disconnected"
+    assert _wait_dead(run.process.pid)
+    assert _wait_dead(_background_pid([first]))
+
+
+def test_normal_exit_reaps_background_children():
+    async def main():
+        # The background child doesn't hold the output pipe, so the stream ends with the shell
+        run = ProcessRun("sleep 30 >/dev/null 2>&1 & echo $!", cwd=os.getcwd(), env=dict(os.environ), timeout=30)
+        return run, [chunk async for chunk in run.stream()]
+
+    run, chunks = asyncio.run(main())
+    assert run.exit_code == 0 and run.stop_reason is None and run.status_message() == ""
+    assert _wait_dead(_background_pid(chunks))
+
+
+# -- temp dirs --------------------------------------------------------------
+
+
+@pytest.fixture
+def temp_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    return tmp_path
+
+
+def test_run_dir_holds_the_file(temp_root):
+    run_dir, file_path = make_run_dir("pkg/main.py", "print(1)")
+    assert file_path == os.path.join(run_dir, "pkg", "main.py")
+    with open(file_path) as f:
+        assert f.read() == "print(1)"
+    remove_run_dir(run_dir)
+    assert not os.path.exists(run_dir)
+
+
+@pytest.mark.parametrize("name", ["../escape.py", "/etc/passwd", "a/../../escape.py"])
+def test_run_dir_rejects_paths_outside(temp_root, name):
+    with pytest.raises(ValueError):
+        make_run_dir(name, "x")
+    assert not [p for p in os.listdir(temp_root) if p.startswith(process.RUN_DIR_PREFIX)]
+    assert not os.path.exists(temp_root / "escape.py")
+
+
+def test_remove_stale_run_dirs_keeps_recent_ones(temp_root):
+    stale, _ = make_run_dir("a.py", "")
+    fresh, _ = make_run_dir("b.py", "")
+    other = temp_root / "unrelated"
+    other.mkdir()
+    old = time.time() - 3600
+    for path in (stale, str(other)):
+        os.utime(path, (old, old))
+
+    assert remove_stale_run_dirs(max_age=60) == 1
+    assert not os.path.exists(stale) and os.path.exists(fresh) and other.exists()
+
+
+def test_terminal_removes_run_dir_after_the_run(temp_root, terminal_client):
+    response = terminal_client.post("/api/terminal", json={
+        "command": 'cat "main.py"; echo; pwd',
+        "file": {"name": "main.py", "content": "print('hi')"},
+    })
+    assert response.text.startswith("print('hi')")
+    assert response.text.endswith("__EXIT_CODE__:0\n")
+    run_dir = response.text.splitlines()[1]
+    assert os.path.basename(run_dir).startswith(process.RUN_DIR_PREFIX)
+    assert not os.path.exists(run_dir)
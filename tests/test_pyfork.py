@@ -0,0 +1,116 @@
+import asyncio
+import os
+import sys
+import textwrap
+
+import pytest
+
+from runner.process import ProcessRun
+from runner.pyfork import ForkServerUnavailable, PythonForkServer, python_file_argv
+
+
+@pytest.mark.parametrize("command, argv", [
+    ("python main.py", ["main.py"]),
+    ("python3 src/app.py --n 3", ["src/app.py", "--n", "3"]),
+    ('python "my file.py" \'two words\'', ["my file.py", "two words"]),
+    ("  python   main.py  ", ["main.py"]),
+])
+def test_python_file_argv(command, argv):
+    assert python_file_argv(command) == argv
+
+
+@pytest.mark.parametrize("command", [
+    "python",
+    "python -m pytest",
+    "python -c 'print(1)'",
+    "python main.js",
+    "python2 main.py",
+    "/usr/bin/python main.py",
+    "node main.py",
+    "python main.py | head",
+    "python main.py > out.txt",
+    "python main.py && echo done",
+    "python main.py $HOME",
+    "python *.py",
+    "python 'main.py",  # unbalanced quote
+    "python main.py 'a;b'",  # shell characters go to the shell even when quoted
+    "FOO=1 python main.py",
+])
+def test_python_file_argv_leaves_other_commands_to_the_shell(command):
+    assert python_file_argv(command) is None
+
+
+SCRIPT = textwrap.dedent("""
+    import os, sys
+    print(__name__, sys.argv[1:], os.path.basename(os.getcwd()), os.environ.get("RUN_MARKER"))
+    print("to stderr", file=sys.stderr)
+    if len(sys.argv) > 1 and sys.argv[1] == "fail":
+        raise ValueError("boom")
+    sys.exit(int(sys.argv[1]) if len(sys.argv) > 1 else 0)
+""")
+
+
+@pytest.fixture
+def script_dir(tmp_path):
+    (tmp_path / "script.py").write_text(SCRIPT)
+    return tmp_path
+
+
+async def _run(command: str, cwd, forkserver=None, pty_mode: bool = False) -> ProcessRun:
+    # Runs go through the server's interpreter; the shell fallback resolves `python` on PATH
+    env = {**os.environ, "RUN_MARKER": "yes", "PATH": f"{os.path.dirname(sys.executable)}:{os.environ['PATH']}"}
+    run = ProcessRun(command, cwd=str(cwd), env=env, pty_mode=pty_mode, forkserver=forkserver)
+    run.output = "".join([chunk async for chunk in run.stream()])
+    return run
+
+
+def _with_forkserver(*runs: tuple[str, bool]) -> list[ProcessRun]:
+    """Run (command, cwd, pty_mode) triples on one forkserver, in one event loop."""
+    async def main():
+        server = PythonForkServer(preload=["json"])
+        try:
+            return [await _run(command, cwd, server, pty_mode) for command, cwd, pty_mode in runs]
+        finally:
+            await server.close()
+
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize("args, exit_code", [("", 0), (" 3", 3), (" fail", 1)])
+def test_forked_run_matches_the_shell_fallback(script_dir, args, exit_code):
+    [forked] = _with_forkserver((f"python script.py{args}", script_dir, False))
+    fallback = asyncio.run(_run(f"python script.py{args}", script_dir))
+
+    assert forked.forked and not fallback.forked
+    assert forked.exit_code == fallback.exit_code == exit_code
+    if args == " fail":
+        # The traceback shows the script's frames only, like a fresh interpreter
+        for run in (forked, fallback):
+            assert "ValueError: boom" in run.output and "runpy" not in run.output
+    else:
+        assert forked.output == fallback.output
+        assert forked.output.startswith(f"__main__ {args.split()} {script_dir.name} yes\n")
+
+
+def test_forked_runs_share_one_server(script_dir):
+    (script_dir / "tty.py").write_text("import sys\nprint(sys.stdout.isatty(), sys.stdin.isatty())\n")
+    runs = _with_forkserver(
+        ("python tty.py", script_dir, True),
+        ("python3 tty.py", script_dir, False),
+        # Not a plain script run: goes to the shell even with a forkserver
+        ("python script.py 2 && echo after", script_dir, False),
+    )
+    assert [run.forked for run in runs] == [True, True, False]
+    assert runs[0].output == "True False\n"
+    assert runs[1].output == "False False\n"
+    assert runs[2].exit_code == 2 and "after" not in runs[2].output
+
+
+def test_unavailable_forkserver_falls_back_to_the_shell(script_dir):
+    class BrokenForkServer(PythonForkServer):
+        async def start(self):
+            raise ForkServerUnavailable("forkserver failed to start")
+
+    run = asyncio.run(_run("python script.py 4", script_dir, BrokenForkServer()))
+    assert not run.forked and run.exit_code == 4
+    assert run.output.startswith("__main__ ['4']")
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from rag.quantization import (
+    LocalIndex, hamming_distances, match_rpc, storage_row, to_binary, to_float16,
+)
+
+
+def _normalized(count: int, dim: int = 64, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_to_binary_packs_sign_bits():
+    bits = to_binary([[0.5, -1.0, 0.0, 2.0, -0.1, 0.3, 0.2, -0.4, 1.0]])
+    assert bits.dtype == np.uint8
+    assert bits.tolist() == [[0b10010110, 0b10000000]]
+
+
+def test_hamming_distances():
+    query = to_binary([1.0] * 16)
+    bits = to_binary([[1.0] * 16, [-1.0] * 16, [1.0] * 8 + [-1.0] * 8])
+    assert hamming_distances(query, bits).tolist() == [0, 16, 8]
+
+
+def test_to_float16_halves_size():
+    vectors = _normalized(4)
+    assert to_float16(vectors).nbytes == vectors.nbytes // 2
+
+
+def test_storage_row_and_match_rpc():
+    assert storage_row([0.1], "float32") == {"embedding": [0.1]}
+    assert storage_row([0.1], "binary") == {"embedding_half": [0.1]}
+    name, params = match_rpc([0.1], "p", 0.5, 10, storage="binary")
+    assert name == "match_code_chunks_binary"
+    assert params["rescore_count"] > params["match_count"] == 10
+    assert "rescore_count" not in match_rpc([0.1], "p", 0.5, 10, storage="float16")[1]
+    with pytest.raises(ValueError):
+        match_rpc([0.1], "p", 0.5, 10, storage="int8")
+
+
+@pytest.mark.parametrize("storage", ["float32", "float16", "binary"])
+def test_local_index_finds_nearest(storage):
+    vectors = _normalized(500)
+    index = LocalIndex(storage=storage, rescore_multiplier=4)
+    index.add([{"id": i} for i in range(len(vectors))], vectors)
+
+    query = vectors[42] + 0.05 * _normalized(1, seed=1)[0]
+    query /= np.linalg.norm(query)
+    results = index.search(query, match_count=5)
+
+    assert results[0]["id"] == 42
+    assert [r["similarity"] for r in results] == sorted((r["similarity"] for r in results), reverse=True)
+    # Binary candidates are rescored against the stored half-precision vectors
+    assert results[0]["similarity"] == pytest.approx(float(vectors[42] @ query), abs=1e-2)
+
+
+def test_binary_rescore_recall_grows_with_multiplier():
+    vectors = _normalized(1000, dim=128)
+    queries = _normalized(20, dim=128, seed=2)
+    exact = LocalIndex("float32")
+    exact.add([{"id": i} for i in range(len(vectors))], vectors)
+
+    def recall(multiplier: int) -> float:
+        index = LocalIndex("binary", rescore_multiplier=multiplier)
+        index.add([{"id": i} for i in range(len(vectors))], vectors)
+        assert index.nbytes < exact.nbytes
+        return float(np.mean([
+            len({r["id"] for r in exact.search(q, 10)} & {r["id"] for r in index.search(q, 10)}) / 10
+            for q in queries
+        ]))
+
+    recalls = [recall(m) for m in (1, 4, 20)]
+    assert recalls == sorted(recalls)
+    # Once the hamming stage keeps every row, rescoring is exact up to float16 rounding
+    assert recall(100) >= 0.95
+
+
+def test_local_index_threshold_and_empty():
+    index = LocalIndex("float16")
+    assert index.search([1.0, 0.0], 3) == []
+    index.add([{"id": 0}, {"id": 1}], [[1.0, 0.0], [0.0, 1.0]])
+    assert [r["id"] for r in index.search([1.0, 0.0], 3, match_threshold=0.5)] == [0]
+    index.clear()
+    assert len(index) == 0 and index.search([1.0, 0.0], 3) == []
@@ -0,0 +1,53 @@
+import asyncio
+import time
+
+from evals.runners.rate_limit import RateLimiter
+
+
+def _acquire_times(limiter: RateLimiter, count: int, tokens: int = 0) -> list[float]:
+    async def main():
+        start = time.monotonic()
+        times = []
+
+        async def one():
+            await limiter.acquire(tokens)
+            times.append(time.monotonic() - start)
+
+        await asyncio.gather(*(one() for _ in range(count)))
+        return times
+
+    return asyncio.run(main())
+
+
+def test_unlimited_does_not_wait():
+    assert max(_acquire_times(RateLimiter(), 50, tokens=10_000)) < 0.05
+
+
+def test_requests_per_minute():
+    # A full bucket of 600/min serves 600 at once, then one every 0.1s
+    limiter = RateLimiter(requests_per_minute=600)
+    limiter._requests = 2
+    times = sorted(_acquire_times(limiter, 4))
+    assert times[1] < 0.05
+    assert 0.15 < times[3] < 0.4
+
+
+def test_tokens_per_minute_and_adjust():
+    limiter = RateLimiter(tokens_per_minute=6000)  # 100 tokens/s
+    assert _acquire_times(limiter, 1, tokens=6000)[0] < 0.05
+    # Charging 10 tokens more than estimated delays the next request by 0.1s
+    limiter.adjust(10)
+    waited = _acquire_times(limiter, 1, tokens=10)[0]
+    assert 0.15 < waited < 0.4
+
+
+def test_oversized_request_waits_for_full_bucket_only():
+    limiter = RateLimiter(tokens_per_minute=6000)
+    limiter._tokens = 5990
+    assert _acquire_times(limiter, 1, tokens=100_000)[0] < 0.3
+
+
+def test_pause_blocks_callers():
+    limiter = RateLimiter(requests_per_minute=600)
+    limiter.pause(0.2)
+    assert 0.15 < _acquire_times(limiter, 1)[0] < 0.4
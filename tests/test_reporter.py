@@ -0,0 +1,28 @@
+from math import comb
+
+import pytest
+
+from evals.results.reporter import pass_at_k, pass_at_k_summary
+
+
+@pytest.mark.parametrize("n, c, k", [(10, 3, 1), (10, 3, 5), (20, 1, 10), (5, 0, 1), (200, 37, 100)])
+def test_pass_at_k_matches_closed_form(n, c, k):
+    assert pass_at_k(n, c, k) == pytest.approx(1 - comb(n - c, k) / comb(n, k))
+
+
+def test_pass_at_k_edge_cases():
+    assert pass_at_k(5, 0, 1) == 0.0
+    assert pass_at_k(5, 5, 1) == 1.0
+    # Fewer failures than k: every draw of k samples contains a pass
+    assert pass_at_k(5, 3, 3) == 1.0
+
+
+def test_pass_at_k_summary_limits_k_to_smallest_sample_count():
+    details = [
+        {"task_id": "a", "passed": True}, {"task_id": "a", "passed": False},
+        {"task_id": "b", "passed": False}, {"task_id": "b", "passed": False},
+    ]
+    summary = pass_at_k_summary(details)
+    assert summary["pass@1"] == pytest.approx(0.25)
+    assert all(int(k.split("@")[1]) <= 2 for k in summary)
+    assert pass_at_k_summary([]) == {}
@@ -0,0 +1,93 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from evals.execution.sandbox import ExecResult
+from evals.rescore import ExecutionMemo, _run_result, flipped_tasks
+from evals.results.logger import TaskResult
+
+
+class FakeSandbox:
+    """Counts executions; a harness passes unless it contains "fail"."""
+
+    def __init__(self, gate: threading.Event | None = None):
+        self.calls: list[tuple[str, float]] = []
+        self.gate = gate
+
+    def execute(self, code: str, timeout: float = 10) -> ExecResult:
+        self.calls.append((code, timeout))
+        if self.gate is not None:
+            self.gate.wait(5)
+        return ExecResult(passed="fail" not in code)
+
+
+def _after(task_id: str, passed: bool) -> TaskResult:
+    return TaskResult(
+        task_id=task_id, benchmark="humaneval", mode="baseline", model="gpt", passed=passed,
+        generated_code="", extracted_code="", iterations=1, duration_seconds=1.0,
+        pipeline_error=None, exec_error=None, exec_traceback=None, timestamp="",
+    )
+
+
+def test_memo_runs_each_distinct_harness_once():
+    sandbox = FakeSandbox()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        memo = ExecutionMemo(sandbox, executor, timeout=3)
+        futures = [memo.submit(h) for h in ("assert 1", "assert 2", "assert 1", "fail", "assert 2")]
+        results = [f.result()[0].passed for f in futures]
+
+    assert results == [True, True, True, False, True]
+    assert futures[0] is futures[2] and futures[1] is futures[4]
+    assert len(memo) == 3
+    assert sorted(sandbox.calls) == [("assert 1", 3), ("assert 2", 3), ("fail", 3)]
+
+
+def test_memo_shares_an_execution_still_in_flight():
+    gate = threading.Event()
+    sandbox = FakeSandbox(gate)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        memo = ExecutionMemo(sandbox, executor, timeout=3)
+        first = memo.submit("assert 1")
+        second = memo.submit("assert 1")
+        assert first is second and not first.done()
+        gate.set()
+        assert first.result()[0].passed
+    assert len(sandbox.calls) == 1
+
+
+def test_memo_keys_include_the_timeout():
+    sandbox = FakeSandbox()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        short = ExecutionMemo(sandbox, executor, timeout=1)
+        long = ExecutionMemo(sandbox, executor, timeout=10)
+        short.submit("assert 1").result()
+        long.submit("assert 1").result()
+    assert sorted(sandbox.calls) == [("assert 1", 1), ("assert 1", 10)]
+
+
+def test_flipped_tasks_compare_any_sample_passing():
+    before = [
+        {"task_id": "fixed", "passed": False}, {"task_id": "fixed", "passed": False},
+        {"task_id": "broken", "passed": False}, {"task_id": "broken", "passed": True},
+        {"task_id": "same", "passed": True},
+        {"task_id": "dropped", "passed": True},
+    ]
+    after = [
+        _after("fixed", False), _after("fixed", True),
+        _after("broken", False), _after("broken", False),
+        _after("same", False), _after("same", True),
+    ]
+    # A task missing from the new run (e.g. no longer in the dataset) counts as broken
+    assert flipped_tasks(before, after) == {"fixed": ["fixed"], "broken": ["broken", "dropped"]}
+    assert flipped_tasks(before, []) == {"fixed": [], "broken": ["broken", "same", "dropped"]}
+
+
+def test_run_result_drops_the_old_execution_time():
+    row = {
+        "task_id": "T/0", "generated_code": "raw", "iterations": 2, "duration_seconds": 4.0,
+        "pipeline_error": None, "timings": {"generator": 3.0, "reviewer": 1.0, "execution": 0.5},
+        "prompt_tokens": 10, "completion_tokens": 20, "amortized_seconds": 2.0,
+    }
+    result = _run_result(row, "extracted")
+    assert result.extracted_code == "extracted" and result.generated_code == "raw"
+    assert result.timings == {"generator": 3.0, "reviewer": 1.0}
+    assert (result.duration_seconds, result.amortized_seconds) == (4.0, 2.0)
@@ -0,0 +1,59 @@
+import json
+from dataclasses import asdict
+
+from evals.results.logger import ResultLogger, TaskResult
+from evals.results.store import ResultsStore
+
+
+def _result(task_id: str, sample_index: int = 0, passed: bool = True) -> TaskResult:
+    return TaskResult(
+        task_id=task_id, benchmark="humaneval", mode="baseline", model="gpt", passed=passed,
+        generated_code="code", extracted_code="code", iterations=1, duration_seconds=1.0,
+        pipeline_error=None, exec_error=None, exec_traceback=None,
+        timestamp=f"2025-01-01T00:00:0{sample_index}", sample_index=sample_index,
+        timings={"generator": 1.0}, prompt_tokens=10, completion_tokens=20,
+    )
+
+
+def test_resume_drops_incomplete_tasks(tmp_path):
+    store = ResultsStore.for_output_dir(str(tmp_path))
+    store.start_run("run", "humaneval", "baseline", "gpt", started_at="2025-01-01")
+    store.add_results("run", [_result("a", 0), _result("a", 1), _result("b", 0)])
+
+    store.drop_incomplete("run", samples=2)
+
+    assert store.completed_tasks("run") == {"a"}
+    # The resumed logger starts from the surviving results
+    logger = ResultLogger(str(tmp_path), "run", store)
+    assert [(r.task_id, r.sample_index) for r in logger.results] == [("a", 0), ("a", 1)]
+    assert logger.results[0].timings == {"generator": 1.0}
+
+
+def test_rerun_replaces_samples(tmp_path):
+    store = ResultsStore.for_output_dir(str(tmp_path))
+    store.start_run("run", "humaneval", "baseline", "gpt", started_at="2025-01-01")
+    store.add_results("run", [_result("a", 0, passed=False)])
+    store.add_results("run", [_result("a", 0, passed=True)])
+
+    rows = store.results("run")
+    assert len(rows) == 1 and rows[0]["passed"] is True
+
+
+def test_import_dir(tmp_path):
+    details = tmp_path / "humaneval_baseline_1_details.jsonl"
+    details.write_text("\n".join(json.dumps(asdict(r)) for r in (_result("a"), _result("b", passed=False))) + "\n")
+    (tmp_path / "humaneval_baseline_1_summary.json").write_text(json.dumps({"pass_rate": 0.5}))
+    (tmp_path / "humaneval_baseline_2_details.jsonl").write_text(json.dumps(asdict(_result("a"))) + "\n")
+    store = ResultsStore.for_output_dir(str(tmp_path))
+
+    assert store.import_dir(str(tmp_path)) == ["humaneval_baseline_1", "humaneval_baseline_2"]
+    # Runs the store already has are skipped
+    assert store.import_dir(str(tmp_path)) == []
+
+    finished = store.run("humaneval_baseline_1")
+    assert finished["summary"] == {"pass_rate": 0.5}
+    assert finished["finished_at"] == "2025-01-01T00:00:00"
+    # Without a summary the run counts as incomplete
+    assert store.run("humaneval_baseline_2")["finished_at"] is None
+    assert set(store.latest_runs()) == {("humaneval", "baseline")}
+    assert [row["passed"] for row in store.results("humaneval_baseline_1")] == [True, False]
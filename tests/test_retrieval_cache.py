@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from rag import embed, retriever
+from rag.cache import TTLCache
+
+
+class FakeResult:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeRPC:
+    def __init__(self, db: "FakeDB", name: str, params: dict):
+        self.db, self.name, self.params = db, name, params
+
+    def execute(self):
+        self.db.calls.append(self.name)
+        if self.name == "index_generation":
+            return FakeResult(self.db.generation)
+        return FakeResult([{"file_path": "a.py", "content": f"generation {self.db.generation}"}])
+
+
+class AsyncFakeRPC(FakeRPC):
+    async def execute(self):
+        return super().execute()
+
+
+class FakeDB:
+    def __init__(self, rpc_cls=FakeRPC):
+        self.generation = 1
+        self.calls: list[str] = []
+        self.rpc_cls = rpc_cls
+
+    def rpc(self, name: str, params: dict):
+        return self.rpc_cls(self, name, params)
+
+    def searches(self) -> int:
+        return sum(name != "index_generation" for name in self.calls)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeDB()
+    monkeypatch.setattr(retriever, "get_client", lambda: db)
+    monkeypatch.setattr(retriever, "embed_query", lambda query: [0.0])
+    monkeypatch.setattr(retriever, "retrieval_cache", TTLCache(16, 300))
+    monkeypatch.setattr(retriever, "_generations", TTLCache(16, 300))
+    return db
+
+
+def test_repeated_query_is_cached(db):
+    first = retriever.retrieve_matches("p", "find  the parser")
+    assert retriever.retrieve_matches("p", "find the parser ") == first
+    assert db.searches() == 1
+    # A different project doesn't share the entry
+    retriever.retrieve_matches("q", "find the parser")
+    assert db.searches() == 2
+
+
+def test_local_invalidation(db):
+    retriever.retrieve_matches("p", "query")
+    db.generation = 2
+    retriever.invalidate_project("p")
+    assert retriever.retrieve_matches("p", "query")[0]["content"] == "generation 2"
+    assert db.searches() == 2
+
+
+def test_reindex_by_another_worker_invalidates_after_generation_ttl(db, monkeypatch):
+    monkeypatch.setattr(retriever, "_generations", TTLCache(16, 0.05))
+    retriever.retrieve_matches("p", "query")
+    # Another worker re-indexed: this process was not told, only the database knows
+    db.generation = 2
+    assert retriever.retrieve_matches("p", "query")[0]["content"] == "generation 1"
+    asyncio.run(asyncio.sleep(0.06))
+    assert retriever.retrieve_matches("p", "query")[0]["content"] == "generation 2"
+
+
+def test_async_path_shares_the_cache(db, monkeypatch):
+    async_db = FakeDB(AsyncFakeRPC)
+
+    async def get_async_client():
+        return async_db
+
+    monkeypatch.setattr(retriever, "get_async_client", get_async_client)
+    matches = retriever.retrieve_matches("p", "query")
+    assert asyncio.run(retriever.retrieve_matches_async("p", "query")) == matches
+    assert async_db.calls == []
+
+    retriever.invalidate_project("p")
+    async_db.generation = 3
+    assert asyncio.run(retriever.retrieve_matches_async("p", "query"))[0]["content"] == "generation 3"
+
+
+def test_embed_query_caches_on_normalized_text(monkeypatch):
+    seen = []
+
+    def embed_texts(texts, prefix="passage: "):
+        seen.append((texts, prefix))
+        return [[float(len(texts[0]))]]
+
+    monkeypatch.setattr(embed, "embed_texts", embed_texts)
+    monkeypatch.setattr(embed, "query_embedding_cache", TTLCache(16, 300))
+    assert embed.embed_query("  sort   a list ") == embed.embed_query("sort a list")
+    # The model sees the query as written, with the query prefix
+    assert seen == [(["  sort   a list "], "query: ")]
@@ -0,0 +1,64 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from evals.execution.pool import CRASH_RESULT, TIMEOUT_RESULT, SandboxLimits, SandboxPool
+
+
+@pytest.fixture(scope="module")
+def pool():
+    with SandboxPool(workers=2, recycle_after=3) as sandbox:
+        yield sandbox
+
+
+def test_results(pool):
+    assert pool.execute("assert 1 + 1 == 2").passed
+    failed = pool.execute("assert 1 == 2, 'nope'")
+    assert not failed.passed and failed.error == "AssertionError: nope"
+    assert pool.execute("raise KeyError('k')").error == "KeyError: 'k'"
+    assert pool.execute("def f(:\n    pass").error.startswith("SyntaxError")
+
+
+def test_timeout_and_crash(pool):
+    assert pool.execute("while True: pass", timeout=0.5) == TIMEOUT_RESULT
+    assert pool.execute("import os; os._exit(3)") == CRASH_RESULT
+    assert pool.execute("assert True").passed
+
+
+def test_workers_are_not_forked_from_this_process(pool):
+    # Worker processes come from the fork server, not from the (threaded) test process
+    for worker in pool._workers:
+        with open(f"/proc/{worker.process.pid}/stat") as f:
+            ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        assert ppid != os.getpid()
+
+
+def test_restarts_from_threads(pool):
+    # recycle_after=3: workers are restarted from executor threads many times over,
+    # while other threads keep submitting
+    stop = threading.Event()
+
+    def busy():
+        while not stop.is_set():
+            stop.wait(0.001)
+
+    spinner = threading.Thread(target=busy)
+    spinner.start()
+    try:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            codes = [f"assert {i} * 2 == {i * 2}" for i in range(40)] + ["while True: pass"] * 2
+            results = list(executor.map(lambda code: pool.execute(code, timeout=0.5), codes))
+    finally:
+        stop.set()
+        spinner.join()
+    assert all(r.passed for r in results[:40])
+    assert results[40:] == [TIMEOUT_RESULT] * 2
+    assert all(worker.process.is_alive() for worker in pool._workers)
+
+
+def test_rlimits_apply_to_harness():
+    with SandboxPool(workers=1, limits=SandboxLimits(memory_bytes=256 * 1024 * 1024)) as pool:
+        result = pool.execute("x = bytearray(512 * 1024 * 1024)")
+        assert result.error.startswith("MemoryError")
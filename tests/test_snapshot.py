@@ -0,0 +1,107 @@
+import functools
+import json
+
+import pytest
+
+from evals.datasets import base
+from evals.datasets.snapshot import FORMAT_VERSION, Snapshot, SnapshotError
+
+ROWS = [
+    ("T/0", {"prompt": "def a():\n", "tests": ["assert a() == 1"]}),
+    ("T/1", {"prompt": "def b():\n", "note": "ünïcode ✓"}),
+    ("T/2", {"prompt": "def c():\n", "tests": []}),
+]
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    snap = Snapshot("bench", str(tmp_path))
+    snap.write(ROWS, source="test")
+    return snap
+
+
+def test_write_and_read_round_trip(snapshot, tmp_path):
+    assert snapshot.exists
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["bench.snapshot", "bench.snapshot.json"]
+
+    reopened = Snapshot("bench", str(tmp_path))
+    assert reopened.index["count"] == 3
+    assert reopened.index["format"] == FORMAT_VERSION
+    assert reopened.task_ids() == ["T/0", "T/1", "T/2"]
+    assert reopened.read() == ROWS
+    reopened.verify()
+
+
+def test_read_selected_tasks_in_dataset_order(snapshot):
+    assert snapshot.read(["T/2", "T/0", "missing"]) == [ROWS[0], ROWS[2]]
+    assert snapshot.read([]) == []
+
+
+def test_verify_detects_changed_data(snapshot, tmp_path):
+    with open(snapshot.data_path, "r+b") as f:
+        f.seek(5)
+        byte = f.read(1)
+        f.seek(5)
+        f.write(bytes([byte[0] ^ 0xFF]))
+    with pytest.raises(SnapshotError, match="checksum"):
+        Snapshot("bench", str(tmp_path)).verify()
+
+
+def test_corrupt_record_raises_snapshot_error(snapshot):
+    entry = snapshot.index["tasks"][1]
+    with open(snapshot.data_path, "r+b") as f:
+        f.seek(entry[1])
+        f.write(b"\x00" * entry[2])
+    with pytest.raises(SnapshotError, match="T/1"):
+        snapshot.read()
+    # Other rows are still readable on their own
+    assert snapshot.read(["T/0"]) == [ROWS[0]]
+
+
+def test_missing_snapshot(tmp_path):
+    snap = Snapshot("absent", str(tmp_path))
+    assert not snap.exists
+    with pytest.raises(SnapshotError, match="No snapshot"):
+        snap.index
+
+
+def test_incompatible_format(snapshot, tmp_path):
+    with open(snapshot.index_path) as f:
+        index = json.load(f)
+    index["format"] = FORMAT_VERSION + 1
+    with open(snapshot.index_path, "w") as f:
+        json.dump(index, f)
+    with pytest.raises(SnapshotError, match="format"):
+        Snapshot("bench", str(tmp_path)).read()
+
+
+def test_rewrite_replaces_previous_snapshot(snapshot, tmp_path):
+    snapshot.write(ROWS[:1], source="test")
+    reopened = Snapshot("bench", str(tmp_path))
+    assert reopened.read() == ROWS[:1]
+    reopened.verify()
+    assert not any(p.name.endswith(".tmp") for p in tmp_path.iterdir())
+
+
+def test_dataset_prefers_snapshot(tmp_path, monkeypatch):
+    class Dataset(base.BenchmarkDataset):
+        name = "bench"
+        source_calls = 0
+
+        def source_rows(self):
+            Dataset.source_calls += 1
+            return ROWS
+
+        def to_problem(self, task_id, row):
+            raise NotImplementedError
+
+        def build_test_harness(self, problem, generated_code):
+            raise NotImplementedError
+
+    monkeypatch.setattr(base, "Snapshot", functools.partial(Snapshot, directory=str(tmp_path)))
+    assert Dataset().rows(["T/1"]) == [ROWS[1]]
+    assert Dataset.source_calls == 1
+
+    Snapshot("bench", str(tmp_path)).write(ROWS, source="test")
+    assert Dataset().rows(["T/1"]) == [ROWS[1]]
+    assert Dataset.source_calls == 1
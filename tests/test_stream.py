@@ -0,0 +1,98 @@
+import asyncio
+import os
+import sys
+
+from runner.stream import spawn, stream_output
+
+
+def _run(command: str, pty_mode: bool = False, **kwargs) -> tuple[list[str], int]:
+    async def main():
+        process, readers = await spawn(command, cwd=os.getcwd(), env=dict(os.environ), pty_mode=pty_mode)
+        chunks = [chunk async for chunk in stream_output(readers, **kwargs)]
+        return chunks, await process.wait()
+
+    return asyncio.run(main())
+
+
+def test_stdout_and_stderr_interleave_in_arrival_order():
+    chunks, code = _run("printf one; sleep 0.1; printf two >&2; sleep 0.1; printf three", flush_interval=0.01)
+    assert chunks == ["one", "two", "three"]
+    assert code == 0
+
+
+def test_large_stderr_does_not_block_stdout():
+    # More than a pipe buffer on stderr before anything on stdout
+    command = f"{sys.executable} -c \"import sys; sys.stderr.write('x' * 200000); print('done')\""
+    chunks, code = _run(command)
+    output = "".join(chunks)
+    assert output.count("x") == 200000 and output.endswith("done\n")
+    assert code == 0
+
+
+def test_pty_mode_merges_streams_on_a_tty():
+    command = f"{sys.executable} -c \"import sys; print(sys.stdout.isatty()); print('err', file=sys.stderr)\""
+    chunks, code = _run(command, pty_mode=True)
+    # \n is not translated to \r\n, so both modes produce the same text
+    assert "".join(chunks) == "True\nerr\n"
+    assert code == 0
+
+
+def _feed_later(reader: asyncio.StreamReader, writes: list[tuple[float, bytes | None]]) -> None:
+    loop = asyncio.get_running_loop()
+    for delay, data in writes:
+        if data is None:
+            loop.call_later(delay, reader.feed_eof)
+        else:
+            loop.call_later(delay, reader.feed_data, data)
+
+
+def _stream(writes: list[tuple[float, bytes | None]], **kwargs) -> list[str]:
+    async def main():
+        reader = asyncio.StreamReader()
+        _feed_later(reader, writes)
+        return [chunk async for chunk in stream_output([reader], **kwargs)]
+
+    return asyncio.run(main())
+
+
+def test_multibyte_characters_split_across_reads():
+    data = "é€😀".encode("utf-8")
+    writes = [(0.01 * (i + 1), data[i:i + 1]) for i in range(len(data))] + [(0.2, None)]
+    chunks = _stream(writes, flush_interval=0.001)
+    assert "".join(chunks) == "é€😀"
+    assert all("�" not in chunk for chunk in chunks)
+
+
+def test_truncated_character_at_eof_is_replaced():
+    assert "".join(_stream([(0.0, b"ok\xe2\x82"), (0.01, None)])) == "ok�"
+
+
+def test_small_writes_coalesce_within_flush_interval():
+    writes = [(0.0, b"a"), (0.01, b"b"), (0.02, b"c"), (0.3, b"d"), (0.4, None)]
+    assert _stream(writes, flush_interval=0.1) == ["abc", "d"]
+
+
+def test_flush_bytes_threshold_yields_before_interval():
+    async def main():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"x" * 10)
+        chunks = stream_output([reader], flush_interval=30, flush_bytes=8)
+        # Would wait 30s for the interval; the size threshold flushes right away
+        first = await asyncio.wait_for(chunks.__anext__(), 1)
+        reader.feed_eof()
+        return first, [chunk async for chunk in chunks]
+
+    first, rest = asyncio.run(main())
+    assert first == "x" * 10 and rest == []
+
+
+def test_exit_code_trailer(terminal_client):
+    response = terminal_client.post("/api/terminal", json={"command": "echo hi; echo oops >&2; exit 3"})
+    assert response.status_code == 200
+    assert response.text.startswith("hi\n") and "oops\n" in response.text
+    assert response.text.endswith("\n__EXIT_CODE__:3\n")
+
+
+def test_exit_code_trailer_on_success(terminal_client):
+    response = terminal_client.post("/api/terminal", json={"command": "true"})
+    assert response.text == "\n__EXIT_CODE__:0\n"
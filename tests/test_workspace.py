@@ -0,0 +1,143 @@
+import asyncio
+import os
+import uuid
+
+import pytest
+
+from runner.workspace import Workspace, WorkspaceCache, _dir_size, validate_project_id
+
+
+def _ids(n: int) -> list[str]:
+    return [str(uuid.uuid4()) for _ in range(n)]
+
+
+def _cache(root, files: dict[str, dict[str, str]] | None = None, **kwargs) -> WorkspaceCache:
+    async def loader(project_id: str) -> dict[str, str]:
+        return (files or {}).get(project_id, {})
+
+    return WorkspaceCache(root=str(root), loader=loader, **kwargs)
+
+
+def _prepare_all(cache: WorkspaceCache, project_ids: list[str]) -> None:
+    """Materialize the projects, least recently used first."""
+    async def main():
+        for project_id in project_ids:
+            await cache.prepare(project_id)
+
+    asyncio.run(main())
+    for age, project_id in enumerate(reversed(project_ids)):
+        used = 1_000_000 - age * 100
+        os.utime(Workspace(cache.root, project_id).manifest_path, (used, used))
+
+
+# -- project ids and paths ------------------------------------------------
+
+
+def test_validate_project_id_canonicalizes():
+    project_id = str(uuid.uuid4())
+    assert validate_project_id(project_id.upper()) == project_id
+    assert validate_project_id(project_id.replace("-", "")) == project_id
+
+
+@pytest.mark.parametrize("bad", ["", "..", "../etc", "not-a-uuid", "/tmp/x", None, 42])
+def test_validate_project_id_rejects(bad):
+    with pytest.raises(ValueError):
+        validate_project_id(bad)
+
+
+def test_workspace_rejects_bad_project_id(tmp_path):
+    with pytest.raises(ValueError):
+        Workspace(str(tmp_path), "../../etc")
+    assert not os.path.exists(tmp_path / "etc")
+
+
+def test_path_for_stays_inside_tree(tmp_path):
+    workspace = Workspace(str(tmp_path), str(uuid.uuid4()))
+    assert workspace.path_for("src/app.py") == os.path.join(workspace.tree, "src", "app.py")
+    # Leading slashes are relative to the project root, not the filesystem root
+    assert workspace.path_for("/src/app.py") == os.path.join(workspace.tree, "src", "app.py")
+    assert workspace.path_for("src/../app.py") == os.path.join(workspace.tree, "app.py")
+    for bad in ("../escape.py", "src/../../escape.py", "../" + os.path.basename(workspace.dir) + "/manifest.json"):
+        with pytest.raises(ValueError):
+            workspace.path_for(bad)
+
+
+def test_changes_cannot_write_outside_tree(tmp_path):
+    project_id = str(uuid.uuid4())
+    cache = _cache(tmp_path, {project_id: {"ok.py": "print(1)\n"}})
+
+    async def main():
+        await cache.prepare(project_id)
+        with pytest.raises(ValueError):
+            await cache.prepare(project_id, {"../../escape.py": "x"})
+        with pytest.raises(ValueError):
+            await cache.prepare(project_id, {"../../escape.py": None})
+        with pytest.raises(ValueError):
+            await cache.prepare("../" + project_id)
+
+    asyncio.run(main())
+    assert not any(name.endswith("escape.py") for _, _, names in os.walk(tmp_path) for name in names)
+
+
+def test_evict_ignores_unexpected_entries(tmp_path):
+    cache = _cache(tmp_path, max_projects=0)
+    stray = tmp_path / "projects" / "not-a-project"
+    stray.mkdir()
+    assert cache.evict() == []
+    assert stray.exists()
+
+
+# -- eviction -------------------------------------------------------------
+
+
+def test_evicts_least_recently_used_over_project_cap(tmp_path):
+    ids = _ids(4)
+    cache = _cache(tmp_path, {pid: {"a.py": pid} for pid in ids}, max_projects=2)
+    _prepare_all(cache, ids)
+
+    assert cache.evict() == ids[:2]
+    remaining = sorted(os.listdir(tmp_path / "projects"))
+    assert remaining == sorted(ids[2:])
+
+
+def test_evicts_least_recently_used_over_quota(tmp_path):
+    ids = _ids(3)
+    cache = _cache(tmp_path, {pid: {"big.bin": pid * 2000} for pid in ids})
+    _prepare_all(cache, ids)
+    total = sum(_dir_size(Workspace(cache.root, pid).dir) for pid in ids) + _dir_size(cache.blobs)
+
+    # One byte over: dropping the oldest workspace is enough
+    cache.quota_bytes = total - 1
+    assert cache.evict() == ids[:1]
+    # Its blob is no longer referenced, the others' are
+    assert sum(len(names) for _, _, names in os.walk(cache.blobs)) == 2
+
+
+def test_recently_used_workspace_survives(tmp_path):
+    ids = _ids(3)
+    cache = _cache(tmp_path, {pid: {"a.py": pid} for pid in ids}, max_projects=2)
+    _prepare_all(cache, ids)
+    # A run touches the oldest one, so the next oldest goes instead
+    asyncio.run(cache.prepare(ids[0]))
+
+    assert cache.evict() == [ids[1]]
+
+
+def test_in_use_workspace_is_skipped(tmp_path):
+    ids = _ids(3)
+    cache = _cache(tmp_path, {pid: {"a.py": pid} for pid in ids}, max_projects=2)
+    _prepare_all(cache, ids)
+    cache._in_use[ids[0]] = 1
+
+    assert cache.evict() == [ids[1]]
+    assert sorted(os.listdir(tmp_path / "projects")) == sorted([ids[0], ids[2]])
+
+
+def test_evicted_workspace_is_reloaded(tmp_path):
+    project_id = str(uuid.uuid4())
+    cache = _cache(tmp_path, {project_id: {"a.py": "one\n"}}, max_projects=0)
+    _prepare_all(cache, [project_id])
+    assert cache.evict() == [project_id]
+
+    workspace = asyncio.run(cache.prepare(project_id, {"b.py": "two\n"}))
+    assert sorted(os.listdir(workspace.tree)) == ["a.py", "b.py"]